@@ -0,0 +1,231 @@
+"""
+Audit log of the agent nodes.
+audit_log only copies the entry onto a bounded queue; a background thread compacts the entries,
+writes them as JSON lines in batches with one fsync per batch, and rotates the file by size or age
+into gzip archives. State fields larger than a limit are stored as a prefix plus their SHA-256 and
+length, so records stay auditable without writing whole SQL results or news to every line.
+Each batch is also handed to the sinks (by default the indexed store of agent/audit_store.py).
+"""
+import atexit
+import glob
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from agent.config import (
+    AUDIT_LOG_PATH,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_SECONDS,
+    AUDIT_MAX_BYTES,
+    AUDIT_ROTATE_SECONDS,
+    AUDIT_BACKUPS,
+    AUDIT_FIELD_MAX_CHARS,
+    AUDIT_DB_ENABLED,
+)
+
+_STOP = object()
+
+
+def compact_value(value: Any, max_chars: int = AUDIT_FIELD_MAX_CHARS) -> Any:
+    """
+    Audit form of a state value: small values are kept as they are, large ones become
+    {"truncated": prefix, "sha256": digest of the full text, "chars": full length}.
+    Args:
+        value: State value (strings are hashed as is, other values as JSON).
+        max_chars (int): Maximum characters kept verbatim.
+    Returns:
+        The value itself or its truncated form.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) <= max_chars:
+        return value
+    return {
+        "truncated": text[:max_chars],
+        "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "chars": len(text),
+    }
+
+
+def compact_state(state: Optional[dict], max_chars: int = AUDIT_FIELD_MAX_CHARS) -> Optional[dict]:
+    """Audit form of an agent state (see compact_value)."""
+    if state is None:
+        return None
+    return {key: compact_value(value, max_chars) for key, value in state.items()}
+
+
+class AuditWriter:
+    """
+    Background JSON-lines writer with batched fsync and rotation.
+    log() never blocks: when the queue is full the entry is dropped and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        path: str = AUDIT_LOG_PATH,
+        max_queue: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_seconds: float = AUDIT_FLUSH_SECONDS,
+        max_bytes: int = AUDIT_MAX_BYTES,
+        rotate_seconds: float = AUDIT_ROTATE_SECONDS,
+        backups: int = AUDIT_BACKUPS,
+        field_max_chars: int = AUDIT_FIELD_MAX_CHARS,
+        sinks: Optional[list[Callable[[list[dict]], Any]]] = None,
+    ):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.field_max_chars = field_max_chars
+        self.sinks = sinks or []
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._file = None
+        self._opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, entry: dict):
+        """Queue an entry (its state dicts are copied; compaction happens on the writer thread)."""
+        entry = {k: dict(v) if isinstance(v, dict) else v for k, v in entry.items()}
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued entry is written and synced.
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+        Returns:
+            bool: True if the queue was drained in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self):
+        """Write the pending entries and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            entries = batch[:-1] if stop else batch
+            try:
+                if entries:
+                    self._write(entries)
+            except Exception as e:
+                print(f"[AUDIT DEBUG] Falha ao gravar {len(entries)} entradas de auditoria: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write(self, entries: list[dict]):
+        if self._file is not None and self._should_rotate():
+            self._rotate()
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._opened_at = time.time()
+        lines = []
+        for entry in entries:
+            for key in ("input_state", "output_state"):
+                if key in entry:
+                    entry[key] = compact_state(entry[key], self.field_max_chars)
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.written += len(entries)
+        for sink in self.sinks:
+            try:
+                sink(entries)
+            except Exception as e:
+                print(f"[AUDIT DEBUG] Falha ao enviar {len(entries)} entradas para {sink}: {e}")
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        """Close the current file, compress it to <path>.<timestamp>.gz and keep the newest `backups` archives."""
+        self._file.close()
+        self._file = None
+        archive = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.gz"
+        with open(self.path, "rb") as src, gzip.open(archive, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.path)
+        self.rotations += 1
+        archives = sorted(glob.glob(f"{glob.escape(self.path)}.*.gz"))
+        for old in archives[: max(len(archives) - self.backups, 0)]:
+            os.remove(old)
+
+
+@lru_cache(maxsize=1)
+def get_audit_writer() -> AuditWriter:
+    """Process-wide audit writer, flushed at interpreter exit."""
+    sinks = []
+    if AUDIT_DB_ENABLED:
+        from agent.audit_store import AuditStore
+
+        sinks.append(AuditStore().insert_many)
+    writer = AuditWriter(sinks=sinks)
+    atexit.register(writer.close)
+    return writer
+
+
+def audit_log(node: str, input_state: dict, decision: str, output_state: dict):
+    """
+    Record a node decision in the audit log without blocking the caller.
+    Args:
+        node (str): Node name.
+        input_state (dict): State received by the node.
+        decision (str): Decision taken by the node.
+        output_state (dict): State returned by the node.
+    """
+    get_audit_writer().log(
+        {
+            "timestamp": datetime.now().isoformat(),
+            "node": node,
+            "input_state": input_state,
+            "decision": decision,
+            "output_state": output_state,
+        }
+    )
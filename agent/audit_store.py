@@ -0,0 +1,262 @@
+"""
+Indexed SQLite store of the agent audit log, for operational queries.
+The audit writer (agent/audit.py) ingests every batch it writes to the JSONL file into this database
+as well. Events are indexed by timestamp, (node, timestamp) and (decision, timestamp), so filtered
+listings and per-hour/per-day counts read only the matching index range instead of scanning months
+of JSONL. scripts/query_audit.py is the command-line front end.
+"""
+import glob
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from agent.config import AUDIT_DB_PATH, AUDIT_LOG_PATH
+from agent.routing import BLOCKED_DECISION
+
+# Decisions of failed SQL steps (prefixes of the decisions recorded by the SQL nodes)
+FAILED_SQL_DECISIONS = [
+    "Falha ao gerar SQL",
+    "Faltando sql_query no estado",
+    "Consulta SQL rejeitada",
+    "Erro ao executar SQL",
+]
+
+_BUCKETS = {"hour": 13, "day": 10, "minute": 16}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    node TEXT NOT NULL,
+    decision TEXT,
+    question TEXT,
+    sql_query TEXT,
+    input_state TEXT,
+    output_state TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_events (ts);
+CREATE INDEX IF NOT EXISTS idx_audit_node_ts ON audit_events (node, ts);
+CREATE INDEX IF NOT EXISTS idx_audit_decision_ts ON audit_events (decision, ts);
+"""
+
+# Natural key of an event: the same log line ingested twice (live sink, then a backfill) is stored once
+_KEY_COLUMNS = "ts, node, IFNULL(decision, ''), IFNULL(question, '')"
+_UNIQUE_KEY = f"CREATE UNIQUE INDEX IF NOT EXISTS idx_audit_event_key ON audit_events ({_KEY_COLUMNS})"
+
+
+def parse_since(value: Optional[str], now: Optional[datetime] = None) -> Optional[str]:
+    """
+    Start of a time window as an ISO timestamp.
+    Args:
+        value (str): Relative window ('30m', '12h', '7d') or an ISO date/timestamp.
+        now (datetime, optional): Reference time for relative windows.
+    Returns:
+        str or None: ISO timestamp, comparable with the stored timestamps.
+    """
+    if not value:
+        return None
+    units = {"m": "minutes", "h": "hours", "d": "days"}
+    if value[-1] in units and value[:-1].isdigit():
+        return ((now or datetime.now()) - timedelta(**{units[value[-1]]: int(value[:-1])})).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+
+def _text(value) -> Optional[str]:
+    """Plain string of a state field (truncated fields keep their prefix)."""
+    if isinstance(value, dict) and "truncated" in value:
+        return value["truncated"]
+    return value if isinstance(value, str) else None
+
+
+class AuditStore:
+    """SQLite audit event store (one connection per thread, WAL journal)."""
+
+    def __init__(self, path: str = AUDIT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.execute(_UNIQUE_KEY)
+        except sqlite3.IntegrityError:
+            # Stores created before the unique key may hold duplicated events: keep the first copy
+            with conn:
+                conn.execute(
+                    f"DELETE FROM audit_events WHERE id NOT IN (SELECT MIN(id) FROM audit_events GROUP BY {_KEY_COLUMNS})"
+                )
+            conn.execute(_UNIQUE_KEY)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def insert_many(self, entries: Iterable[dict]) -> int:
+        """
+        Ingest audit entries (as written to the JSONL log) in one transaction.
+        Args:
+            entries (Iterable[dict]): Audit entries.
+        Returns:
+            int: Number of events inserted (events already stored are skipped).
+        """
+        rows = []
+        for entry in entries:
+            input_state = entry.get("input_state") or {}
+            output_state = entry.get("output_state") or {}
+            rows.append((
+                entry["timestamp"],
+                entry["node"],
+                entry.get("decision"),
+                _text(input_state.get("question")),
+                _text(output_state.get("sql_query")),
+                json.dumps(input_state, ensure_ascii=False, default=str),
+                json.dumps(output_state, ensure_ascii=False, default=str),
+            ))
+        conn = self._connection()
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO audit_events (ts, node, decision, question, sql_query, input_state, output_state) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return conn.total_changes - before
+
+    def backfill(self, log_path: str = AUDIT_LOG_PATH, batch_size: int = 5000) -> int:
+        """
+        Ingest an existing JSONL audit log and its rotated .gz archives.
+        Idempotent: events already in the store (e.g. ingested by the live writer sink) are skipped.
+        Args:
+            log_path (str): Current audit log path.
+            batch_size (int): Events per transaction.
+        Returns:
+            int: Number of events inserted.
+        """
+        total = 0
+        for path in sorted(glob.glob(f"{glob.escape(log_path)}.*.gz")) + [log_path]:
+            if not os.path.exists(path):
+                continue
+            opener = gzip.open if path.endswith(".gz") else open
+            batch = []
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        continue
+                    if len(batch) >= batch_size:
+                        total += self.insert_many(batch)
+                        batch = []
+            total += self.insert_many(batch)
+        return total
+
+    def _where(
+        self,
+        node: Optional[str],
+        decision: Optional[str],
+        decision_prefixes: Optional[list[str]],
+        since: Optional[str],
+        until: Optional[str],
+    ) -> tuple[str, list]:
+        clauses, params = [], []
+        if node:
+            clauses.append("node = ?")
+            params.append(node)
+        if decision:
+            clauses.append("decision = ?")
+            params.append(decision)
+        if decision_prefixes:
+            # Ranges instead of LIKE, so the (decision, ts) index is used
+            clauses.append("(" + " OR ".join("(decision >= ? AND decision < ?)" for _ in decision_prefixes) + ")")
+            for prefix in decision_prefixes:
+                params += [prefix, prefix + "\uffff"]
+        if since:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until:
+            clauses.append("ts < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def events(
+        self,
+        node: Optional[str] = None,
+        decision: Optional[str] = None,
+        decision_prefixes: Optional[list[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+        with_states: bool = False,
+    ) -> list[dict]:
+        """
+        Most recent events matching the filters.
+        Args:
+            node (str, optional): Node name.
+            decision (str, optional): Exact decision.
+            decision_prefixes (list[str], optional): Decisions starting with any of these prefixes.
+            since (str, optional): ISO timestamp lower bound (inclusive).
+            until (str, optional): ISO timestamp upper bound (exclusive).
+            limit (int): Maximum events returned.
+            with_states (bool): Include the input and output states.
+        Returns:
+            list[dict]: Events, newest first.
+        """
+        where, params = self._where(node, decision, decision_prefixes, since, until)
+        columns = "id, ts, node, decision, question, sql_query" + (", input_state, output_state" if with_states else "")
+        rows = self._connection().execute(
+            f"SELECT {columns} FROM audit_events{where} ORDER BY ts DESC LIMIT ?", params + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(
+        self,
+        by: str = "hour",
+        node: Optional[str] = None,
+        decision: Optional[str] = None,
+        decision_prefixes: Optional[list[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> list[tuple[str, int]]:
+        """
+        Event counts grouped by time bucket ('minute', 'hour', 'day'), 'node' or 'decision'.
+        Args:
+            by (str): Grouping.
+            node, decision, decision_prefixes, since, until: Filters (see events).
+        Returns:
+            list[tuple[str, int]]: (group, count), ordered by group (time buckets) or by count (node/decision).
+        """
+        if by in _BUCKETS:
+            key, order = f"substr(ts, 1, {_BUCKETS[by]})", "grp"
+        elif by in ("node", "decision"):
+            key, order = by, "n DESC"
+        else:
+            raise ValueError(f"Agrupamento inválido: {by}")
+        where, params = self._where(node, decision, decision_prefixes, since, until)
+        rows = self._connection().execute(
+            f"SELECT {key} AS grp, COUNT(*) AS n FROM audit_events{where} GROUP BY grp ORDER BY {order}", params
+        ).fetchall()
+        return [(row["grp"], row["n"]) for row in rows]
+
+    def guardrail_blocks(self, by: str = "hour", since: Optional[str] = None) -> list[tuple[str, int]]:
+        """Questions blocked by the guardrail per time bucket."""
+        return self.counts(by=by, node="router_node", decision=BLOCKED_DECISION, since=since)
+
+    def failed_sql(self, since: Optional[str] = None, limit: int = 100) -> list[dict]:
+        """SQL generation and execution failures, newest first."""
+        return self.events(decision_prefixes=FAILED_SQL_DECISIONS, since=since, limit=limit)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
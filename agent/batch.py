@@ -0,0 +1,109 @@
+"""
+Batch question API for report generation jobs.
+Runs the compiled LangGraph agent through its async API with bounded concurrency. Questions that
+normalize to the same text are answered once, and every answer is emitted as soon as it is ready, so
+results can be written out as JSONL while the rest of the batch is still running.
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Iterable, Optional
+
+from agent.config import BATCH_CONCURRENCY
+from agent.text_utils import normalize_text
+from agent.tracing import tracer
+
+
+async def _answer(question: str) -> dict:
+    # Imported lazily: building the graph loads tools and clients
+    from agent.langgraph_agent import langgraph_agent, clean_state
+
+    start = time.perf_counter()
+    try:
+        with tracer.span("agent", "request", batch=True):
+            state = await langgraph_agent.ainvoke(clean_state({"question": question}))
+        record = {
+            "final_result": state.get("final_result", "No result"),
+            "sql_query": state.get("sql_query"),
+            "error": None,
+        }
+    except Exception as e:
+        record = {"final_result": None, "sql_query": None, "error": f"{type(e).__name__}: {e}"}
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+async def run_batch(questions: Iterable[str], concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[dict]:
+    """
+    Answer a list of questions concurrently, yielding one record per question in completion order.
+    Args:
+        questions (Iterable[str]): Questions to answer.
+        concurrency (int): Maximum number of agent runs in flight.
+    Yields:
+        dict: {"index", "question", "final_result", "sql_query", "error", "elapsed_ms", "deduplicated"}.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    groups: dict[str, list[tuple[int, str]]] = {}
+    for index, question in enumerate(questions):
+        groups.setdefault(normalize_text(question), []).append((index, question))
+
+    async def run_group(members: list[tuple[int, str]]) -> tuple[list[tuple[int, str]], dict]:
+        async with semaphore:
+            return members, await _answer(members[0][1])
+
+    tasks = [asyncio.create_task(run_group(members)) for members in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            members, record = await next_done
+            for position, (index, question) in enumerate(members):
+                yield {"index": index, "question": question, **record, "deduplicated": position > 0}
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def write_batch_jsonl(
+    questions: Iterable[str], path: str, concurrency: int = BATCH_CONCURRENCY
+) -> dict:
+    """
+    Answer questions with run_batch and append each record to a JSONL file as soon as it is ready.
+    Args:
+        questions (Iterable[str]): Questions to answer.
+        path (str): Output JSONL file.
+        concurrency (int): Maximum number of agent runs in flight.
+    Returns:
+        dict: Batch totals (questions, errors, elapsed_s).
+    """
+    start = time.perf_counter()
+    total = errors = 0
+    with open(path, "w", encoding="utf-8") as f:
+        async for record in run_batch(questions, concurrency):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            total += 1
+            errors += record["error"] is not None
+    return {"questions": total, "errors": errors, "elapsed_s": round(time.perf_counter() - start, 2)}
+
+
+def load_questions(path: str) -> list[str]:
+    """
+    Read questions from a text file (one per line) or a JSONL file with a "question" field.
+    Blank lines and lines starting with '#' are ignored.
+    """
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            questions.append(json.loads(line)["question"] if line.startswith("{") else line)
+    return questions
+
+
+def ask_batch(questions: Iterable[str], concurrency: Optional[int] = None) -> list[dict]:
+    """Synchronous helper: answer all questions and return the records in input order."""
+
+    async def collect():
+        return [r async for r in run_batch(questions, concurrency or BATCH_CONCURRENCY)]
+
+    return sorted(asyncio.run(collect()), key=lambda r: r["index"])
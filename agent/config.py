@@ -24,6 +24,44 @@ CSV_PATH = os.getenv("CSV_PATH", "data/srag_data.csv")
 # Path to the data quality report output (relative to project root)
 REPORT_PATH = os.getenv("REPORT_PATH", "report/data_quality_report.md")
 
+# SQLite tuning for the shared read-only engine (see agent/database.py)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "32768"))
+
+# Connection pool size for the shared read-only engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "4"))
+
+# Size of the bounded thread pool used by the async database API (defaults to the pool size)
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", str(DB_POOL_SIZE)))
+
+# Limits for agent-generated SQL (see agent/database.py:execute_bounded)
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "1000"))
+SQL_MAX_BYTES = int(os.getenv("SQL_MAX_BYTES", str(1024 * 1024)))
+SQL_TIMEOUT_SECONDS = float(os.getenv("SQL_TIMEOUT_SECONDS", "10"))
+SQL_FETCH_BATCH_SIZE = int(os.getenv("SQL_FETCH_BATCH_SIZE", "200"))
+
+# Maximum full scans of srag_cases allowed in one query plan (see agent/sql_guard.py)
+SQL_MAX_FULL_SCANS = int(os.getenv("SQL_MAX_FULL_SCANS", "2"))
+
+# Worker processes that execute agent-generated SQL outside the web process (0 runs queries in-process)
+SQL_WORKER_PROCESSES = int(os.getenv("SQL_WORKER_PROCESSES", "2"))
+# Per-query limits enforced inside each worker process
+SQL_WORKER_CPU_SECONDS = int(os.getenv("SQL_WORKER_CPU_SECONDS", "10"))
+SQL_WORKER_MEMORY_MB = int(os.getenv("SQL_WORKER_MEMORY_MB", "512"))
+
+# Result cache for agent SQL (see agent/query_cache.py); QUERY_CACHE_DIR enables the on-disk tier
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512"))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+QUERY_CACHE_DIR = os.getenv("QUERY_CACHE_DIR", "")
+# Limits of the on-disk tier (files of older data versions are deleted when the version changes)
+QUERY_CACHE_DISK_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_DISK_MAX_ENTRIES", "4096"))
+QUERY_CACHE_DISK_MAX_BYTES = int(os.getenv("QUERY_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Fraction of SQL tool executions that print debug output (0 disables, 1 logs every query)
+SQL_TOOL_DEBUG_RATE = float(os.getenv("SQL_TOOL_DEBUG_RATE", "0"))
+SQL_DEBUG_SAMPLE_ROWS = int(os.getenv("SQL_DEBUG_SAMPLE_ROWS", "5"))
+
 # List of allowed tables for SQL queries (security guardrail)
 ALLOWED_TABLES = [
     "srag_cases"
@@ -32,6 +70,95 @@ ALLOWED_TABLES = [
 # Directory for audit logs
 LOGS_DIR = os.getenv("LOGS_DIR", os.path.join(os.path.dirname(__file__), "..", "logs"))
 
+# Agent audit log (agent/audit.py): background writer queue and batching, rotation by size or age into
+# gzip files (AUDIT_BACKUPS kept), and maximum characters of a state field before it is truncated and hashed
+AUDIT_LOG_PATH = os.getenv("AUDIT_LOG_PATH", os.path.join(LOGS_DIR, "agent_audit.log"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "256"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0"))
+AUDIT_MAX_BYTES = int(os.getenv("AUDIT_MAX_BYTES", str(50 * 1024 * 1024)))
+AUDIT_ROTATE_SECONDS = float(os.getenv("AUDIT_ROTATE_SECONDS", "86400"))
+AUDIT_BACKUPS = int(os.getenv("AUDIT_BACKUPS", "10"))
+AUDIT_FIELD_MAX_CHARS = int(os.getenv("AUDIT_FIELD_MAX_CHARS", "2000"))
+
+# SQL profiler (agent/sql_profiler.py): queries at or above SQL_SLOW_QUERY_MS are explained and written to the
+# slow-query log; at most SQL_PROFILER_MAX_FINGERPRINTS distinct queries are aggregated
+SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "true").lower() in ("1", "true", "yes")
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+SQL_SLOW_QUERY_LOG = os.getenv("SQL_SLOW_QUERY_LOG", os.path.join(LOGS_DIR, "slow_queries.log"))
+SQL_PROFILER_MAX_FINGERPRINTS = int(os.getenv("SQL_PROFILER_MAX_FINGERPRINTS", "1000"))
+
+# Tracing of nodes, LLM calls, SQL and news searches (agent/tracing.py): spans buffered in memory, JSON export
+# path (written at exit) and optional local metrics endpoint port (0 disables it)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "5000"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(LOGS_DIR, "agent_traces.json"))
+TRACE_METRICS_PORT = int(os.getenv("TRACE_METRICS_PORT", "0"))
+
+# Indexed SQLite copy of the audit log for operational queries (agent/audit_store.py, scripts/query_audit.py)
+AUDIT_DB_PATH = os.getenv("AUDIT_DB_PATH", os.path.join(LOGS_DIR, "agent_audit.db"))
+AUDIT_DB_ENABLED = os.getenv("AUDIT_DB_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Directory for persistent local caches (question -> SQL, news, summaries)
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "cache"))
+
+# Executive summary artifact, regenerated when the data version or the news change (agent/summary_cache.py)
+EXECUTIVE_SUMMARY_PATH = os.getenv("EXECUTIVE_SUMMARY_PATH", os.path.join(CACHE_DIR, "executive_summary.json"))
+
+# News search cache (agent/news_cache.py): provider ("tavily" or the offline "local" stand-in, which reads
+# NEWS_LOCAL_PATH when set), result TTL and on-disk tier ("" disables it)
+NEWS_PROVIDER = os.getenv("NEWS_PROVIDER", "tavily")
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", "900"))
+NEWS_CACHE_DIR = os.getenv("NEWS_CACHE_DIR", os.path.join(CACHE_DIR, "news"))
+NEWS_LOCAL_PATH = os.getenv("NEWS_LOCAL_PATH", "")
+NEWS_MAX_RESULTS = int(os.getenv("NEWS_MAX_RESULTS", "5"))
+
+# Persistent question -> SQL cache used by generate_sql_from_question (see agent/question_cache.py)
+QUESTION_CACHE_PATH = os.getenv("QUESTION_CACHE_PATH", os.path.join(CACHE_DIR, "question_sql_cache.json"))
+QUESTION_CACHE_FUZZY_THRESHOLD = float(os.getenv("QUESTION_CACHE_FUZZY_THRESHOLD", "0.85"))
+
+# Deterministic intent parser (agent/intent_parser.py): minimum share of recognized words to skip the LLM
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "1.0"))
+
+# Local scope classifier for the input guardrail (agent/scope_classifier.py): questions with
+# p(in scope) between the two thresholds are sent to the LLM
+SCOPE_ACCEPT_THRESHOLD = float(os.getenv("SCOPE_ACCEPT_THRESHOLD", "0.75"))
+SCOPE_REJECT_THRESHOLD = float(os.getenv("SCOPE_REJECT_THRESHOLD", "0.25"))
+SCOPE_DECISION_CACHE_SIZE = int(os.getenv("SCOPE_DECISION_CACHE_SIZE", "4096"))
+SCOPE_TRAIN_ON_LOGS = os.getenv("SCOPE_TRAIN_ON_LOGS", "true").lower() == "true"
+
+# Agent routing: "keyword" (scope classifier + keyword routing + SQL generation) or "fused"
+# (one structured-output LLM call for scope, route and SQL; see agent/routing.py)
+AGENT_ROUTING_MODE = os.getenv("AGENT_ROUTING_MODE", "keyword")
+
+# LLM gateway (agent/llm_gateway.py): provider ("openai" or the offline "stub"), model (empty = client default),
+# global concurrency limit, retries of transient errors and per-request timeout
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+LLM_MODEL = os.getenv("LLM_MODEL", "")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+# Result compaction before summarization (agent/result_compaction.py): digest token budget and rows listed
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "1500"))
+SUMMARY_TOP_K = int(os.getenv("SUMMARY_TOP_K", "10"))
+
+# Maximum concurrent agent runs in batch jobs (agent/batch.py)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Maximum number of parallel sub-queries a compound question is split into (agent/planner.py)
+PLANNER_MAX_SUBQUERIES = int(os.getenv("PLANNER_MAX_SUBQUERIES", "8"))
+
+# Conversational sessions (agent/session.py): questions kept in the follow-up context, maximum rows of the
+# previous result kept for local re-filtering, and maximum characters of the previous digest kept in context
+SESSION_HISTORY_TURNS = int(os.getenv("SESSION_HISTORY_TURNS", "5"))
+SESSION_MAX_CACHED_ROWS = int(os.getenv("SESSION_MAX_CACHED_ROWS", "200"))
+SESSION_CONTEXT_CHARS = int(os.getenv("SESSION_CONTEXT_CHARS", "1500"))
+# Sessions whose context is kept in memory (least recently used evicted first) and idle time before eviction
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+
 # Path to the cleaned data dictionary JSON (relative to project root)
 DATA_DICTIONARY_PATH = os.getenv("DATA_DICTIONARY_PATH", os.path.join(os.path.dirname(__file__), "..", "docs", "data_dictionary_clean.json"))
 
@@ -41,8 +168,76 @@ __all__ = [
     "DB_PATH",
     "CSV_PATH",
     "REPORT_PATH",
+    "SQLITE_MMAP_SIZE",
+    "SQLITE_CACHE_SIZE_KB",
+    "DB_POOL_SIZE",
+    "DB_POOL_MAX_OVERFLOW",
+    "DB_MAX_WORKERS",
+    "SQL_MAX_ROWS",
+    "SQL_MAX_BYTES",
+    "SQL_TIMEOUT_SECONDS",
+    "SQL_FETCH_BATCH_SIZE",
+    "SQL_MAX_FULL_SCANS",
+    "SQL_WORKER_PROCESSES",
+    "SQL_WORKER_CPU_SECONDS",
+    "SQL_WORKER_MEMORY_MB",
+    "QUERY_CACHE_MAX_ENTRIES",
+    "QUERY_CACHE_MAX_BYTES",
+    "QUERY_CACHE_DIR",
+    "QUERY_CACHE_DISK_MAX_ENTRIES",
+    "QUERY_CACHE_DISK_MAX_BYTES",
+    "SQL_TOOL_DEBUG_RATE",
+    "SQL_DEBUG_SAMPLE_ROWS",
     "ALLOWED_TABLES",
     "LOGS_DIR",
+    "AUDIT_LOG_PATH",
+    "AUDIT_QUEUE_SIZE",
+    "AUDIT_BATCH_SIZE",
+    "AUDIT_FLUSH_SECONDS",
+    "AUDIT_MAX_BYTES",
+    "AUDIT_ROTATE_SECONDS",
+    "AUDIT_BACKUPS",
+    "AUDIT_FIELD_MAX_CHARS",
+    "AUDIT_DB_PATH",
+    "AUDIT_DB_ENABLED",
+    "SQL_PROFILER_ENABLED",
+    "SQL_SLOW_QUERY_MS",
+    "SQL_SLOW_QUERY_LOG",
+    "SQL_PROFILER_MAX_FINGERPRINTS",
+    "TRACING_ENABLED",
+    "TRACE_MAX_SPANS",
+    "TRACE_EXPORT_PATH",
+    "TRACE_METRICS_PORT",
+    "CACHE_DIR",
+    "EXECUTIVE_SUMMARY_PATH",
+    "NEWS_PROVIDER",
+    "NEWS_CACHE_TTL_SECONDS",
+    "NEWS_CACHE_DIR",
+    "NEWS_LOCAL_PATH",
+    "NEWS_MAX_RESULTS",
+    "QUESTION_CACHE_PATH",
+    "QUESTION_CACHE_FUZZY_THRESHOLD",
+    "INTENT_MIN_CONFIDENCE",
+    "SCOPE_ACCEPT_THRESHOLD",
+    "SCOPE_REJECT_THRESHOLD",
+    "SCOPE_DECISION_CACHE_SIZE",
+    "SCOPE_TRAIN_ON_LOGS",
+    "AGENT_ROUTING_MODE",
+    "LLM_PROVIDER",
+    "LLM_MODEL",
+    "LLM_MAX_CONCURRENCY",
+    "LLM_MAX_RETRIES",
+    "LLM_RETRY_BASE_SECONDS",
+    "LLM_TIMEOUT_SECONDS",
+    "SUMMARY_TOKEN_BUDGET",
+    "SUMMARY_TOP_K",
+    "BATCH_CONCURRENCY",
+    "PLANNER_MAX_SUBQUERIES",
+    "SESSION_HISTORY_TURNS",
+    "SESSION_MAX_CACHED_ROWS",
+    "SESSION_CONTEXT_CHARS",
+    "SESSION_MAX_SESSIONS",
+    "SESSION_IDLE_SECONDS",
     "DATA_DICTIONARY_PATH",
     "settings"
 ]
@@ -0,0 +1,261 @@
+"""
+Shared SQLite access for the SRAG database.
+Readers (agent SQL tool, executive summary, dashboard) share one pooled, read-only engine
+tuned with performance pragmas; the ETL gets a separate writable engine.
+Async callers run blocking database work on a bounded thread pool (run_in_db_executor).
+Agent-generated SQL goes through execute_bounded, which caps rows, bytes and wall-clock time.
+"""
+import asyncio
+import functools
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from agent.sql_profiler import install_profiler
+
+from agent.config import (
+    DB_PATH,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE_KB,
+    DB_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+    DB_MAX_WORKERS,
+    SQL_MAX_ROWS,
+    SQL_MAX_BYTES,
+    SQL_TIMEOUT_SECONDS,
+    SQL_FETCH_BATCH_SIZE,
+)
+
+# Bounded pool for blocking database calls made from async code
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="srag-db")
+
+
+def apply_read_pragmas(dbapi_conn, connection_record):
+    """
+    Configure every new pooled connection: memory-mapped I/O, a larger page cache,
+    in-memory temp storage (sorts, GROUP BY) and query_only as a second read-only barrier.
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def create_read_engine(db_path: str = DB_PATH) -> Engine:
+    """
+    Create a pooled, read-only SQLAlchemy engine for the given SQLite file.
+    Args:
+        db_path (str): Path to the SQLite database file.
+    Returns:
+        Engine: Engine opening connections with mode=ro and the read pragmas applied, timed by the SQL profiler.
+    """
+    abs_db_path = os.path.abspath(db_path)
+    engine = create_engine(
+        f"sqlite:///file:{abs_db_path}?mode=ro&uri=true",
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_MAX_OVERFLOW,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", apply_read_pragmas)
+    return install_profiler(engine)
+
+
+def create_write_engine(db_uri: str = f"sqlite:///{DB_PATH}") -> Engine:
+    """
+    Create a writable engine for the ETL (load_data). Not pooled for reuse by readers.
+    Args:
+        db_uri (str): SQLAlchemy connection URI of the SQLite database.
+    Returns:
+        Engine: Writable engine with in-memory temp storage and a larger page cache.
+    """
+    engine = create_engine(db_uri)
+
+    @event.listens_for(engine, "connect")
+    def _apply_write_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return engine
+
+
+def data_version(db_path: str = DB_PATH) -> str:
+    """
+    Identifier of the current database contents; changes whenever the ETL rewrites the file.
+    Args:
+        db_path (str): Path to the SQLite database file.
+    Returns:
+        str: "<mtime_ns>-<size>" of the file, or "missing" if it does not exist.
+    """
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return "missing"
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """
+    Process-wide read-only engine for the configured DB_PATH, shared by every reader.
+    Returns:
+        Engine: The shared read-only engine.
+    """
+    return create_read_engine(DB_PATH)
+
+
+async def run_in_db_executor(fn, *args, **kwargs):
+    """
+    Run a blocking database call on the bounded DB_EXECUTOR without blocking the event loop.
+    Args:
+        fn: Blocking callable.
+        *args, **kwargs: Arguments forwarded to fn.
+    Returns:
+        The value returned by fn.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+# Number of SQLite VM instructions between two deadline checks in execute_bounded
+PROGRESS_HANDLER_OPS = 10_000
+
+
+@dataclass
+class QueryResult:
+    """
+    Compact, bounded result of an agent SQL query.
+    Rows are kept as tuples; `truncated` is set when a row, byte or time limit cut the result short.
+    """
+    columns: list[str]
+    rows: list[tuple]
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def approx_bytes(self) -> int:
+        """Approximate in-memory payload of the rows (used for cache accounting)."""
+        return sum(_row_size(row) for row in self.rows)
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Rows as a list of {column: value} dictionaries."""
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    def to_columnar(self) -> dict[str, Any]:
+        """Compact column-oriented payload (one list per column), cheap to pickle across processes."""
+        return {
+            "columns": self.columns,
+            "data": [list(col) for col in zip(*self.rows)] if self.rows else [[] for _ in self.columns],
+            "truncated": self.truncated,
+            "truncation_reason": self.truncation_reason,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+    @classmethod
+    def from_columnar(cls, payload: dict[str, Any]) -> "QueryResult":
+        """Rebuild a QueryResult from the output of to_columnar."""
+        return cls(
+            columns=payload["columns"],
+            rows=list(zip(*payload["data"])),
+            truncated=payload["truncated"],
+            truncation_reason=payload["truncation_reason"],
+            elapsed_ms=payload["elapsed_ms"],
+        )
+
+    def __str__(self) -> str:
+        text = str(self.to_dicts())
+        if self.truncated:
+            text += f" [resultado truncado em {len(self.rows)} linhas: limite de {self.truncation_reason}]"
+        return text
+
+
+def _row_size(row: tuple) -> int:
+    """Approximate in-memory payload of a row (text/blob length, 8 bytes for numbers and NULL)."""
+    return sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in row)
+
+
+def execute_bounded(
+    dbapi_conn: sqlite3.Connection,
+    query: str,
+    max_rows: int = SQL_MAX_ROWS,
+    max_bytes: int = SQL_MAX_BYTES,
+    timeout: float = SQL_TIMEOUT_SECONDS,
+    batch_size: int = SQL_FETCH_BATCH_SIZE,
+    interrupt: Optional[Callable[[], bool]] = None,
+) -> QueryResult:
+    """
+    Execute a query fetching rows in batches until a row cap, a byte cap or a wall-clock deadline is hit.
+    The deadline is enforced inside SQLite with a progress handler, so long scans are interrupted mid-query.
+    Args:
+        dbapi_conn (sqlite3.Connection): Raw DB-API connection (e.g. pooled_conn.connection.driver_connection).
+        query (str): SQL query to execute.
+        max_rows (int): Maximum number of rows kept.
+        max_bytes (int): Maximum approximate payload size kept.
+        timeout (float): Wall-clock deadline in seconds.
+        batch_size (int): Rows fetched per round trip.
+        interrupt (callable, optional): Extra abort condition checked by the progress handler.
+    Returns:
+        QueryResult: Rows kept so far, with the truncation flag and reason.
+    Raises:
+        TimeoutError: If the deadline expires before the first row is produced.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+
+    def _progress():
+        if time.monotonic() > deadline or (interrupt is not None and interrupt()):
+            return 1
+        return 0
+
+    dbapi_conn.set_progress_handler(_progress, PROGRESS_HANDLER_OPS)
+    cursor = dbapi_conn.cursor()
+    columns: list[str] = []
+    rows: list[tuple] = []
+    size = 0
+    reason = None
+    try:
+        try:
+            cursor.execute(query)
+            columns = [d[0] for d in cursor.description or []]
+            while reason is None:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    if len(rows) >= max_rows:
+                        reason = "max_rows"
+                        break
+                    row_size = _row_size(row)
+                    if size + row_size > max_bytes:
+                        reason = "max_bytes"
+                        break
+                    rows.append(row)
+                    size += row_size
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            if not rows:
+                raise TimeoutError(f"Query exceeded the {timeout:g}s deadline") from e
+            reason = "deadline"
+    finally:
+        cursor.close()
+        dbapi_conn.set_progress_handler(None, 0)
+    return QueryResult(
+        columns=columns,
+        rows=rows,
+        truncated=reason is not None,
+        truncation_reason=reason,
+        elapsed_ms=(time.monotonic() - start) * 1000,
+    )
@@ -1,13 +1,25 @@
 """
 LangChain tool for secure SQL queries to the SRAG SQLite database.
-Exposes only SELECT queries and whitelisted tables for the agent.
+Exposes only SELECT queries and whitelisted tables for the agent (validated by agent/sql_guard.py).
+Queries run in the isolated SQL worker pool (agent/sql_worker_pool.py) unless SQL_WORKER_PROCESSES is 0.
 """
 from langchain.tools import BaseTool
-from sqlalchemy import create_engine, text
 from typing import Any
 
-from agent.config import DB_PATH, ALLOWED_TABLES
+from agent.config import (
+    DB_PATH,
+    SQL_TOOL_DEBUG_RATE,
+    SQL_DEBUG_SAMPLE_ROWS,
+    SQL_WORKER_PROCESSES,
+)
+from agent.database import get_engine, run_in_db_executor, execute_bounded, QueryResult
+from agent.sql_worker_pool import get_sql_worker_pool
+from agent.sql_guard import check_sql
+from agent.query_cache import query_cache
+from agent.tracing import tracer
+from agent.sql_profiler import sql_profiler, explain_on_engine
 import os
+import random
 
 class SQLQueryTool(BaseTool):
     name: str = "query_sqlite"
@@ -20,36 +32,59 @@ class SQLQueryTool(BaseTool):
     def _run(self, query: str) -> Any:
         """
         Execute a secure SQL SELECT query on the SRAG SQLite database, only allowing whitelisted tables.
+        The query is first checked by the cost guard, which may add a LIMIT or reject it, and
+        equivalent queries on the same data version are served from the result cache.
+        Rows are fetched in batches up to SQL_MAX_ROWS / SQL_MAX_BYTES and the query is interrupted
+        after SQL_TIMEOUT_SECONDS.
         Args:
             query (str): The SQL SELECT query to execute.
         Returns:
-            Any: Query result as a list of dictionaries or an error message.
+            Any: QueryResult (rows, columns and truncation flag) or an error message.
         """
-        if not query.strip().lower().startswith("select"):
-            return "Only SELECT statements are allowed."
-        if any(tbl not in query for tbl in ALLOWED_TABLES):
-            return f"Only the following tables are allowed: {ALLOWED_TABLES}"
+        debug = SQL_TOOL_DEBUG_RATE > 0 and random.random() < SQL_TOOL_DEBUG_RATE
         abs_db_path = os.path.abspath(DB_PATH)
-        print(f"[DB TOOL DEBUG] DB_PATH (relativo): {DB_PATH}")
-        print(f"[DB TOOL DEBUG] DB_PATH (absoluto): {abs_db_path}")
         if not os.path.exists(abs_db_path):
             print(f"[DB TOOL ERROR] O arquivo do banco NÃO existe: {abs_db_path}")
             raise FileNotFoundError(f"Banco de dados não encontrado: {abs_db_path}")
-        else:
-            print(f"[DB TOOL DEBUG] O arquivo do banco existe: {abs_db_path}")
-        engine = create_engine(f"sqlite:///{abs_db_path}")
-        try:
-            with engine.connect() as conn:
-                result = conn.execute(text(query))
-                rows = result.fetchall()
-                columns = result.keys()
-                print(f"[DB TOOL DEBUG] rows: {rows}")
-                print(f"[DB TOOL DEBUG] columns: {columns}")
-                dict_rows = [dict(zip(columns, row)) for row in rows]
-                print(f"[DB TOOL DEBUG] dict_rows: {dict_rows}")
-                return dict_rows
-        except Exception as e:
-            return f"Query error: {str(e)}"
+        guard = check_sql(query)
+        if not guard.allowed:
+            return f"Query rejected: {guard.reason}"
+        query = guard.sql
+        with tracer.span("query_sqlite", "sql") as span:
+            cached = query_cache.get(query)
+            if cached is not None:
+                span.set(rows=len(cached), cache_hit=True)
+                if debug:
+                    print(f"[DB TOOL DEBUG] cache hit: {len(cached)} linhas")
+                return cached
+            try:
+                result = self._execute(query)
+            except Exception as e:
+                span.set(error=str(e))
+                return f"Query error: {str(e)}"
+            span.set(rows=len(result), truncated=result.truncated, cache_hit=False)
+        sql_profiler.record(
+            query, result.elapsed_ms, len(result), "agent", explain=lambda: explain_on_engine(get_engine(), query)
+        )
+        query_cache.put(query, result)
+        if debug:
+            print(
+                f"[DB TOOL DEBUG] {len(result)} linhas em {result.elapsed_ms:.1f} ms "
+                f"(truncado: {result.truncation_reason or 'não'}) | colunas: {result.columns} | "
+                f"amostra: {result.rows[:SQL_DEBUG_SAMPLE_ROWS]}"
+            )
+        return result
+
+    @staticmethod
+    def _execute(query: str) -> QueryResult:
+        """Execute in a worker process when the pool is enabled, otherwise on a pooled in-process connection."""
+        if SQL_WORKER_PROCESSES > 0:
+            return get_sql_worker_pool().execute(query)
+        with get_engine().connect() as conn:
+            return execute_bounded(conn.connection.driver_connection, query)
 
     async def _arun(self, query: str) -> Any:
-        return self._run(query)
+        """
+        Async version of _run: executes the query on the bounded database thread pool.
+        """
+        return await run_in_db_executor(self._run, query)
@@ -0,0 +1,203 @@
+"""
+Deterministic intent parser for the most common Portuguese questions about SRAG cases.
+Recognizes a measure (case count, deaths, ICU admissions, mortality/ICU/vaccination rates), filters
+(year, sex, age) and an optional grouping (year, month, sex, age group), and renders the same SQL the
+LLM would write. Questions with words it does not understand get a low confidence and are left to
+the LLM.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from agent.config import INTENT_MIN_CONFIDENCE
+from agent.text_utils import normalize_text
+
+# Same definitions as the rate functions in metrics/queries.py
+RATE_EXPRESSIONS = {
+    "mortality_rate": ("SUM(CASE WHEN EVOLUCAO = '2' THEN 1 ELSE 0 END) * 1.0 / COUNT(*)", "taxa_mortalidade"),
+    "icu_rate": ("SUM(CASE WHEN UTI = '1' THEN 1 ELSE 0 END) * 1.0 / COUNT(*)", "taxa_uti"),
+    "covid_vaccination_rate": ("SUM(CASE WHEN VACINA_COV = '1' THEN 1 ELSE 0 END) * 1.0 / COUNT(*)", "taxa_vacinacao_covid"),
+    "flu_vaccination_rate": ("SUM(CASE WHEN VACINA = '1' THEN 1 ELSE 0 END) * 1.0 / COUNT(*)", "taxa_vacinacao_gripe"),
+}
+
+AGE_GROUP_EXPRESSION = (
+    "CASE WHEN NU_IDADE_N IS NULL THEN 'ignorada' "
+    "WHEN NU_IDADE_N < 12 THEN '0-11' WHEN NU_IDADE_N < 18 THEN '12-17' "
+    "WHEN NU_IDADE_N < 40 THEN '18-39' WHEN NU_IDADE_N < 60 THEN '40-59' ELSE '60+' END"
+)
+
+GROUP_EXPRESSIONS = {
+    "ano": "strftime('%Y', DT_NOTIFIC)",
+    "mes": "strftime('%Y-%m', DT_NOTIFIC)",
+    "sexo": "CS_SEXO",
+    "faixa_etaria": AGE_GROUP_EXPRESSION,
+}
+
+# Words that carry no information for the parser (articles, prepositions, question words, "casos"...)
+STOPWORDS = set(
+    """
+    a o as os um uma de da do das dos em no na nos nas e ou com para pelo pela ao aos que qual quais
+    quanto quantos quantas quanta foi foram e sao ha houve teve tiveram tem existe existem registrado
+    registrados registrada registradas notificado notificados notificada notificadas caso casos srag
+    paciente pacientes pessoa pessoas numero total totais quantidade me diga informe mostre qual
+    ocorreram ocorridos confirmados confirmadas base dados hospitalizados hospitalizadas internacoes
+    entre geral
+    """.split()
+)
+
+# Words that make a question a count even when nothing else is filtered ("Quantos casos de SRAG?")
+COUNT_CUES = {"quantos", "quantas", "quantidade", "numero", "total", "casos"}
+
+_RATE_WORDS = r"(?:taxa|percentual|porcentagem|proporcao|indice)"
+
+# (pattern, handler name); patterns are applied in order and the matched text is consumed
+_PATTERNS = [
+    (r"\b(?:taxa|indice) de (?:mortalidade|letalidade|obitos?)\b|\bmortalidade\b|\bletalidade\b", "mortality_rate"),
+    (rf"\b{_RATE_WORDS} de (?:internacao|internacoes|ocupacao|admissao|admissoes|pacientes|casos)?\s*(?:em |na |de )?uti\b", "icu_rate"),
+    (rf"\b{_RATE_WORDS} de (?:vacinacao|vacinados|cobertura vacinal)\s*(?:contra |para |de |da )?(?:a )?(?:covid(?: 19)?|sars cov 2)\b", "covid_vaccination_rate"),
+    (rf"\b{_RATE_WORDS} de (?:vacinacao|vacinados|cobertura vacinal)\s*(?:contra |para |de |da )?(?:a )?(?:gripe|influenza)\b", "flu_vaccination_rate"),
+    (r"\b(?:obitos?|mortes?|morreram|faleceram|falecimentos?)\b", "deaths"),
+    (r"\b(?:internados?|internadas?|internacoes|admitidos?|admitidas?)? ?(?:em |na |de )?uti\b", "icu"),
+    (r"\b(?:por|cada) ano\b|\banualmente\b", "group_ano"),
+    (r"\b(?:por|cada) mes\b|\bmensalmente\b|\bmes a mes\b", "group_mes"),
+    (r"\bpor sexo\b|\bpor genero\b", "group_sexo"),
+    (r"\bpor faixas? etarias?\b|\bpor idade\b", "group_faixa_etaria"),
+    (r"\bentre (\d{1,3}) e (\d{1,3}) anos\b", "age_between"),
+    (r"\b(?:acima de|maiores de|maior que|mais de|com mais de) (\d{1,3}) anos\b", "age_above"),
+    (r"\bcom (\d{1,3}) anos ou mais\b|\b(\d{1,3}) anos ou mais\b", "age_at_least"),
+    (r"\b(?:abaixo de|menores de|menor que|menos de|com menos de) (\d{1,3}) anos\b", "age_below"),
+    (r"\bcom (\d{1,3}) anos\b|\bde (\d{1,3}) anos\b", "age_equal"),
+    (r"\bidosos?\b|\bidosas?\b", "age_elderly"),
+    (r"\bcriancas?\b", "age_children"),
+    (r"\bentre ((?:19|20)\d{2}) e ((?:19|20)\d{2})\b", "year_between"),
+    (r"\b(?:no ano de |em |de |no ano )?((?:19|20)\d{2})\b", "year"),
+    (r"\bsexo (?:ignorado|nao informado|desconhecido)\b|\bsexo ignorados?\b|\bignorados? (?:de|quanto ao) sexo\b", "sex_ignored"),
+    (r"\b(?:mulheres|mulher|sexo feminino|feminino|femininas|feminina)\b", "sex_f"),
+    (r"\b(?:homens|homem|sexo masculino|masculino|masculinos|masculina)\b", "sex_m"),
+]
+_COMPILED = [(re.compile(p), name) for p, name in _PATTERNS]
+
+
+@dataclass
+class Intent:
+    """Parsed question: measure, WHERE conditions, optional grouping and parser confidence."""
+    measure: str = "count"
+    conditions: list[str] = field(default_factory=list)
+    group_by: Optional[str] = None
+    confidence: float = 0.0
+    years: list[str] = field(default_factory=list)
+
+
+def _apply(intent: Intent, name: str, groups: tuple) -> bool:
+    """Update the intent with one recognized pattern. Returns False when it conflicts with what was already parsed."""
+    values = [g for g in groups if g is not None]
+    if name in RATE_EXPRESSIONS:
+        if intent.measure not in ("count", name):
+            return False
+        intent.measure = name
+    elif name == "deaths":
+        if intent.measure == "count":
+            intent.conditions.append("EVOLUCAO = '2'")
+    elif name == "icu":
+        if intent.measure == "count":
+            intent.conditions.append("UTI = '1'")
+    elif name.startswith("group_"):
+        if intent.group_by is not None:
+            return False
+        intent.group_by = name[len("group_"):]
+    elif name == "age_between":
+        intent.conditions.append(f"NU_IDADE_N BETWEEN {int(values[0])} AND {int(values[1])}")
+    elif name == "age_above":
+        intent.conditions.append(f"NU_IDADE_N > {int(values[0])}")
+    elif name == "age_at_least":
+        intent.conditions.append(f"NU_IDADE_N >= {int(values[0])}")
+    elif name == "age_below":
+        intent.conditions.append(f"NU_IDADE_N < {int(values[0])}")
+    elif name == "age_equal":
+        intent.conditions.append(f"NU_IDADE_N = {int(values[0])}")
+    elif name == "age_elderly":
+        intent.conditions.append("NU_IDADE_N >= 60")
+    elif name == "age_children":
+        intent.conditions.append("NU_IDADE_N < 12")
+    elif name == "year_between":
+        start, end = sorted(values)
+        intent.conditions.append(f"strftime('%Y', DT_NOTIFIC) BETWEEN '{start}' AND '{end}'")
+    elif name == "year":
+        intent.years.append(values[0])
+    elif name in ("sex_f", "sex_m", "sex_ignored"):
+        code = {"sex_f": "F", "sex_m": "M", "sex_ignored": "I"}[name]
+        condition = f"CS_SEXO = '{code}'"
+        if any(c.startswith("CS_SEXO") and c != condition for c in intent.conditions):
+            return False
+        if condition not in intent.conditions:
+            intent.conditions.append(condition)
+    return True
+
+
+def parse_intent(question: str) -> Optional[Intent]:
+    """
+    Parse a question into an Intent.
+    Args:
+        question (str): Question in Portuguese.
+    Returns:
+        Intent or None: The parsed intent (with its confidence), or None when the question has conflicting parts.
+    """
+    text = normalize_text(question)
+    tokens = text.split()
+    total = len([t for t in tokens if t not in STOPWORDS])
+    intent = Intent()
+    for pattern, name in _COMPILED:
+        for match in list(pattern.finditer(text)):
+            if not _apply(intent, name, match.groups()):
+                return None
+        text = pattern.sub(" ", text)
+    if intent.years:
+        years = sorted(set(intent.years))
+        if len(years) == 1:
+            intent.conditions.append(f"strftime('%Y', DT_NOTIFIC) = '{years[0]}'")
+        else:
+            intent.conditions.append(
+                "strftime('%Y', DT_NOTIFIC) IN (" + ", ".join(f"'{y}'" for y in years) + ")"
+            )
+    if intent.measure == "count" and not COUNT_CUES.intersection(tokens) and not intent.conditions:
+        return None
+    unknown = [t for t in text.split() if t not in STOPWORDS]
+    intent.confidence = 1.0 - len(unknown) / total if total else 1.0
+    return intent
+
+
+def intent_to_sql(intent: Intent) -> str:
+    """
+    Render an Intent as a SQL query over srag_cases.
+    Args:
+        intent (Intent): Parsed intent.
+    Returns:
+        str: SQL query.
+    """
+    if intent.measure == "count":
+        expression, alias = "COUNT(*)", "casos"
+    else:
+        expression, alias = RATE_EXPRESSIONS[intent.measure]
+    where = f" WHERE {' AND '.join(intent.conditions)}" if intent.conditions else ""
+    if intent.group_by is None:
+        return f"SELECT {expression} AS {alias} FROM srag_cases{where};"
+    group = intent.group_by
+    return (
+        f"SELECT {GROUP_EXPRESSIONS[group]} AS {group}, {expression} AS {alias} "
+        f"FROM srag_cases{where} GROUP BY {group} ORDER BY {group};"
+    )
+
+
+def sql_from_intent(question: str, min_confidence: float = INTENT_MIN_CONFIDENCE) -> Optional[str]:
+    """
+    Deterministic SQL for a question, when the parser understands all of it.
+    Args:
+        question (str): Question in Portuguese.
+        min_confidence (float): Minimum fraction of informative words the parser must recognize.
+    Returns:
+        str or None: SQL query, or None when the question should go to the LLM.
+    """
+    intent = parse_intent(question)
+    if intent is None or intent.confidence < min_confidence:
+        return None
+    return intent_to_sql(intent)
@@ -4,21 +4,75 @@ Implements a modular LangGraph workflow using the SQLQueryTool and other tools f
 """
 
 from langgraph.graph import StateGraph, END
-from typing import TypedDict
+from langgraph.config import get_stream_writer
+from dataclasses import asdict
+from typing import Annotated, Iterator, Optional, TypedDict
+from langgraph.types import Send
 from langchain_core.tools import Tool
+from langchain_core.runnables import RunnableLambda
 from agent.database_tool import SQLQueryTool
-from langchain_openai import ChatOpenAI
-from agent.config import settings
-import os
-
-from agent.news_tool import news_query_tool
-from agent.summary_tool import summary_tool
+from agent.database import run_in_db_executor, QueryResult
+from agent.config import AGENT_ROUTING_MODE, SUMMARY_TOKEN_BUDGET
+from agent.result_compaction import compact_result, CHARS_PER_TOKEN
+from agent.llm_gateway import get_llm_gateway
+from agent.audit import audit_log
+from agent.tracing import tracer, traced_node
+
+from agent.news_tool import news_query_tool, format_news
+from agent.summary_tool import summary_tool, summary_tool_stream
 from agent.sql_generation import generate_sql_from_question
+from agent.intent_parser import sql_from_intent, intent_to_sql
+from agent.question_cache import question_cache
+from agent.routing import (
+    route_question,
+    fused_route,
+    RoutingDecision,
+    ROUTE_DECISIONS,
+    BLOCKED_DECISION,
+)
+from agent.sql_guard import check_sql
+from agent.planner import plan_subquestions
+from agent.session import (
+    is_follow_up,
+    parse_follow_up,
+    merge_intent,
+    refilter_cached,
+    intent_payload,
+    contextual_question,
+    table_payload,
+    remember_turn,
+    session_store,
+)
+from agent.scope_classifier import (
+    get_scope_classifier,
+    VALID_PROMPT_EXAMPLES,
+    INVALID_PROMPT_EXAMPLES,
+)
+
+def add_subresults(existing: list, new: list) -> list:
+    """
+    Reducer for parallel sub-query results. The list is append-only: subquery_node returns its own
+    record, and nodes that echo the whole state after the sub-queries drop the key (see _without_subresults).
+    """
+    return (existing or []) + new
+
+
+def _without_subresults(state: dict) -> dict:
+    """Copy of the state without subresults, for nodes that echo it (returning the list again would append it twice)."""
+    return {k: v for k, v in state.items() if k != "subresults"}
+
 
 class AgentState(TypedDict, total=False):
     question: str
     sql_query: str  # <--- Propagate SQL query between nodes
     sql_result: str
+    sql_digest: str  # compact digest of the SQL result used in the summarization prompt
+    subquestions: list[dict]  # plan of a compound question (agent/planner.py)
+    subresults: Annotated[list[dict], add_subresults]  # results of the parallel sub-queries
+    sql_table: dict  # rows of a small SQL result, kept for follow-up re-filtering (agent/session.py)
+    intent: dict  # refined intent of a follow-up question
+    follow_up: bool  # True when the question continues the previous data answer of the session
+    context: dict  # compact context of the previous data answer (kept per session in agent/session.py session_store)
     summary: str
     explanation: str
     news: str
@@ -35,83 +89,68 @@ tools = [
 
 
 # ================= GUARDRAILS =================
+INPUT_BLOCKLIST = [
+    "drop table",
+    "delete from",
+    "truncate",
+    "insert into",
+    "update ",
+    "hack",
+    "senha",
+    "password",
+    "token",
+    "script>",
+]
+
+BLOCKED_MESSAGE = "Pergunta inválida ou fora do escopo permitido. Reformule sua questão sobre SRAG ou saúde pública."
+
+SCOPE_PROMPT = (
+    "Você é um assistente de validação de escopo e deve responder apenas 'Sim' ou 'Não', sem explicação. "
+    "Sua função é decidir se a pergunta abaixo está estritamente relacionada a: SRAG (Síndrome Respiratória Aguda Grave), epidemiologia, saúde pública, vigilância epidemiológica, dados de casos, mortalidade, hospitalização, vacinação, tendências epidemiológicas, explicações conceituais desses temas, ou notícias sobre SRAG no Brasil. "
+    "Bloqueie perguntas sobre política, economia, esportes, tecnologia, entretenimento, temas genéricos, dúvidas pessoais, ou qualquer assunto fora do contexto epidemiológico de SRAG ou de saúde pública. "
+    "Perguntas conceituais ou de definição sobre termos epidemiológicos (ex: 'O que é taxa de mortalidade?', 'Explique o que é incidência') DEVEM ser aceitas. "
+    "Responda 'Sim' apenas se a pergunta for claramente relevante para os temas acima. Caso contrário, responda 'Não'. "
+    "\n\nExemplos de perguntas válidas:\n"
+    + "".join(f"- {q}\n" for q in VALID_PROMPT_EXAMPLES)
+    + "\nExemplos de perguntas inválidas:\n"
+    + "".join(f"- {q}\n" for q in INVALID_PROMPT_EXAMPLES)
+    + "\nPergunta: "
+)
+
+
+def llm_scope_check(question: str) -> bool:
+    """
+    Ask the LLM whether a question is in scope (answers 'Sim' or 'Não').
+    Exceptions are propagated so the caller can fall back to the local classifier.
+    """
+    response = get_llm_gateway().complete(SCOPE_PROMPT + question, purpose="guardrail")
+    response = response.strip().lower()
+    print(
+        f"[GUARDRAIL DEBUG] LLM response: '{response}' for question: '{question}'"
+    )
+    return "sim" in response
+
+
+def violates_blocklist(question: str) -> bool:
+    """True for empty questions or questions containing dangerous SQL or security terms."""
+    return not question.strip() or any(bad in question.lower() for bad in INPUT_BLOCKLIST)
+
+
 def is_valid_input(question: str) -> bool:
     """
-    Guardrail: blocks only questions containing dangerous SQL or security terms. All other scope/intent validation is delegated to the LLM, which receives a strict instruction to answer 'Sim' only if the question is relevant to SRAG, epidemiology, or public health, and 'Não' otherwise.
+    Guardrail: blocks questions containing dangerous SQL or security terms, then checks the scope with the local
+    classifier (agent/scope_classifier.py). Only questions the classifier is unsure about are sent to the LLM, which
+    receives a strict instruction to answer 'Sim' only if the question is relevant to SRAG, epidemiology, or public health.
     This function returns True if the input is valid for the agent workflow, False otherwise.
     """
-    blocklist = [
-        "drop table",
-        "delete from",
-        "truncate",
-        "insert into",
-        "update ",
-        "hack",
-        "senha",
-        "password",
-        "token",
-        "script>",
-    ]
-    if not question.strip():
+    if violates_blocklist(question):
         return False
-    if any(bad in question.lower() for bad in blocklist):
-        return False
-    # Delegate all other scope validation to LLM
-    try:
-
-        llm = ChatOpenAI(temperature=0)
-        prompt = (
-            "Você é um assistente de validação de escopo e deve responder apenas 'Sim' ou 'Não', sem explicação. "
-            "Sua função é decidir se a pergunta abaixo está estritamente relacionada a: SRAG (Síndrome Respiratória Aguda Grave), epidemiologia, saúde pública, vigilância epidemiológica, dados de casos, mortalidade, hospitalização, vacinação, tendências epidemiológicas, explicações conceituais desses temas, ou notícias sobre SRAG no Brasil. "
-            "Bloqueie perguntas sobre política, economia, esportes, tecnologia, entretenimento, temas genéricos, dúvidas pessoais, ou qualquer assunto fora do contexto epidemiológico de SRAG ou de saúde pública. "
-            "Perguntas conceituais ou de definição sobre termos epidemiológicos (ex: 'O que é taxa de mortalidade?', 'Explique o que é incidência') DEVEM ser aceitas. "
-            "Responda 'Sim' apenas se a pergunta for claramente relevante para os temas acima. Caso contrário, responda 'Não'. "
-            "\n\nExemplos de perguntas válidas:\n"
-            "- Quantos casos de SRAG foram notificados em 2024?\n"
-            "- Qual a taxa de mortalidade por SRAG em crianças?\n"
-            "- Explique o que é SRAG.\n"
-            "- Explique o que é taxa de mortalidade.\n"
-            "- O que significa incidência?\n"
-            "- O que é letalidade?\n"
-            "- Como funciona a notificação de casos de SRAG?\n"
-            "- Quais as tendências de hospitalização por SRAG?\n"
-            "- Quais as últimas notícias sobre SRAG no Brasil?\n"
-            "\nExemplos de perguntas inválidas:\n"
-            "- Qual a cotação do dólar?\n"
-            "- Quem ganhou o jogo de futebol ontem?\n"
-            "- Qual o melhor filme de 2024?\n"
-            "- Como investir em ações?\n"
-            "- O presidente foi reeleito?\n"
-            "- Qual a previsão do tempo para amanhã?\n"
-            "\nPergunta: " + question
-        )
-        response = llm.invoke(prompt)
-        if hasattr(response, "content"):
-            response = response.content
-        response = response.strip().lower()
-        print(
-            f"[GUARDRAIL DEBUG] LLM response: '{response}' for question: '{question}'"
-        )
-        if "sim" in response:
-            return True
-        else:
-            return False
-    except Exception as e:
-        print(f"[GUARDRAIL DEBUG] LLM exception: {e}")
-        return True  # If LLM fails, default to permissive
+    return get_scope_classifier().classify(question, llm_judge=llm_scope_check)
 
 
 def is_valid_sql(query: str) -> bool:
-    # Allows only SLEECT and whitelited tables
-    if not query.strip().lower().startswith("select"):
-        return False
-    allowed_tables = ["srag_cases"]
-    if not any(tbl in query.lower() for tbl in allowed_tables):
-        return False
-    blocklist = ["--", "/*", "*/", "xp_"]
-    if any(bad in query.lower() for bad in blocklist):
-        return False
-    return True
+    # Parses the query and checks tables, columns and the query plan (see agent/sql_guard.py)
+    return check_sql(query).allowed
 
 
 def is_valid_news_result(news: str) -> bool:
@@ -124,25 +163,34 @@ def is_valid_news_result(news: str) -> bool:
 
 
 
-def audit_log(node: str, input_state: dict, decision: str, output_state: dict):
-    import json
-    from datetime import datetime
-    log_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "node": node,
-        "input_state": input_state,
-        "decision": decision,
-        "output_state": output_state,
-    }
-    log_path = os.path.join(
-        os.path.dirname(__file__), "..", "logs", "agent_audit.log"
-    )
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+# ============== NODES WITH GUARDRAILS ==============
+def is_compound_question(question: str) -> bool:
+    """True if the planner splits the question into more than one sub-question."""
+    return len(plan_subquestions(question)) > 1
+
+
+def _fused_router_output(state: AgentState, question: str, decision: RoutingDecision) -> tuple[AgentState, str]:
+    """Map a fused routing decision to the next graph state and its audit decision."""
+    if not decision.in_scope:
+        return {**state, "final_result": BLOCKED_MESSAGE}, BLOCKED_DECISION
+    if decision.route != "sql_generation":
+        return {**state, "next_node": decision.route}, f"{ROUTE_DECISIONS[decision.route]} (modo fundido)"
+    # Compound questions go through the planner; the single SQL of the fused call cannot answer them
+    if is_compound_question(question):
+        return {**state, "next_node": "sql_generation"}, f"{ROUTE_DECISIONS['sql_generation']} (modo fundido, pergunta composta)"
+    # Deterministic SQL wins over the LLM's; without any SQL fall back to the sql_generation node
+    sql = sql_from_intent(question) or decision.sql
+    if not sql:
+        return {**state, "next_node": "sql_generation"}, f"{ROUTE_DECISIONS['sql_generation']} (modo fundido, sem SQL)"
+    if decision.sql and sql == decision.sql:
+        question_cache.put(question, sql)
+    return {**state, "sql_query": sql, "next_node": "sql_query"}, "Roteado para sql_query com SQL gerado (modo fundido)"
+
+
+# Routes that answer with data (and can therefore be refined by a follow-up)
+SQL_ROUTES = ("sql_generation", "sql_query")
 
 
-# ============== NODES WITH GUARDRAILS ==============
 def router_node(state: AgentState, **kwargs) -> AgentState:
     """
     Decide para qual nó direcionar a pergunta.
@@ -150,73 +198,48 @@ def router_node(state: AgentState, **kwargs) -> AgentState:
     """
     question = state["question"].strip()
     input_state = dict(state)
-    if not is_valid_input(question):
-        output = {
-            **state,
-            "final_result": "Pergunta inválida ou fora do escopo permitido. Reformule sua questão sobre SRAG ou saúde pública.",
-        }
-        audit_log(
-            "router_node",
-            input_state,
-            "Pergunta bloqueada por guardrail",
-            output,
-        )
-        return output
-    q_lower = question.lower()
     print(f"[ROUTER DEBUG] Pergunta recebida: '{question}'")
-    if any(
-        word in q_lower
-        for word in ["explique", "o que é", "defina", "significa"]
+    follow_up = is_follow_up(question, state.get("context"))
+    # Follow-ups of a data answer in the same session refine it instead of starting from scratch. Only
+    # follow-ups the intent parser fully reads ("e para mulheres?") skip the scope guardrail: their
+    # vocabulary is the parser's; the others are checked like any question first
+    if (
+        follow_up
+        and not violates_blocklist(question)
+        and parse_follow_up(question) is not None
+        and route_question(question) in SQL_ROUTES
     ):
-        output = {**state, "next_node": "explanation"}
-        audit_log(
-            "router_node", input_state, "Roteado para explanation", output
-        )
-        print("[ROUTER DEBUG] Roteado para explanation")
+        output = {**state, "follow_up": True, "next_node": "follow_up"}
+        audit_log("router_node", input_state, "Roteado para follow_up", output)
         return output
-    elif any(
-        word in q_lower
-        for word in [
-            "notícia",
-            "notícias",
-            "jornal",
-            "reportagem",
-            "matéria",
-            "atualização",
-            "mídia",
-        ]
-    ):
-        output = {**state, "next_node": "news"}
-        audit_log("router_node", input_state, "Roteado para news", output)
-        print("[ROUTER DEBUG] Roteado para news")
-        return output
-    elif any(
-        word in q_lower
-        for word in [
-            "quantos",
-            "total",
-            "casos",
-            "taxa",
-            "percentual",
-            "mortes",
-            "internados",
-            "ocupação",
-            "vacinação",
-        ]
-    ):
-        output = {**state, "next_node": "sql_generation"}
-        audit_log(
-            "router_node", input_state, "Roteado para sql_generation", output
-        )
-        print("[ROUTER DEBUG] Roteado para sql_generation")
+    if AGENT_ROUTING_MODE == "fused" and not violates_blocklist(question):
+        try:
+            decision = fused_route(question)
+        except Exception as e:
+            print(f"[ROUTER DEBUG] Falha no modo fundido, usando roteamento padrão: {e}")
+        else:
+            output, audit_decision = _fused_router_output(state, question, decision)
+            if follow_up and output.get("next_node") in SQL_ROUTES:
+                output = {**state, "follow_up": True, "next_node": "follow_up"}
+                audit_decision = "Roteado para follow_up (modo fundido)"
+            audit_log("router_node", input_state, audit_decision, output)
+            return output
+    if not is_valid_input(question):
+        output = {**state, "final_result": BLOCKED_MESSAGE}
+        audit_log("router_node", input_state, BLOCKED_DECISION, output)
         return output
-    else:
-        output = {**state, "next_node": "sql_query"}
-        audit_log(
-            "router_node", input_state, "Fallback para sql_query", output
-        )
-        print("[ROUTER DEBUG] Fallback para sql_query")
+    next_node = route_question(question)
+    if follow_up and next_node in SQL_ROUTES:
+        # In scope but not readable by the intent parser: the LLM refines the previous SQL with the session context
+        output = {**state, "follow_up": True, "next_node": "follow_up"}
+        audit_log("router_node", input_state, "Roteado para follow_up (refinamento via LLM)", output)
         return output
+    if next_node == "sql_query" and is_compound_question(question):
+        next_node = "sql_generation"
+    output = {**state, "next_node": next_node}
+    audit_log("router_node", input_state, ROUTE_DECISIONS[next_node], output)
+    print(f"[ROUTER DEBUG] {ROUTE_DECISIONS[next_node]}")
+    return output
 
 
 def sql_query_node(state: AgentState, **kwargs) -> AgentState:
@@ -236,24 +259,32 @@ def sql_query_node(state: AgentState, **kwargs) -> AgentState:
         )
         print("[NODE DEBUG] sql_query_node retornou por falta de query")
         return output
-    if not is_valid_sql(query):
+    guard = check_sql(query)
+    if not guard.allowed:
         output = {
             **state,
-            "final_result": "Consulta SQL inválida ou não permitida. Apenas SELECTs simples na tabela srag_data são aceitos.",
+            "final_result": f"Consulta SQL inválida ou não permitida ({guard.reason}). Apenas SELECTs simples na tabela srag_cases são aceitos.",
         }
         audit_log(
-            "sql_query_node", input_state, "Consulta SQL inválida", output
+            "sql_query_node", input_state, f"Consulta SQL rejeitada: {guard.reason}", output
         )
         print("[NODE DEBUG] sql_query_node retornou por query inválida")
         return output
+    if guard.warnings:
+        print(f"[SQL GUARD DEBUG] {guard.warnings}")
+    query = guard.sql
+    state = {**state, "sql_query": query}
     try:
         print(f"[SQL RAW DEBUG] Query executada: {query}")
         result = sql_tool._run(query)
-        print(f"[SQL RAW DEBUG] Tipo do resultado: {type(result)}")
-        print(
-            f"[SQL RAW DEBUG] Resultado bruto retornado pelo banco: {result}"
-        )
-        if result is None or (isinstance(result, list) and len(result) == 0):
+        sql_digest = sql_table = None
+        if isinstance(result, QueryResult):
+            print(
+                f"[SQL RAW DEBUG] {len(result)} linhas retornadas (truncado: {result.truncated})"
+            )
+            sql_digest = compact_result(result)
+            sql_table = table_payload(result)
+        if result is None or (isinstance(result, (list, QueryResult)) and len(result) == 0):
             result_str = "[]"
         else:
             result_str = str(result)
@@ -269,8 +300,11 @@ def sql_query_node(state: AgentState, **kwargs) -> AgentState:
             output,
         )
         return output
-    print(f"[SQL RAW DEBUG] Valor normalizado para sql_result: {result_str}")
+    print(f"[SQL RAW DEBUG] Valor normalizado para sql_result: {result_str[:500]}")
     output = {**state, "sql_result": result_str, "next_node": "summarization"}
+    if sql_digest is not None:
+        output["sql_digest"] = sql_digest
+        output["sql_table"] = sql_table
     audit_log(
         "sql_query_node",
         input_state,
@@ -283,6 +317,36 @@ def sql_query_node(state: AgentState, **kwargs) -> AgentState:
     return output
 
 
+async def asql_query_node(state: AgentState, **kwargs) -> AgentState:
+    """
+    Async variant of sql_query_node used by ainvoke/astream: runs the node on the bounded
+    database thread pool so the event loop is never blocked on database I/O.
+    """
+    return await run_in_db_executor(sql_query_node, state)
+
+
+def stream_to_writer(tokens: Iterator[str], node: str) -> str:
+    """
+    Forward LLM text fragments to the LangGraph custom stream (stream_mode="custom") as they arrive.
+    Args:
+        tokens (Iterator[str]): Text fragments.
+        node (str): Name of the emitting node.
+    Returns:
+        str: The full text.
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run: nothing to stream to
+        writer = None
+    parts = []
+    for token in tokens:
+        parts.append(token)
+        if writer is not None:
+            writer({"node": node, "token": token})
+    return "".join(parts)
+
+
 def summarization_node(state: AgentState, **kwargs) -> AgentState:
     print("[NODE DEBUG] Entrou no summarization_node")
     input_state = dict(state)
@@ -296,20 +360,31 @@ def summarization_node(state: AgentState, **kwargs) -> AgentState:
         msg = "[SUMMARIZATION DEBUG] Nenhum resultado SQL encontrado para resumir."
         print(msg)
         output = {
-            **state,
+            **_without_subresults(state),
             "final_result": "Não há resultado SQL para resumir.",
         }
         audit_log("summarization_node", input_state, msg, output)
         print("[NODE DEBUG] summarization_node retornou por sql_result vazio")
         return output
-    from langchain_openai import ChatOpenAI
-
-    llm = ChatOpenAI(temperature=0)
-    prompt = f"Resuma o seguinte resultado de consulta SQL para um relatório epidemiológico: {sql_result}"
-    summary = llm.invoke(prompt)
-    if hasattr(summary, "content"):
-        summary = summary.content
-    output = {**state, "final_result": summary}
+    # The digest keeps totals, extremes and top-k rows within a token budget instead of the raw result repr
+    digest = state.get("sql_digest") or sql_result[: SUMMARY_TOKEN_BUDGET * CHARS_PER_TOKEN]
+    if state.get("subresults"):
+        prompt = (
+            f"Compare e resuma os resultados das consultas SQL abaixo para um relatório epidemiológico, "
+            f"respondendo à pergunta: {state['question']}\n\n{digest}"
+        )
+    else:
+        prompt = f"Resuma o seguinte resultado de consulta SQL para um relatório epidemiológico: {digest}"
+    context = state.get("context")
+    if state.get("follow_up") and context:
+        prompt += (
+            f"\n\nEsta pergunta ('{state['question']}') continua a pergunta anterior "
+            f"('{context['question']}'), cujo resultado foi:\n{context['digest']}"
+        )
+    summary = stream_to_writer(
+        get_llm_gateway().stream(prompt, purpose="summarization"), "summarization"
+    )
+    output = {**_without_subresults(state), "final_result": summary, "context": remember_turn(state, context)}
     audit_log(
         "summarization_node", input_state, "Resumo gerado por LLM", output
     )
@@ -319,11 +394,10 @@ def summarization_node(state: AgentState, **kwargs) -> AgentState:
 
 def explanation_node(state: AgentState, **kwargs) -> AgentState:
     input_state = dict(state)
-    llm = ChatOpenAI(temperature=0)
     prompt = f"Explique em português, de forma simples e clara, o seguinte conceito epidemiológico: {state['question']}"
-    explanation = llm.invoke(prompt)
-    if hasattr(explanation, "content"):
-        explanation = explanation.content
+    explanation = stream_to_writer(
+        get_llm_gateway().stream(prompt, purpose="explanation"), "explanation"
+    )
     output = {**state, "explanation": explanation, "final_result": explanation}
     audit_log(
         "explanation_node", input_state, "Explicação gerada por LLM", output
@@ -360,7 +434,8 @@ def news_node(state: AgentState, **kwargs) -> AgentState:
             output,
         )
         return output
-    output = {**state, "news": news_results, "final_result": news_results}
+    news_text = format_news(news_results)
+    output = {**state, "news": news_text, "final_result": news_text}
     audit_log(
         "news_node", input_state, "Notícias retornadas com sucesso", output
     )
@@ -370,7 +445,7 @@ def news_node(state: AgentState, **kwargs) -> AgentState:
 def summary_node(state: AgentState, **kwargs) -> AgentState:
     input_state = dict(state)
     try:
-        summary = summary_tool.invoke("")
+        summary = stream_to_writer(summary_tool_stream(), "summary")
     except Exception as e:
         output = {
             **state,
@@ -383,11 +458,6 @@ def summary_node(state: AgentState, **kwargs) -> AgentState:
     return output
 
 
-# LLM setup (OpenAI, can be swapped for other providers)
-os.environ["OPENAI_API_KEY"] = settings.OPENAI_API_KEY
-llm = ChatOpenAI(temperature=0)
-
-
 # Build the LangGraph
 
 
@@ -412,14 +482,116 @@ def sql_generation_node(state: AgentState, **kwargs) -> AgentState:
     return {**state, "sql_query": sql}
 
 
+def follow_up_node(state: AgentState, **kwargs) -> AgentState:
+    """
+    Answer a follow-up by refining the previous data answer of the session (see agent/session.py):
+    re-filter the cached rows, render the refined SQL from the merged intent, or, for follow-ups the
+    intent parser cannot read, generate SQL with the previous question and SQL as context.
+    """
+    input_state = dict(state)
+    question, context = state["question"], state["context"]
+    follow = parse_follow_up(question)
+    if follow is not None and context.get("intent"):
+        intent = merge_intent(context["intent"], follow)
+        sql = intent_to_sql(intent)
+        cached = refilter_cached(context, intent)
+        if cached is not None:
+            output = {
+                **state,
+                "intent": intent_payload(intent),
+                "sql_query": sql,
+                "sql_result": str(cached),
+                "sql_digest": compact_result(cached),
+                "sql_table": table_payload(cached),
+                "next_node": "summarization",
+            }
+            audit_log("follow_up_node", input_state, "Refinamento respondido com o resultado anterior da sessão", output)
+            return output
+        output = {**state, "intent": intent_payload(intent), "sql_query": sql, "next_node": "sql_query"}
+        audit_log("follow_up_node", input_state, "Refinamento da consulta anterior", output)
+        return output
+    sql = generate_sql_from_question(contextual_question(context, question))
+    print(f"[SQLGEN DEBUG] SQL gerado para o refinamento '{question}': {sql}")
+    output = {**state, "sql_query": sql, "next_node": "sql_query"}
+    audit_log("follow_up_node", input_state, "Refinamento gerado por LLM com contexto da sessão", output)
+    return output
+
+
+def planner_node(state: AgentState, **kwargs) -> AgentState:
+    """Split compound/comparative data questions into independent sub-questions (see agent/planner.py)."""
+    input_state = dict(state)
+    plan = plan_subquestions(state["question"])
+    output = {**state, "subquestions": [asdict(p) for p in plan]}
+    if len(plan) > 1:
+        audit_log("planner_node", input_state, f"Pergunta dividida em {len(plan)} subconsultas", output)
+        print(f"[PLANNER DEBUG] Subconsultas: {[p.question for p in plan]}")
+    return output
+
+
+def dispatch_subquestions(state: AgentState):
+    """Fan out one parallel subquery branch per sub-question, or continue on the single-query path."""
+    plan = state.get("subquestions") or []
+    if len(plan) < 2:
+        return "sql_generation"
+    return [
+        Send("subquery", {"question": p["question"], "label": p["label"], "order": i})
+        for i, p in enumerate(plan)
+    ]
+
+
+def subquery_node(state: dict, **kwargs) -> dict:
+    """Generate and run the SQL of one sub-question (one parallel branch of the plan)."""
+    generated = sql_generation_node({"question": state["question"]})
+    result = sql_query_node(generated) if "final_result" not in generated else generated
+    record = {
+        "order": state["order"],
+        "label": state["label"],
+        "question": state["question"],
+        "sql_query": result.get("sql_query"),
+        "digest": result.get("sql_digest") or result.get("sql_result"),
+        "error": None if "sql_result" in result else result.get("final_result"),
+    }
+    return {"subresults": [record]}
+
+
+def merge_subresults_node(state: AgentState, **kwargs) -> AgentState:
+    """Merge the parallel sub-query results, in plan order, into one digest for summarization."""
+    input_state = dict(state)
+    parts = sorted(state.get("subresults") or [], key=lambda r: r["order"])
+    sections = [
+        f"### {r['label']} ({r['question']})\n" + (r["digest"] if r["error"] is None else f"Erro: {r['error']}")
+        for r in parts
+    ]
+    digest = "\n\n".join(sections)
+    output = {
+        **_without_subresults(state),
+        "sql_query": "; ".join(r["sql_query"] for r in parts if r["sql_query"]),
+        "sql_result": digest,
+        "sql_digest": digest,
+    }
+    audit_log("merge_subresults_node", input_state, f"{len(parts)} subconsultas combinadas", output)
+    return output
+
+
 workflow = StateGraph(AgentState)
-workflow.add_node("router", router_node)
-workflow.add_node("sql_generation", sql_generation_node)
-workflow.add_node("sql_query", sql_query_node)
-workflow.add_node("summarization", summarization_node)
-workflow.add_node("explanation", explanation_node)
-workflow.add_node("news", news_node)
-workflow.add_node("summary", summary_node)
+workflow.add_node("router", traced_node("router", router_node))
+workflow.add_node("planner", traced_node("planner", planner_node))
+workflow.add_node("follow_up", traced_node("follow_up", follow_up_node))
+workflow.add_node("sql_generation", traced_node("sql_generation", sql_generation_node))
+workflow.add_node("subquery", traced_node("subquery", subquery_node))
+workflow.add_node("merge_subresults", traced_node("merge_subresults", merge_subresults_node))
+workflow.add_node(
+    "sql_query",
+    RunnableLambda(
+        traced_node("sql_query", sql_query_node),
+        afunc=traced_node("sql_query", asql_query_node),
+        name="sql_query",
+    ),
+)
+workflow.add_node("summarization", traced_node("summarization", summarization_node))
+workflow.add_node("explanation", traced_node("explanation", explanation_node))
+workflow.add_node("news", traced_node("news", news_node))
+workflow.add_node("summary", traced_node("summary", summary_node))
 
 workflow.set_entry_point("router")
 
@@ -432,6 +604,7 @@ def sanitize_next_node(state):
         "summarization",
         "news",
         "summary",
+        "follow_up",
     }
     n = state.get("next_node", None)
     if n in valid_nodes:
@@ -443,14 +616,21 @@ workflow.add_conditional_edges(
     "router",
     sanitize_next_node,
     {
-        "sql_generation": "sql_generation",
+        "sql_generation": "planner",
         "sql_query": "sql_query",
         "explanation": "explanation",
         "summarization": "summarization",
         "news": "news",
         "summary": "summary",
+        "follow_up": "follow_up",
     },
 )
+workflow.add_conditional_edges("planner", dispatch_subquestions, ["sql_generation", "subquery"])
+workflow.add_conditional_edges(
+    "follow_up", sanitize_next_node, {"sql_query": "sql_query", "summarization": "summarization"}
+)
+workflow.add_edge("subquery", "merge_subresults")
+workflow.add_edge("merge_subresults", "summarization")
 workflow.add_edge("sql_generation", "sql_query")
 workflow.add_edge("sql_query", "summarization")
 workflow.add_edge("summarization", END)
@@ -459,7 +639,6 @@ workflow.add_edge("news", END)
 workflow.add_edge("summary", END)
 langgraph_agent = workflow.compile()
 
-
 def clean_state(state):
     # Removes next_node if it's '__end__'
     if state.get("next_node") == "__end__":
@@ -471,7 +650,84 @@ def clean_state(state):
 def ask_langgraph_agent(question: str):
     state = {"question": question}
     print("[DEBUG] Estado inicial passado ao agente:", state)
-    result = langgraph_agent.invoke(clean_state(state))
+    with tracer.span("agent", "request"):
+        result = langgraph_agent.invoke(clean_state(state))
+    return result.get("final_result", "No result")
+
+
+def session_turn(question: str, session_id: str) -> dict:
+    """
+    Input state of one turn of a conversational session. Sessions run the same graph: the compact
+    context of the session's previous data answer comes from the bounded session store (agent/session.py).
+    Args:
+        question (str): User question.
+        session_id (str): Session identifier.
+    Returns:
+        dict: The question and the session's current context.
+    """
+    return {"question": question, "context": session_store.get(session_id)}
+
+
+def run_session_turn(question: str, session_id: str) -> dict:
+    """
+    Run one turn of a session and keep its context for the next turn.
+    Returns:
+        dict: Final agent state.
+    """
+    with tracer.span("agent", "request", session=True):
+        result = langgraph_agent.invoke(session_turn(question, session_id))
+    session_store.put(session_id, result.get("context"))
+    return result
+
+
+def ask_in_session(question: str, session_id: str) -> str:
+    """Answer a question within a session, so follow-ups can build on the previous data answer."""
+    return run_session_turn(question, session_id).get("final_result") or "No result"
+
+
+def reset_session(session_id: str):
+    """Forget the conversational context of a session."""
+    session_store.delete(session_id)
+
+
+def stream_langgraph_agent(question: str, session_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Run the agent and yield the answer incrementally: LLM tokens of the summarization, explanation and
+    summary nodes as they are generated, or the whole final_result for nodes that do not stream.
+    Args:
+        question (str): User question.
+        session_id (str, optional): Session identifier; when given, follow-up questions refine the previous answer.
+    Yields:
+        str: Answer text fragments.
+    """
+    if session_id is None:
+        state = clean_state({"question": question})
+    else:
+        state = session_turn(question, session_id)
+    streamed = ""
+    final_state = {}
+    with tracer.span("agent", "request", streamed=True, session=session_id is not None):
+        for mode, chunk in langgraph_agent.stream(state, stream_mode=["custom", "values"]):
+            if mode == "custom" and chunk.get("token"):
+                streamed += chunk["token"]
+                yield chunk["token"]
+            elif mode == "values":
+                final_state = chunk
+    if session_id is not None:
+        session_store.put(session_id, final_state.get("context"))
+    final_result = final_state.get("final_result") or "No result"
+    # Non-streaming nodes (blocked questions, news, errors after partial output) deliver only final_result
+    if final_result.startswith(streamed):
+        if final_result[len(streamed):]:
+            yield final_result[len(streamed):]
+    else:
+        yield "\n\n" + final_result
+
+
+async def ask_langgraph_agent_async(question: str):
+    state = {"question": question}
+    with tracer.span("agent", "request"):
+        result = await langgraph_agent.ainvoke(clean_state(state))
     return result.get("final_result", "No result")
 
 
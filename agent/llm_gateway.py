@@ -0,0 +1,372 @@
+"""
+Single entry point for every LLM call made by the agent and the dashboard.
+Keeps one long-lived chat client (HTTP keep-alive connection pool), bounds the number of concurrent
+calls with a priority-aware limiter (interactive questions go ahead of dashboard summaries), retries
+transient failures with exponential backoff and full jitter, and records latency and token counts per
+call. LLM_PROVIDER=stub swaps in a deterministic local provider for offline runs and tests.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from collections import deque, defaultdict
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from typing import Callable, Iterator, Optional, Type
+
+import httpx
+from pydantic import BaseModel
+
+from agent.config import (
+    settings,
+    LLM_PROVIDER,
+    LLM_MODEL,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_TIMEOUT_SECONDS,
+)
+from agent.tracing import tracer
+
+
+class Priority(IntEnum):
+    """Queue priority of an LLM call (lower runs first)."""
+    INTERACTIVE = 0
+    DASHBOARD = 10
+
+
+@dataclass
+class LLMCallRecord:
+    """Accounting entry for one gateway call."""
+    purpose: str
+    priority: int
+    queue_ms: float
+    latency_ms: float
+    input_tokens: int
+    output_tokens: int
+    attempts: int
+    ok: bool
+    first_token_ms: Optional[float] = None
+
+
+class PriorityLimiter:
+    """
+    Counting semaphore that wakes waiters by priority, then arrival order.
+    Args:
+        limit (int): Maximum number of concurrent holders.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters: list[tuple[int, int, threading.Event]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: int = Priority.INTERACTIVE):
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            event = threading.Event()
+            heapq.heappush(self._waiters, (priority, next(self._counter), event))
+        # The releasing thread hands its slot over directly, so _active is already counted for us
+        event.wait()
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                _, _, event = heapq.heappop(self._waiters)
+                event.set()
+            else:
+                self._active -= 1
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+
+# ---- Providers ----
+def _usage(message) -> tuple[int, int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+class OpenAIProvider:
+    """Long-lived ChatOpenAI client sharing one keep-alive HTTP connection pool."""
+
+    def __init__(self, model: str = LLM_MODEL, timeout: float = LLM_TIMEOUT_SECONDS, max_connections: int = LLM_MAX_CONCURRENCY):
+        from langchain_openai import ChatOpenAI
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=120)
+        kwargs = {"model": model} if model else {}
+        # Retries are done by the gateway (with jitter and accounting), not by the client
+        self.chat = ChatOpenAI(
+            temperature=0,
+            api_key=settings.OPENAI_API_KEY,
+            timeout=timeout,
+            max_retries=0,
+            stream_usage=True,
+            http_client=httpx.Client(limits=limits, timeout=timeout),
+            **kwargs,
+        )
+
+    def complete(self, prompt: str) -> tuple[str, int, int]:
+        message = self.chat.invoke(prompt)
+        return message.content, *_usage(message)
+
+    def stream(self, prompt: str) -> Iterator[tuple[str, int, int]]:
+        # Token usage arrives on the last chunk
+        for chunk in self.chat.stream(prompt):
+            yield chunk.content, *_usage(chunk)
+
+    def structured(self, prompt: str, schema: Type[BaseModel]) -> tuple[BaseModel, int, int]:
+        result = self.chat.with_structured_output(schema, include_raw=True).invoke(prompt)
+        if result.get("parsing_error") is not None:
+            raise result["parsing_error"]
+        return result["parsed"], *_usage(result["raw"])
+
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
+        import openai
+
+        if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)):
+            return True
+        return isinstance(error, httpx.TransportError)
+
+
+class StubProvider:
+    """
+    Deterministic offline provider.
+    Args:
+        responder (Callable): Maps a prompt to the reply text (defaults to a fixed Portuguese reply; "Sim" for scope checks).
+        structured_responder (Callable): Maps (prompt, schema) to a schema instance.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str], str]] = None,
+        structured_responder: Optional[Callable[[str, Type[BaseModel]], BaseModel]] = None,
+    ):
+        self.responder = responder or self._default_reply
+        self.structured_responder = structured_responder
+        self.prompts: list[str] = []
+
+    @staticmethod
+    def _default_reply(prompt: str) -> str:
+        if "responder apenas 'Sim' ou 'Não'" in prompt:
+            return "Sim"
+        return "Resposta gerada localmente (provedor LLM stub)."
+
+    def complete(self, prompt: str) -> tuple[str, int, int]:
+        self.prompts.append(prompt)
+        text = self.responder(prompt)
+        return text, len(prompt.split()), len(text.split())
+
+    def stream(self, prompt: str) -> Iterator[tuple[str, int, int]]:
+        text, input_tokens, output_tokens = self.complete(prompt)
+        words = re.findall(r"\S+\s*", text)
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            yield word, input_tokens if last else 0, output_tokens if last else 0
+
+    def structured(self, prompt: str, schema: Type[BaseModel]) -> tuple[BaseModel, int, int]:
+        self.prompts.append(prompt)
+        if self.structured_responder is None:
+            raise RuntimeError(
+                f"StubProvider recebeu uma chamada estruturada ({schema.__name__}) sem structured_responder; "
+                "passe structured_responder=lambda prompt, schema: schema(...) ao criar o stub."
+            )
+        result = self.structured_responder(prompt, schema)
+        return result, len(prompt.split()), len(result.model_dump_json().split())
+
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+
+# ---- Gateway ----
+class LLMGateway:
+    """
+    Rate-limited, retrying, accounted access to an LLM provider.
+    Args:
+        provider: OpenAIProvider, StubProvider or any object with complete/stream/structured/is_transient.
+        max_concurrency (int): Maximum concurrent provider calls.
+        max_retries (int): Retries of transient failures.
+        retry_base_seconds (float): Base of the exponential backoff.
+        history (int): Number of call records kept for inspection.
+    """
+
+    def __init__(
+        self,
+        provider,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_seconds: float = LLM_RETRY_BASE_SECONDS,
+        history: int = 1000,
+    ):
+        self.provider = provider
+        self.limiter = PriorityLimiter(max_concurrency)
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.records: deque[LLMCallRecord] = deque(maxlen=history)
+        self._totals = defaultdict(lambda: {"calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0, "latency_ms": 0.0})
+        self._lock = threading.Lock()
+
+    def _call(self, fn: Callable, purpose: str, priority: int):
+        queue_ms = latency_ms = 0.0
+        attempts = 0
+        error = None
+        while True:
+            attempts += 1
+            queued = time.perf_counter()
+            self.limiter.acquire(priority)
+            started = time.perf_counter()
+            queue_ms += (started - queued) * 1000
+            try:
+                result, input_tokens, output_tokens = fn()
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                self.limiter.release()
+                latency_ms += (time.perf_counter() - started) * 1000
+            if error is None:
+                break
+            if attempts > self.max_retries or not self.provider.is_transient(error):
+                self._record(LLMCallRecord(purpose, priority, queue_ms, latency_ms, 0, 0, attempts, False))
+                raise error
+            self._backoff(purpose, error, attempts)
+        self._record(LLMCallRecord(purpose, priority, queue_ms, latency_ms, input_tokens, output_tokens, attempts, True))
+        return result
+
+    def _backoff(self, purpose: str, error: Exception, attempts: int):
+        # Exponential backoff with full jitter, outside the limiter so other calls can proceed
+        delay = random.uniform(0, self.retry_base_seconds * 2 ** (attempts - 1))
+        print(f"[LLM GATEWAY DEBUG] {purpose}: erro transitório ({error}); nova tentativa em {delay:.2f}s")
+        time.sleep(delay)
+
+    def _record(self, record: LLMCallRecord):
+        with self._lock:
+            self.records.append(record)
+            totals = self._totals[record.purpose]
+            totals["calls"] += 1
+            totals["errors"] += 0 if record.ok else 1
+            totals["input_tokens"] += record.input_tokens
+            totals["output_tokens"] += record.output_tokens
+            totals["latency_ms"] += record.latency_ms
+        tracer.record(
+            record.purpose,
+            "llm",
+            record.queue_ms + record.latency_ms,
+            queue_ms=round(record.queue_ms, 3),
+            input_tokens=record.input_tokens,
+            output_tokens=record.output_tokens,
+            attempts=record.attempts,
+            ok=record.ok,
+            first_token_ms=record.first_token_ms,
+        )
+
+    def complete(self, prompt: str, purpose: str = "generic", priority: int = Priority.INTERACTIVE) -> str:
+        """
+        Text completion.
+        Args:
+            prompt (str): Prompt text.
+            purpose (str): Label used for accounting (e.g. 'guardrail', 'sql_generation').
+            priority (int): Queue priority (Priority.INTERACTIVE or Priority.DASHBOARD).
+        Returns:
+            str: Model reply.
+        """
+        return self._call(lambda: self.provider.complete(prompt), purpose, priority)
+
+    def structured(self, prompt: str, schema: Type[BaseModel], purpose: str = "generic", priority: int = Priority.INTERACTIVE) -> BaseModel:
+        """Structured-output call returning an instance of schema (same arguments as complete)."""
+        return self._call(lambda: self.provider.structured(prompt, schema), purpose, priority)
+
+    def stream(self, prompt: str, purpose: str = "generic", priority: int = Priority.INTERACTIVE) -> Iterator[str]:
+        """
+        Streamed text completion: yields text fragments as the provider produces them.
+        The concurrency slot is held until the stream ends; failures are retried only before the first fragment.
+        Args:
+            prompt (str): Prompt text.
+            purpose (str): Label used for accounting.
+            priority (int): Queue priority.
+        Yields:
+            str: Text fragments.
+        """
+        queue_ms = latency_ms = 0.0
+        input_tokens = output_tokens = attempts = 0
+        first_token_ms = None
+        while True:
+            attempts += 1
+            queued = time.perf_counter()
+            self.limiter.acquire(priority)
+            started = time.perf_counter()
+            queue_ms += (started - queued) * 1000
+            error = None
+            try:
+                for text, chunk_input, chunk_output in self.provider.stream(prompt):
+                    input_tokens += chunk_input
+                    output_tokens += chunk_output
+                    if text:
+                        if first_token_ms is None:
+                            first_token_ms = queue_ms + (time.perf_counter() - started) * 1000
+                        yield text
+            except Exception as e:
+                error = e
+            finally:
+                self.limiter.release()
+                latency_ms += (time.perf_counter() - started) * 1000
+            if error is None:
+                break
+            retryable = first_token_ms is None and self.provider.is_transient(error)
+            if attempts > self.max_retries or not retryable:
+                self._record(LLMCallRecord(purpose, priority, queue_ms, latency_ms, input_tokens, output_tokens, attempts, False, first_token_ms))
+                raise error
+            self._backoff(purpose, error, attempts)
+        self._record(LLMCallRecord(purpose, priority, queue_ms, latency_ms, input_tokens, output_tokens, attempts, True, first_token_ms))
+
+    async def acomplete(self, prompt: str, purpose: str = "generic", priority: int = Priority.INTERACTIVE) -> str:
+        """Async version of complete (the wait for a slot happens off the event loop)."""
+        return await asyncio.to_thread(self.complete, prompt, purpose, priority)
+
+    def stats(self) -> dict:
+        """
+        Per-purpose totals since start.
+        Returns:
+            dict: {purpose: {calls, errors, input_tokens, output_tokens, mean_latency_ms}}.
+        """
+        with self._lock:
+            return {
+                purpose: {
+                    "calls": t["calls"],
+                    "errors": t["errors"],
+                    "input_tokens": t["input_tokens"],
+                    "output_tokens": t["output_tokens"],
+                    "mean_latency_ms": t["latency_ms"] / t["calls"] if t["calls"] else 0.0,
+                }
+                for purpose, t in self._totals.items()
+            }
+
+
+def create_provider(name: str = LLM_PROVIDER):
+    """Build the configured provider ('openai' or 'stub')."""
+    if name == "stub":
+        return StubProvider()
+    if name == "openai":
+        return OpenAIProvider()
+    raise ValueError(f"LLM_PROVIDER desconhecido: {name}")
+
+
+@lru_cache(maxsize=None)
+def get_llm_gateway() -> LLMGateway:
+    """
+    Process-wide LLM gateway, created on first use.
+    Returns:
+        LLMGateway: The shared gateway.
+    """
+    return LLMGateway(create_provider())
@@ -0,0 +1,224 @@
+"""
+News search cache.
+Searches go through a provider ('tavily', or the offline 'local' stand-in) and their articles are
+kept for NEWS_CACHE_TTL_SECONDS in memory and in an on-disk tier that survives restarts. Articles
+are deduplicated by URL. Concurrent identical searches are merged: the first caller fetches and the
+others wait for its result. When a refresh fails, the expired entry is served instead.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from agent.config import (
+    settings,
+    NEWS_PROVIDER,
+    NEWS_CACHE_TTL_SECONDS,
+    NEWS_CACHE_DIR,
+    NEWS_LOCAL_PATH,
+    NEWS_MAX_RESULTS,
+)
+from agent.tracing import tracer
+
+# Articles returned by the local provider when no NEWS_LOCAL_PATH file is given
+LOCAL_ARTICLES = [
+    {
+        "title": "Casos de SRAG seguem em alta em estados do Sul do Brasil",
+        "url": "https://exemplo.gov.br/noticias/srag-sul",
+        "content": "Boletim aponta aumento das internações por Síndrome Respiratória Aguda Grave no Brasil.",
+    },
+    {
+        "title": "Ministério da Saúde amplia vacinação contra influenza no Brasil",
+        "url": "https://exemplo.gov.br/noticias/vacinacao-influenza",
+        "content": "Campanha busca reduzir hospitalizações por SRAG entre idosos e crianças.",
+    },
+    {
+        "title": "Ocupação de UTIs por SRAG fica estável nas capitais brasileiras",
+        "url": "https://exemplo.com.br/noticias/uti-srag",
+        "content": "Dados do InfoGripe mostram estabilidade nas internações em UTI por SRAG.",
+    },
+]
+
+
+class TavilyNewsProvider:
+    """Tavily web search; the search client is created once and reused."""
+    name = "tavily"
+
+    def __init__(self, max_results: int = NEWS_MAX_RESULTS):
+        self.max_results = max_results
+        self._search = None
+
+    def search(self, query: str) -> list[dict]:
+        if self._search is None:
+            from langchain_community.tools.tavily_search import TavilySearchResults
+
+            self._search = TavilySearchResults(tavily_api_key=settings.TAVILY_API_KEY, max_results=self.max_results)
+        results = self._search.run(query)
+        if isinstance(results, str):
+            # The tool reports API errors as text: surface them instead of caching them
+            raise RuntimeError(results)
+        return list(results)
+
+
+class LocalNewsProvider:
+    """Offline stand-in: articles from a JSON file (a list of {title, url, content}) or LOCAL_ARTICLES."""
+    name = "local"
+
+    def __init__(self, path: str = NEWS_LOCAL_PATH):
+        self.path = path
+        self.calls = 0
+
+    def search(self, query: str) -> list[dict]:
+        self.calls += 1
+        if self.path:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        return [dict(article) for article in LOCAL_ARTICLES]
+
+
+def create_news_provider(name: str = NEWS_PROVIDER):
+    """Build the configured news provider ('tavily' or 'local')."""
+    if name == "tavily":
+        return TavilyNewsProvider()
+    if name == "local":
+        return LocalNewsProvider()
+    raise ValueError(f"NEWS_PROVIDER desconhecido: {name}")
+
+
+def normalize_url(url: str) -> str:
+    """URL without scheme differences, 'www.', fragment or trailing slash (for deduplication)."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit(("", host, parts.path.rstrip("/"), parts.query, ""))
+
+
+def dedupe_articles(articles: list) -> list:
+    """
+    Remove repeated articles, keeping the first occurrence of each URL.
+    Args:
+        articles (list): Articles as returned by a provider (dicts with 'url'; other items are kept as they are).
+    Returns:
+        list: Articles in their original order without duplicates.
+    """
+    seen = set()
+    unique = []
+    for article in articles:
+        url = article.get("url") if isinstance(article, dict) else None
+        if url:
+            key = normalize_url(url)
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(article)
+    return unique
+
+
+class NewsCache:
+    """
+    TTL cache of news searches with an on-disk tier and single-flight fetching.
+    Args:
+        provider: Object with a name and a search(query) -> list[dict] method.
+        ttl_seconds (float): How long a search result is served before it is fetched again.
+        cache_dir (str): Directory for the on-disk tier ("" disables it).
+    """
+
+    def __init__(self, provider=None, ttl_seconds: float = NEWS_CACHE_TTL_SECONDS, cache_dir: str = NEWS_CACHE_DIR):
+        self.provider = provider if provider is not None else create_news_provider()
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self._entries: dict[str, tuple[float, list]] = {}
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, query: str) -> str:
+        normalized = " ".join(query.lower().split())
+        return hashlib.sha256(f"{self.provider.name}\n{normalized}".encode("utf-8")).hexdigest()[:32]
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _lookup(self, key: str) -> Optional[tuple[float, list]]:
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            try:
+                with open(self._disk_path(key), encoding="utf-8") as f:
+                    payload = json.load(f)
+                entry = (payload["fetched_at"], payload["articles"])
+            except (OSError, ValueError, KeyError):
+                entry = None
+            if entry is not None:
+                self._entries[key] = entry
+        return entry
+
+    def search(self, query: str) -> list:
+        """
+        Articles for a search, from the cache while they are younger than the TTL.
+        Args:
+            query (str): Search text.
+        Returns:
+            list: Articles deduplicated by URL.
+        """
+        key = self._key(query)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None and time.time() - entry[0] < self.ttl_seconds:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            with tracer.span(self.provider.name, "news") as span:
+                articles = dedupe_articles(self.provider.search(query))
+                span.set(articles=len(articles))
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            if entry is not None:
+                print(f"[NEWS CACHE DEBUG] Busca falhou, usando notícias expiradas: {e}")
+                future.set_result(entry[1])
+                return entry[1]
+            future.set_exception(e)
+            raise
+        self._store(key, articles)
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(articles)
+        return articles
+
+    def _store(self, key: str, articles: list):
+        fetched_at = time.time()
+        with self._lock:
+            self._entries[key] = (fetched_at, articles)
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": fetched_at, "articles": articles}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"[NEWS CACHE DEBUG] Falha ao salvar cache de notícias: {e}")
+
+    def clear(self):
+        """Drop every in-memory and on-disk entry."""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+news_cache = NewsCache()
@@ -1,22 +1,50 @@
 """
 NewsQueryTool: LangChain Tool for searching recent news about SRAG in Brazil.
 """
+import json
+
 from langchain_core.tools import Tool
-from langchain_community.tools.tavily_search import TavilySearchResults
 
-from agent.config import settings
+from agent.news_cache import news_cache
 
 def news_query_tool_run(query: str) -> str:
     """
-    Search for recent news about Severe Acute Respiratory Syndrome (SRAG) in Brazil using Tavily.
+    Search for recent news about Severe Acute Respiratory Syndrome (SRAG) in Brazil.
+    Searches are served from the news cache (TTL, on-disk tier, deduplicated by URL; see agent/news_cache.py).
     Args:
         query (str): Additional query string to refine the search.
     Returns:
-        str: News results as a string (JSON or plain text).
+        str: News results as a JSON list of articles.
+    """
+    search_query = f"notícias recentes Síndrome Respiratória Aguda Grave Brasil {query}".strip()
+    return json.dumps(news_cache.search(search_query), ensure_ascii=False)
+
+def format_news(news: str) -> str:
+    """
+    Readable text of the articles returned by news_query_tool_run: title, URL and content of each.
+    Args:
+        news (str): JSON list of articles (other text is returned unchanged).
+    Returns:
+        str: One numbered entry per article.
     """
-    search = TavilySearchResults(tavily_api_key=settings.TAVILY_API_KEY)
-    search_query = f"notícias recentes Síndrome Respiratória Aguda Grave Brasil {query}"
-    return search.run(search_query)
+    try:
+        articles = json.loads(news)
+    except (TypeError, ValueError):
+        return news
+    if not isinstance(articles, list):
+        return news
+    lines = []
+    for i, article in enumerate(articles, 1):
+        if not isinstance(article, dict):
+            lines.append(f"{i}. {article}")
+            continue
+        title, url, content = article.get("title"), article.get("url"), article.get("content")
+        lines.append(f"{i}. **{title}**" if title else f"{i}. {url or ''}")
+        if title and url:
+            lines.append(f"   {url}")
+        if content:
+            lines.append(f"   {content}")
+    return "\n".join(lines)
 
 news_query_tool = Tool.from_function(
     news_query_tool_run,
@@ -0,0 +1,73 @@
+"""
+Decomposition of compound or comparative data questions into independent sub-questions.
+"Compare a mortalidade entre homens e mulheres em 2024 e 2025" becomes one sub-question per
+(sex, year) combination; the graph answers them as parallel branches and merges the results
+before summarization.
+"""
+import itertools
+import re
+from dataclasses import dataclass
+
+from agent.config import PLANNER_MAX_SUBQUERIES
+
+_SEX = r"(homens|mulheres|sexo masculino|sexo feminino|masculino|feminino)"
+_YEAR = r"((?:19|20)\d{2})"
+_JOIN = r"\s*(?:,|\be\b|\bvs\.?|\bversus\b|\bx\b|\bcom\b)\s*"
+
+# Enumerations of alternatives: each becomes one dimension of the plan
+_ENUMERATIONS = [
+    ("sexo", _SEX, re.compile(rf"\b{_SEX}(?:{_JOIN}{_SEX})+\b")),
+    ("ano", _YEAR, re.compile(rf"\b{_YEAR}(?:{_JOIN}{_YEAR})+\b")),
+]
+_COMPARISON_CUE = re.compile(r"\b(?:compar\w*|diferen\w*|versus|vs|x)\b", re.IGNORECASE)
+_COMPARISON = re.compile(
+    r"^\s*(?:compare|comparar|compara|comparação|comparacao|comparativo|diferença|diferenca)\s+(?:de |da |do |das |dos |entre )?",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class SubQuestion:
+    """One independent part of a compound question."""
+    label: str
+    question: str
+
+
+def plan_subquestions(question: str, max_subqueries: int = PLANNER_MAX_SUBQUERIES) -> list[SubQuestion]:
+    """
+    Split a comparative question into one sub-question per combination of the enumerated alternatives.
+    Args:
+        question (str): User question.
+        max_subqueries (int): Upper bound on the number of sub-questions (larger plans are not split).
+    Returns:
+        list[SubQuestion]: Sub-questions, or a single item with the original question when it is not compound.
+    """
+    text = question.strip()
+    dimensions = []
+    for name, value_pattern, pattern in _ENUMERATIONS:
+        match = pattern.search(text.lower())
+        if not match:
+            continue
+        # A repeated group only keeps its last value: recover every alternative from the matched text
+        values = list(dict.fromkeys(re.findall(value_pattern, match.group(0))))
+        if len(values) < 2:
+            continue
+        # "entre 2023 e 2025" is a range filter unless the question asks for a comparison
+        if name == "ano" and text.lower()[: match.start()].endswith("entre ") and not _COMPARISON_CUE.search(text):
+            continue
+        slot = f"{{{name}}}"
+        text = text[: match.start()] + slot + text[match.end():]
+        dimensions.append((slot, values))
+    combinations = list(itertools.product(*(values for _, values in dimensions)))
+    if not dimensions or len(combinations) > max_subqueries:
+        return [SubQuestion(label=question, question=question)]
+    core = _COMPARISON.sub("", text).rstrip(" ?")
+    core = re.sub(r"\bentre\s+(?=\{)", "de ", core)
+    subquestions = []
+    for combination in combinations:
+        sub = core
+        for (slot, _), value in zip(dimensions, combination):
+            sub = sub.replace(slot, value, 1)
+        sub = sub[:1].upper() + sub[1:] + "?"
+        subquestions.append(SubQuestion(label=", ".join(combination), question=sub))
+    return subquestions
@@ -0,0 +1,235 @@
+"""
+Result cache for agent SQL queries, keyed by a canonical form of the SQL plus the data version.
+Equivalent queries (different whitespace, keyword/identifier case, order of AND conditions or IN
+lists, literal on either side of '=') share one entry, so repeated questions skip the database.
+Entries live in an in-memory LRU bounded by count and bytes, with an optional on-disk tier: one
+directory per data version, pruned when the version changes and bounded by count and bytes.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from agent.config import (
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_MAX_BYTES,
+    QUERY_CACHE_DIR,
+    QUERY_CACHE_DISK_MAX_ENTRIES,
+    QUERY_CACHE_DISK_MAX_BYTES,
+)
+from agent.database import QueryResult, data_version
+
+# Truncations that depend on load rather than on the query itself are never cached
+_VOLATILE_TRUNCATIONS = {"deadline", "cpu_time"}
+
+
+def _sort_key(node: exp.Expression) -> str:
+    return node.sql(dialect="sqlite", normalize=True)
+
+
+def _orient(node: exp.Expression) -> exp.Expression:
+    # Literal on the right of (in)equalities, IN lists in a fixed order
+    if isinstance(node, (exp.EQ, exp.NEQ)) and isinstance(node.this, exp.Literal) and not isinstance(node.expression, exp.Literal):
+        return node.__class__(this=node.expression, expression=node.this)
+    if isinstance(node, exp.In) and node.expressions:
+        node.set("expressions", sorted(node.expressions, key=_sort_key))
+    return node
+
+
+def _sort_chains(tree: exp.Expression) -> exp.Expression:
+    # Deepest chains first, so each AND/OR is sorted after its operands are already canonical
+    for node in reversed(list(tree.walk(bfs=True))):
+        if isinstance(node, (exp.And, exp.Or)) and not isinstance(node.parent, type(node)):
+            operands = sorted(node.flatten(unnest=True), key=_sort_key)
+            combine = exp.and_ if isinstance(node, exp.And) else exp.or_
+            node.replace(combine(*operands, copy=False))
+    return tree
+
+
+def canonical_sql(query: str) -> str:
+    """
+    Canonical text of a query: parsed, identifiers lower-cased, whitespace normalized,
+    AND/OR operands and IN lists ordered, literals moved to the right of comparisons.
+    Falls back to collapsed lower-case text if the query cannot be parsed.
+    Args:
+        query (str): SQL query.
+    Returns:
+        str: Canonical SQL.
+    """
+    try:
+        tree = sqlglot.parse_one(query, read="sqlite")
+    except ParseError:
+        return " ".join(query.lower().split()).rstrip(";")
+    return _sort_chains(tree.transform(_orient)).sql(dialect="sqlite", normalize=True)
+
+
+def cache_key(query: str, version: Optional[str] = None) -> str:
+    """SHA-256 key of the canonical SQL and the data version."""
+    version = version if version is not None else data_version()
+    return hashlib.sha256(f"{version}\n{canonical_sql(query)}".encode("utf-8")).hexdigest()
+
+
+class QueryResultCache:
+    """
+    Thread-safe LRU cache of QueryResult objects with an optional on-disk tier.
+    Args:
+        max_entries (int): Maximum number of in-memory entries.
+        max_bytes (int): Maximum approximate in-memory payload.
+        cache_dir (str): Directory for the on-disk tier ("" disables it).
+        disk_max_entries (int): Maximum number of files in the on-disk tier.
+        disk_max_bytes (int): Maximum size of the on-disk tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        max_bytes: int = QUERY_CACHE_MAX_BYTES,
+        cache_dir: str = QUERY_CACHE_DIR,
+        disk_max_entries: int = QUERY_CACHE_DISK_MAX_ENTRIES,
+        disk_max_bytes: int = QUERY_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: OrderedDict[str, tuple[QueryResult, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, key: str, version: str) -> str:
+        return os.path.join(self.cache_dir, version, f"{key}.pkl")
+
+    def _use_disk_version(self, version: str):
+        """On a data version change, delete the on-disk entries of every other version."""
+        if version == self._disk_version:
+            return
+        self._disk_version = version
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name == version:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.endswith(".pkl"):
+                os.remove(path)
+        os.makedirs(os.path.join(self.cache_dir, version), exist_ok=True)
+
+    def _prune_disk(self, version: str):
+        """Delete the least recently used files of the version until the tier fits its count and byte limits."""
+        directory = os.path.join(self.cache_dir, version)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        while files and (len(files) > self.disk_max_entries or total > self.disk_max_bytes):
+            _, size, path = files.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _store(self, key: str, result: QueryResult):
+        size = result.approx_bytes()
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def get(self, query: str) -> Optional[QueryResult]:
+        """
+        Look up a query (memory first, then disk).
+        Args:
+            query (str): SQL query as it would be executed.
+        Returns:
+            QueryResult or None on a miss.
+        """
+        version = data_version()
+        key = cache_key(query, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.cache_dir:
+            self._use_disk_version(version)
+            path = self._disk_path(key, version)
+            try:
+                with open(path, "rb") as f:
+                    result = pickle.load(f)
+                # Recently read files are the last to be pruned
+                os.utime(path)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                result = None
+            if result is not None:
+                with self._lock:
+                    self._store(key, result)
+                    self.hits += 1
+                return result
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query: str, result: QueryResult):
+        """
+        Store a query result (skipped when it was cut short by a time or CPU limit).
+        Args:
+            query (str): SQL query as executed.
+            result (QueryResult): Its result.
+        """
+        if result.truncation_reason in _VOLATILE_TRUNCATIONS:
+            return
+        version = data_version()
+        key = cache_key(query, version)
+        with self._lock:
+            self._store(key, result)
+        if self.cache_dir:
+            self._use_disk_version(version)
+            path = self._disk_path(key, version)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._prune_disk(version)
+
+    def clear(self):
+        """Drop every in-memory and on-disk entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif name.endswith(".pkl"):
+                    os.remove(path)
+            self._disk_version = None
+
+
+query_cache = QueryResultCache()
@@ -0,0 +1,250 @@
+"""
+Persistent cache from natural-language questions to validated SQL, used by generate_sql_from_question.
+Questions are normalized (case, accents, whitespace) and their year/sex/age entities are replaced by
+slots, so "casos de mulheres em 2024" and "Casos de homens em 2025" share one SQL template that is
+re-parameterized with the new values. Near-identical phrasings are matched with a local character
+trigram index, as long as they differ only in stopwords, plurals and spelling (a word added or replaced,
+such as a state, changes the query); hits never call the LLM.
+"""
+import difflib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from agent.config import QUESTION_CACHE_PATH, QUESTION_CACHE_FUZZY_THRESHOLD
+from agent.sql_guard import check_sql
+from agent.text_utils import normalize_text, char_ngrams
+
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_AGE = re.compile(r"\b(\d{1,3}) anos?\b")
+_SEX_WORDS = {
+    "mulheres": "F", "mulher": "F", "femininas": "F", "feminina": "F", "feminino": "F",
+    "homens": "M", "homem": "M", "masculinos": "M", "masculina": "M", "masculino": "M",
+}
+_SEX = re.compile(r"\b(" + "|".join(sorted(_SEX_WORDS, key=len, reverse=True)) + r")\b")
+
+# Words that flip or bound the meaning of a filter: fuzzy hits must agree on them exactly
+# ("casos não de mulheres" is one character trigram away from "casos de mulheres")
+_POLARITY_WORDS = {
+    "nao", "sem", "exceto", "excluindo", "excluir", "fora", "nenhum", "nenhuma", "nunca",
+    "mais", "menos", "acima", "abaixo", "maior", "maiores", "menor", "menores", "ate", "apos", "antes",
+}
+
+
+# Words a fuzzy hit may add, drop or swap without changing the query
+_STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas",
+    "e", "ao", "aos", "para", "pra", "por", "pelo", "pela", "pelos", "pelas", "com", "que",
+}
+# Minimum similarity of two differing words to be taken as spelling variants ("qantos"/"quantos")
+_SPELLING_RATIO = 0.85
+
+
+def _polarity(template: str) -> frozenset[str]:
+    return frozenset(w for w in template.split() if w in _POLARITY_WORDS)
+
+
+def _content_words(template: str) -> set[str]:
+    return {w[:-1] if w.endswith("s") and len(w) > 3 else w for w in template.split() if w not in _STOPWORDS}
+
+
+def _spelling_variant(word: str, others: set[str]) -> bool:
+    return word not in _POLARITY_WORDS and any(
+        difflib.SequenceMatcher(None, word, other).ratio() >= _SPELLING_RATIO for other in others
+    )
+
+
+def _same_content(template: str, other: str) -> bool:
+    """True if two templates differ only in stopwords, plurals and spelling."""
+    words, other_words = _content_words(template), _content_words(other)
+    only, other_only = words - other_words, other_words - words
+    return all(_spelling_variant(w, other_only) for w in only) and all(
+        _spelling_variant(w, only) for w in other_only
+    )
+
+
+def _unique(values: list[str]) -> list[str]:
+    return list(dict.fromkeys(values))
+
+
+def extract_entities(question: str) -> tuple[str, dict[str, list[str]]]:
+    """
+    Normalize a question and replace its entities by slots.
+    Args:
+        question (str): Raw question.
+    Returns:
+        tuple: (template text, {"ano": [...], "sexo": [...], "idade": [...]}) with values in order of appearance.
+    """
+    text = normalize_text(question)
+    entities = {
+        "ano": _unique(_YEAR.findall(text)),
+        "sexo": _unique([_SEX_WORDS[w] for w in _SEX.findall(text)]),
+        "idade": _unique(_AGE.findall(text)),
+    }
+    template = _YEAR.sub("{ano}", text)
+    template = _AGE.sub("{idade} anos", template)
+    template = _SEX.sub("{sexo}", template)
+    return template, {k: v for k, v in entities.items() if v}
+
+
+def _slot(kind: str, index: int) -> str:
+    return f"__{kind.upper()}_{index}__"
+
+
+def parameterize_sql(sql: str, entities: dict[str, list[str]]) -> Optional[str]:
+    """
+    Replace the literals that carry the question entities by slots.
+    Returns None when some entity does not appear as a literal (the SQL could not be safely reused).
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read="sqlite")
+    except ParseError:
+        return None
+    used = set()
+    for lit in tree.find_all(exp.Literal):
+        value = lit.this
+        for kind, values in entities.items():
+            for i, v in enumerate(values):
+                if kind == "ano" and (value == v or (lit.is_string and value.startswith(f"{v}-"))):
+                    lit.set("this", _slot(kind, i) + value[len(v):])
+                elif kind == "sexo" and lit.is_string and value == v:
+                    lit.set("this", _slot(kind, i))
+                elif kind == "idade" and not lit.is_string and value == v:
+                    lit.set("this", _slot(kind, i))
+                else:
+                    continue
+                used.add((kind, i))
+                break
+            else:
+                continue
+            break
+    expected = {(k, i) for k, values in entities.items() for i in range(len(values))}
+    if used != expected:
+        return None
+    return tree.sql(dialect="sqlite")
+
+
+def render_sql(template: str, entities: dict[str, list[str]]) -> str:
+    """Fill the slots of a parameterized SQL template with entity values."""
+    for kind, values in entities.items():
+        for i, v in enumerate(values):
+            template = template.replace(_slot(kind, i), v)
+    return template
+
+
+def _shape(entities: dict[str, list[str]]) -> str:
+    return ",".join(f"{k}:{len(v)}" for k, v in sorted(entities.items()))
+
+
+class QuestionSQLCache:
+    """
+    Question -> SQL cache persisted as JSON, with exact, template and fuzzy (trigram) lookups.
+    Args:
+        path (str): JSON file backing the cache ("" keeps it in memory only).
+        fuzzy_threshold (float): Minimum trigram Jaccard similarity for a fuzzy hit.
+    """
+
+    def __init__(self, path: str = QUESTION_CACHE_PATH, fuzzy_threshold: float = QUESTION_CACHE_FUZZY_THRESHOLD):
+        self.path = path
+        self.fuzzy_threshold = fuzzy_threshold
+        self._lock = threading.Lock()
+        self._exact: dict[str, str] = {}
+        self._templates: dict[str, str] = {}
+        self._ngrams: dict[str, set[str]] = {}
+        self._index: dict[str, set[str]] = defaultdict(set)
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._exact = data.get("exact", {})
+        for key, sql in data.get("templates", {}).items():
+            self._add_template(key, sql)
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"exact": self._exact, "templates": self._templates}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _add_template(self, key: str, sql: str):
+        self._templates[key] = sql
+        grams = char_ngrams(key.split("|", 1)[1])
+        self._ngrams[key] = grams
+        for g in grams:
+            self._index[g].add(key)
+
+    def _fuzzy_lookup(self, shape: str, template: str) -> Optional[str]:
+        grams = char_ngrams(template)
+        polarity = _polarity(template)
+        overlap: dict[str, int] = defaultdict(int)
+        for g in grams:
+            for key in self._index.get(g, ()):
+                overlap[key] += 1
+        best_key, best_score = None, 0.0
+        for key, common in overlap.items():
+            if not key.startswith(shape + "|"):
+                continue
+            candidate = key.split("|", 1)[1]
+            if _polarity(candidate) != polarity or not _same_content(template, candidate):
+                continue
+            score = common / (len(grams) + len(self._ngrams[key]) - common)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key if best_score >= self.fuzzy_threshold else None
+
+    def get(self, question: str) -> Optional[str]:
+        """
+        Look up SQL for a question: exact normalized text, then entity template, then fuzzy template.
+        Args:
+            question (str): Raw question.
+        Returns:
+            str or None: SQL with the question's own entity values, or None on a miss.
+        """
+        template, entities = extract_entities(question)
+        shape = _shape(entities)
+        with self._lock:
+            sql = self._exact.get(normalize_text(question))
+            if sql is not None:
+                return sql
+            key = f"{shape}|{template}"
+            if key not in self._templates:
+                key = self._fuzzy_lookup(shape, template)
+            if key is None:
+                return None
+            return render_sql(self._templates[key], entities)
+
+    def put(self, question: str, sql: str):
+        """
+        Store the SQL generated for a question, if it passes the SQL guard.
+        Args:
+            question (str): Raw question.
+            sql (str): Generated SQL.
+        """
+        if not check_sql(sql, explain=False).allowed:
+            return
+        template, entities = extract_entities(question)
+        parameterized = parameterize_sql(sql, entities) if entities else sql
+        with self._lock:
+            self._exact[normalize_text(question)] = sql
+            if parameterized is not None:
+                self._add_template(f"{_shape(entities)}|{template}", parameterized)
+            self._save()
+
+
+question_cache = QuestionSQLCache()
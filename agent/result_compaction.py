@@ -0,0 +1,230 @@
+"""
+Compaction of SQL results before they are sent to the LLM in summarization_node.
+Detects the result shape (scalar, time series, categorical breakdown or generic table) and writes a
+short digest with totals, extremes and top-k rows, shrinking the detail until it fits a token budget.
+Values the summary relies on (totals, extremes, top-k rows) are written unrounded.
+"""
+import datetime
+import re
+from typing import Any, Optional
+
+from agent.config import SUMMARY_TOKEN_BUDGET, SUMMARY_TOP_K
+from agent.database import QueryResult
+
+# Rough characters-per-token ratio for Portuguese text and numbers
+CHARS_PER_TOKEN = 4
+_DATE_LIKE = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_date_like(value: Any) -> bool:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return True
+    return isinstance(value, str) and bool(_DATE_LIKE.match(value))
+
+
+def _column_kind(values: list) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return "empty"
+    if all(_is_number(v) for v in present):
+        return "numeric"
+    if all(_is_date_like(v) for v in present):
+        return "date"
+    return "category"
+
+
+def detect_shape(result: QueryResult) -> str:
+    """
+    Classify a result as 'empty', 'scalar', 'time_series', 'categorical' or 'table'.
+    Args:
+        result (QueryResult): SQL result.
+    Returns:
+        str: Shape name.
+    """
+    if not result.rows:
+        return "empty"
+    if len(result.rows) == 1:
+        return "scalar"
+    kinds = [_column_kind(list(col)) for col in zip(*result.rows)]
+    numeric = [k == "numeric" for k in kinds]
+    if len(kinds) < 2 or not any(numeric[1:]):
+        return "table"
+    if kinds[0] == "date" and all(numeric[1:]):
+        return "time_series"
+    # A numeric first column is a category key only if it identifies the rows (e.g. municipality codes)
+    keys = [row[0] for row in result.rows]
+    if not numeric[0] or len(set(keys)) == len(keys):
+        return "categorical"
+    return "table"
+
+
+def _is_rate(values: list) -> bool:
+    """Proportions (all floats within [0, 1]) are averaged instead of summed."""
+    present = [v for v in values if v is not None]
+    return bool(present) and all(isinstance(v, float) and 0.0 <= v <= 1.0 for v in present)
+
+
+def _count_index(result: QueryResult, numeric: list[int]) -> Optional[int]:
+    """First numeric column holding counts (not rates), used to weight the mean of rate columns."""
+    for i in numeric:
+        values = [r[i] for r in result.rows if r[i] is not None]
+        if not _is_rate(values) and all(v >= 0 for v in values):
+            return i
+    return None
+
+
+def _weighted_mean(rows: list[tuple], value_index: int, weight_index: Optional[int]) -> Optional[float]:
+    """
+    Mean of a rate column weighted by a count column (each rate has its own denominator).
+    Returns None without a count column, since an unweighted mean of rates would be misleading.
+    """
+    if weight_index is None:
+        return None
+    pairs = [(r[value_index], r[weight_index]) for r in rows if r[value_index] is not None and r[weight_index] is not None]
+    weight = sum(w for _, w in pairs)
+    return sum(v * w for v, w in pairs) / weight if weight else None
+
+
+def _fmt(value: Any) -> str:
+    return "NULL" if value is None else str(value)
+
+
+def _table(columns: list[str], rows: list[tuple]) -> str:
+    lines = [" | ".join(columns)]
+    lines += [" | ".join(_fmt(v) for v in row) for row in rows]
+    return "\n".join(lines)
+
+
+def _numeric_indexes(result: QueryResult) -> list[int]:
+    return [i for i, col in enumerate(zip(*result.rows)) if i > 0 and _column_kind(list(col)) == "numeric"]
+
+
+def _scalar_digest(result: QueryResult, top_k: int) -> str:
+    return "Resultado (1 linha):\n" + "\n".join(
+        f"- {col}: {_fmt(v)}" for col, v in zip(result.columns, result.rows[0])
+    )
+
+
+def _time_series_digest(result: QueryResult, top_k: int) -> str:
+    rows = sorted(result.rows, key=lambda r: str(r[0]))
+    key = result.columns[0]
+    lines = [f"Série temporal por {key}: {len(rows)} pontos, de {_fmt(rows[0][0])} a {_fmt(rows[-1][0])}."]
+    numeric = _numeric_indexes(result)
+    counts = _count_index(result, numeric)
+    for i in numeric:
+        points = [(r[0], r[i]) for r in rows if r[i] is not None]
+        if not points:
+            continue
+        values = [v for _, v in points]
+        low = min(points, key=lambda p: p[1])
+        high = max(points, key=lambda p: p[1])
+        first, last = points[0][1], points[-1][1]
+        change = f"{(last - first) / first:+.1%}" if first else "N/A"
+        if _is_rate(values):
+            mean = _weighted_mean(rows, i, counts)
+            totals = "" if mean is None else f"média ponderada por {result.columns[counts]} {mean:.4g}; "
+        else:
+            totals = f"total {_fmt(sum(values))}; média {sum(values) / len(values):.4g}; "
+        lines.append(
+            f"- {result.columns[i]}: {totals}"
+            f"mínimo {_fmt(low[1])} em {_fmt(low[0])}; máximo {_fmt(high[1])} em {_fmt(high[0])}; "
+            f"primeiro {_fmt(first)}; último {_fmt(last)}; variação {change}"
+        )
+    if len(rows) <= top_k:
+        lines.append("Pontos:\n" + _table(result.columns, rows))
+    else:
+        lines.append(f"Últimos {top_k} pontos:\n" + _table(result.columns, rows[-top_k:]))
+    return "\n".join(lines)
+
+
+def _categorical_digest(result: QueryResult, top_k: int) -> str:
+    numeric = _numeric_indexes(result)
+    measure = numeric[0]
+    rows = sorted(result.rows, key=lambda r: (r[measure] is None, -(r[measure] or 0)))
+    lines = [f"Distribuição por {result.columns[0]}: {len(rows)} categorias."]
+    summaries = []
+    totals = {}
+    counts = _count_index(result, numeric)
+    for i in numeric:
+        values = [r[i] for r in rows if r[i] is not None]
+        if _is_rate(values):
+            # Rates of different categories have different denominators: only a count-weighted mean is meaningful
+            mean = _weighted_mean(rows, i, counts)
+            if mean is not None:
+                summaries.append(f"{result.columns[i]} médio (ponderado por {result.columns[counts]}) = {mean:.4g}")
+        else:
+            totals[i] = sum(values)
+            summaries.append(f"{result.columns[i]} total = {_fmt(totals[i])}")
+    if summaries:
+        lines.append("Resumo: " + "; ".join(summaries))
+    shown = rows[:top_k]
+    total = totals.get(measure)
+    columns = result.columns + ([f"% de {result.columns[measure]}"] if total else [])
+    table_rows = [
+        row + ((f"{(row[measure] or 0) / total:.1%}",) if total else ()) for row in shown
+    ]
+    title = "Categorias" if len(rows) <= top_k else f"Top {top_k} por {result.columns[measure]}"
+    lines.append(f"{title}:\n" + _table(columns, table_rows))
+    rest = rows[top_k:]
+    if rest:
+        if measure in totals:
+            rest_total = sum(r[measure] for r in rest if r[measure] is not None)
+            share = f" ({rest_total / total:.1%})" if total else ""
+            lines.append(f"Demais {len(rest)} categorias: {result.columns[measure]} = {_fmt(rest_total)}{share}")
+        else:
+            lines.append(f"Demais {len(rest)} categorias omitidas.")
+    return "\n".join(lines)
+
+
+def _table_digest(result: QueryResult, top_k: int) -> str:
+    lines = [f"Tabela com {len(result.rows)} linhas e colunas {', '.join(result.columns)}."]
+    title = "Linhas" if len(result.rows) <= top_k else f"Primeiras {top_k} linhas"
+    lines.append(f"{title}:\n" + _table(result.columns, result.rows[:top_k]))
+    return "\n".join(lines)
+
+
+_DIGESTS = {
+    "scalar": _scalar_digest,
+    "time_series": _time_series_digest,
+    "categorical": _categorical_digest,
+    "table": _table_digest,
+}
+
+
+def compact_result(
+    result: QueryResult, token_budget: int = SUMMARY_TOKEN_BUDGET, top_k: int = SUMMARY_TOP_K
+) -> str:
+    """
+    Compact digest of a SQL result for the summarization prompt.
+    Args:
+        result (QueryResult): SQL result.
+        token_budget (int): Maximum approximate tokens of the digest.
+        top_k (int): Maximum rows/points listed individually (reduced until the digest fits the budget).
+    Returns:
+        str: Digest text.
+    """
+    shape = detect_shape(result)
+    if shape == "empty":
+        return "A consulta não retornou linhas."
+    note = ""
+    if result.truncated:
+        note = f"\n(Resultado parcial: truncado em {len(result.rows)} linhas pelo limite de {result.truncation_reason}.)"
+    k = max(top_k, 1)
+    while True:
+        digest = _DIGESTS[shape](result, k) + note
+        if estimate_tokens(digest) <= token_budget or k == 1:
+            break
+        k = max(k // 2, 1)
+    max_chars = token_budget * CHARS_PER_TOKEN
+    if len(digest) > max_chars:
+        digest = digest[: max_chars - 30].rstrip() + "\n[... resumo cortado]"
+    return digest
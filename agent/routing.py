@@ -0,0 +1,84 @@
+"""
+Question routing for the LangGraph agent.
+route_question is the keyword router used by router_node (pure function, no I/O). fused_route is the
+optional single-call mode: one structured-output LLM call returns the scope decision, the route and,
+for data questions, the SQL, replacing the separate guardrail and SQL generation calls.
+"""
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from agent.llm_gateway import get_llm_gateway
+from agent.scope_classifier import VALID_PROMPT_EXAMPLES, INVALID_PROMPT_EXAMPLES
+from agent.sql_generation import CS_SEXO_DESC, PROMPT_EXAMPLES
+
+EXPLANATION_KEYWORDS = ["explique", "o que é", "defina", "significa"]
+NEWS_KEYWORDS = ["notícia", "notícias", "jornal", "reportagem", "matéria", "atualização", "mídia"]
+DATA_KEYWORDS = ["quantos", "total", "casos", "taxa", "percentual", "mortes", "internados", "ocupação", "vacinação"]
+
+# Audit log decision recorded for each route (the blocked decision is also read back by the scope classifier)
+ROUTE_DECISIONS = {
+    "explanation": "Roteado para explanation",
+    "news": "Roteado para news",
+    "sql_generation": "Roteado para sql_generation",
+    "sql_query": "Fallback para sql_query",
+    "summary": "Roteado para summary",
+}
+BLOCKED_DECISION = "Pergunta bloqueada por guardrail"
+
+
+def route_question(question: str) -> str:
+    """
+    Keyword routing of an already validated question.
+    Args:
+        question (str): User question.
+    Returns:
+        str: Next node name ('explanation', 'news', 'sql_generation' or the 'sql_query' fallback).
+    """
+    q_lower = question.lower()
+    if any(word in q_lower for word in EXPLANATION_KEYWORDS):
+        return "explanation"
+    if any(word in q_lower for word in NEWS_KEYWORDS):
+        return "news"
+    if any(word in q_lower for word in DATA_KEYWORDS):
+        return "sql_generation"
+    return "sql_query"
+
+
+class RoutingDecision(BaseModel):
+    """Structured output of the fused guardrail + routing + SQL call."""
+    in_scope: bool = Field(description="True se a pergunta é sobre SRAG, epidemiologia ou saúde pública")
+    route: Literal["sql_generation", "explanation", "news", "summary"] = Field(
+        description="sql_generation: pergunta sobre dados/números; explanation: conceito; news: notícias; summary: resumo executivo"
+    )
+    sql: Optional[str] = Field(
+        default=None, description="Para route=sql_generation: uma única query SELECT SQLite na tabela srag_cases"
+    )
+
+
+FUSED_ROUTING_PROMPT = f"""
+Você é o roteador de um agente sobre SRAG (Síndrome Respiratória Aguda Grave) no Brasil. Para a pergunta abaixo, decida:
+1. in_scope: a pergunta está relacionada a SRAG, epidemiologia, saúde pública, vigilância epidemiológica, dados de casos, mortalidade, hospitalização, vacinação, explicações conceituais desses temas ou notícias sobre SRAG no Brasil? Política, economia, esportes, tecnologia, entretenimento e temas genéricos estão fora do escopo.
+2. route: sql_generation (pergunta respondida com dados da tabela), explanation (definição ou explicação de um conceito), news (notícias), summary (resumo executivo da situação atual).
+3. sql: apenas para sql_generation, a query SQL completa para a tabela srag_cases de um banco SQLite. Utilize apenas as colunas e valores do dicionário de dados. NÃO use outras tabelas nem comandos que não sejam SELECT.
+
+Coluna CS_SEXO: valores possíveis: {CS_SEXO_DESC}.
+{PROMPT_EXAMPLES}
+Exemplos de perguntas dentro do escopo:
+{"".join(f"- {q}{chr(10)}" for q in VALID_PROMPT_EXAMPLES)}
+Exemplos de perguntas fora do escopo:
+{"".join(f"- {q}{chr(10)}" for q in INVALID_PROMPT_EXAMPLES)}
+Pergunta: """
+
+
+def fused_route(question: str) -> RoutingDecision:
+    """
+    Scope check, routing and SQL generation in one structured-output LLM call.
+    Args:
+        question (str): User question.
+    Returns:
+        RoutingDecision: Scope flag, route and SQL (for data questions).
+    """
+    decision = get_llm_gateway().structured(FUSED_ROUTING_PROMPT + question, RoutingDecision, purpose="routing")
+    print(f"[ROUTER DEBUG] Decisão fundida: {decision}")
+    return decision
@@ -0,0 +1,308 @@
+"""
+Local scope classifier for the is_valid_input guardrail.
+A multinomial naive Bayes model over words and character trigrams, trained on the guardrail prompt
+examples plus the questions the LLM already judged (recorded in the audit log), decides in
+microseconds whether a question is about SRAG/public health. The model learns question shapes as
+much as topics, so a question is only accepted locally when it also contains domain vocabulary
+(health terms or a data dictionary column) and only rejected locally when it does not; the others,
+and questions in the uncertain band, go to the LLM. Every decision is cached per normalized question.
+"""
+import json
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Iterable, Optional
+
+from agent.config import (
+    AUDIT_LOG_PATH,
+    SCOPE_ACCEPT_THRESHOLD,
+    SCOPE_REJECT_THRESHOLD,
+    SCOPE_DECISION_CACHE_SIZE,
+    SCOPE_TRAIN_ON_LOGS,
+)
+from agent.data_dictionary import load_data_dictionary
+from agent.text_utils import normalize_text, char_ngrams
+
+# Examples shown to the LLM in the guardrail prompt (also the seed training set)
+VALID_PROMPT_EXAMPLES = [
+    "Quantos casos de SRAG foram notificados em 2024?",
+    "Qual a taxa de mortalidade por SRAG em crianças?",
+    "Explique o que é SRAG.",
+    "Explique o que é taxa de mortalidade.",
+    "O que significa incidência?",
+    "O que é letalidade?",
+    "Como funciona a notificação de casos de SRAG?",
+    "Quais as tendências de hospitalização por SRAG?",
+    "Quais as últimas notícias sobre SRAG no Brasil?",
+]
+
+INVALID_PROMPT_EXAMPLES = [
+    "Qual a cotação do dólar?",
+    "Quem ganhou o jogo de futebol ontem?",
+    "Qual o melhor filme de 2024?",
+    "Como investir em ações?",
+    "O presidente foi reeleito?",
+    "Qual a previsão do tempo para amanhã?",
+]
+
+# Additional seed questions covering the shapes the agent answers and common off-topic requests
+VALID_TRAINING_EXAMPLES = VALID_PROMPT_EXAMPLES + [
+    "Quantos casos de SRAG de mulheres em 2025?",
+    "Quantos casos de SRAG de homens?",
+    "Quantos casos ignorados de sexo?",
+    "Qual a taxa de ocupação de UTI?",
+    "Qual a taxa de vacinação contra covid dos casos?",
+    "Percentual de vacinados contra gripe por ano",
+    "Quantos óbitos de idosos em 2024?",
+    "Quantos pacientes foram internados na UTI?",
+    "Casos de SRAG por mês em 2025",
+    "Qual o aumento de casos nos últimos 30 dias?",
+    "Defina vigilância epidemiológica.",
+    "O que é influenza?",
+    "O que é covid-19?",
+    "Quais os sintomas de síndrome respiratória aguda grave?",
+    "Notícias recentes sobre surtos de gripe no Brasil",
+    "Gere um resumo executivo da situação da SRAG",
+    "Quantas mortes por SRAG houve por faixa etária?",
+    "Qual a proporção de casos hospitalizados?",
+    "Explique o que é incidência de uma doença.",
+    "Qual a evolução dos casos de síndrome respiratória?",
+]
+
+INVALID_TRAINING_EXAMPLES = INVALID_PROMPT_EXAMPLES + [
+    "Quem vai ganhar a eleição?",
+    "Qual o resultado do campeonato brasileiro?",
+    "Me recomende uma série para assistir.",
+    "Qual o preço do bitcoin hoje?",
+    "Como fazer um bolo de chocolate?",
+    "Escreva um poema sobre o mar.",
+    "Qual a capital da França?",
+    "Como programar em Python?",
+    "Qual o melhor celular de 2025?",
+    "Quanto rende a poupança?",
+    "Conte uma piada.",
+    "Quais as novidades do mundo da moda?",
+    "Qual a taxa de juros do banco central?",
+    "Quantos gols o time marcou no jogo?",
+]
+
+# Normalized word prefixes that show a question is about SRAG or public health
+DOMAIN_STEMS = (
+    "srag", "sindrom", "respirat", "saude", "doenc", "epidemi", "pandemi", "endemi", "mortalidad",
+    "letalidad", "obito", "morte", "morrer", "falec", "hospitaliz", "internac", "internad", "vacin",
+    "imuniz", "covid", "gripe", "influenza", "virus", "viral", "sintom", "incidenc", "prevalenc",
+    "notificac", "surto", "paciente", "infecc", "infect", "contagi", "transmiss", "diagnost",
+    "vigilanc", "leito", "ventilac", "ventilator", "etiolog", "infogripe", "evoluc", "idos", "crianc",
+    "sexo", "idade", "faixa etaria", "raca", "fator de risco",
+)
+# Whole words with the same role (too short or too ambiguous to be used as prefixes)
+DOMAIN_WORDS = {"uti", "sus", "sars", "cov"}
+
+# Logged decisions used for training: only the LLM's, never the classifier's own local decisions
+LLM_DECISION_NODE = "scope_classifier"
+LLM_IN_SCOPE = "LLM: pergunta no escopo"
+LLM_OUT_OF_SCOPE = "LLM: pergunta fora do escopo"
+
+# Sharpness of the per-feature log-odds -> probability mapping
+_SCORE_SCALE = 4.0
+
+
+def _features(text: str) -> Counter:
+    words = text.split()
+    features = Counter(f"w:{w}" for w in words)
+    for w in words:
+        features.update(f"c:{g}" for g in char_ngrams(w))
+    return features
+
+
+def _column_terms() -> set[str]:
+    try:
+        fields = load_data_dictionary()
+    except (OSError, ValueError):
+        return set()
+    return {normalize_text(f["field_name"]) for f in fields}
+
+
+_COLUMN_TERMS = _column_terms()
+
+
+def has_domain_evidence(question: str) -> bool:
+    """
+    True if the question mentions SRAG/health vocabulary or a data dictionary column.
+    Args:
+        question (str): Raw question.
+    Returns:
+        bool: Whether the question has positive evidence of being in scope.
+    """
+    text = normalize_text(question)
+    words = text.split()
+    if any(w in DOMAIN_WORDS or w in _COLUMN_TERMS for w in words):
+        return True
+    padded = f" {text}"
+    return any(f" {stem}" in padded for stem in DOMAIN_STEMS)
+
+
+def load_logged_examples(log_path: Optional[str] = None) -> tuple[list[str], list[str]]:
+    """
+    Questions already judged by the LLM guardrail, read from the agent audit log.
+    Decisions the classifier took by itself are not read back, so it never trains on its own output.
+    Args:
+        log_path (str): Audit log path (defaults to AUDIT_LOG_PATH).
+    Returns:
+        tuple: (questions the LLM accepted, questions the LLM blocked).
+    """
+    log_path = log_path or AUDIT_LOG_PATH
+    valid, invalid = [], []
+    if not os.path.exists(log_path):
+        return valid, invalid
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("node") != LLM_DECISION_NODE:
+                continue
+            question = (entry.get("input_state") or {}).get("question")
+            if not question:
+                continue
+            if entry.get("decision") == LLM_OUT_OF_SCOPE:
+                invalid.append(question)
+            elif entry.get("decision") == LLM_IN_SCOPE:
+                valid.append(question)
+    return valid, invalid
+
+
+class ScopeClassifier:
+    """
+    Naive Bayes in-scope / out-of-scope classifier with an LLM fallback for uncertain questions.
+    Args:
+        valid (Iterable[str]): In-scope training questions.
+        invalid (Iterable[str]): Out-of-scope training questions.
+        accept_threshold (float): Probability at or above which a question is accepted locally.
+        reject_threshold (float): Probability at or below which a question is rejected locally (when it has no domain vocabulary).
+        cache_size (int): Maximum number of cached decisions.
+        on_llm_decision (Callable): Called with (question, decision) whenever the LLM decided (e.g. to log it for training).
+    """
+
+    def __init__(
+        self,
+        valid: Iterable[str],
+        invalid: Iterable[str],
+        accept_threshold: float = SCOPE_ACCEPT_THRESHOLD,
+        reject_threshold: float = SCOPE_REJECT_THRESHOLD,
+        cache_size: int = SCOPE_DECISION_CACHE_SIZE,
+        on_llm_decision: Optional[Callable[[str, bool], None]] = None,
+    ):
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+        self.cache_size = cache_size
+        self.on_llm_decision = on_llm_decision
+        self._decisions: OrderedDict[str, bool] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fit(list(valid), list(invalid))
+
+    def _fit(self, valid: list[str], invalid: list[str]):
+        counts = {True: Counter(), False: Counter()}
+        for label, questions in ((True, valid), (False, invalid)):
+            for q in questions:
+                counts[label].update(_features(normalize_text(q)))
+        vocabulary = set(counts[True]) | set(counts[False])
+        self._log_prob = {}
+        for label, c in counts.items():
+            total = sum(c.values()) + len(vocabulary)
+            self._log_prob[label] = {f: math.log((c[f] + 1) / total) for f in vocabulary}
+        self._log_prior = math.log((len(valid) + 1) / (len(invalid) + 1))
+
+    def probability(self, question: str) -> float:
+        """
+        Probability that a question is in scope.
+        Args:
+            question (str): Raw question.
+        Returns:
+            float: Value between 0 and 1 (0.5 when no known feature is present).
+        """
+        features = _features(normalize_text(question))
+        known = [(f, n) for f, n in features.items() if f in self._log_prob[True]]
+        if not known:
+            return 0.5
+        log_odds = sum(n * (self._log_prob[True][f] - self._log_prob[False][f]) for f, n in known)
+        score = (log_odds + self._log_prior) / sum(n for _, n in known)
+        return 1.0 / (1.0 + math.exp(-_SCORE_SCALE * score))
+
+    def classify(self, question: str, llm_judge: Optional[Callable[[str], bool]] = None) -> bool:
+        """
+        Decide whether a question is in scope, asking llm_judge in the uncertain band, for
+        likely-in-scope questions without domain vocabulary (see has_domain_evidence) and for
+        unlikely ones that do have it.
+        If the LLM call fails, the local prediction is used instead of allowing everything, and
+        questions without domain vocabulary are rejected.
+        Args:
+            question (str): Raw question.
+            llm_judge (Callable): Function returning the LLM decision for a question.
+        Returns:
+            bool: True if the question is in scope.
+        """
+        key = normalize_text(question)
+        with self._lock:
+            if key in self._decisions:
+                self._decisions.move_to_end(key)
+                return self._decisions[key]
+        p = self.probability(question)
+        evidence = has_domain_evidence(question)
+        local = p >= 0.5 and evidence
+        if p >= self.accept_threshold and evidence:
+            decision = True
+        elif p <= self.reject_threshold and not evidence:
+            decision = False
+        elif llm_judge is None:
+            decision = local
+        else:
+            try:
+                decision = llm_judge(question)
+            except Exception as e:
+                print(f"[GUARDRAIL DEBUG] LLM exception: {e}; usando classificador local (p={p:.2f})")
+                decision = local
+            else:
+                if self.on_llm_decision is not None:
+                    self.on_llm_decision(question, decision)
+        print(f"[GUARDRAIL DEBUG] p(escopo)={p:.2f} decisão={decision} para: '{question}'")
+        with self._lock:
+            self._decisions[key] = decision
+            while len(self._decisions) > self.cache_size:
+                self._decisions.popitem(last=False)
+        return decision
+
+
+def _log_llm_decision(question: str, decision: bool):
+    from agent.audit import audit_log
+
+    audit_log(
+        LLM_DECISION_NODE,
+        {"question": question},
+        LLM_IN_SCOPE if decision else LLM_OUT_OF_SCOPE,
+        {"in_scope": decision},
+    )
+
+
+_classifier: Optional[ScopeClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_scope_classifier() -> ScopeClassifier:
+    """
+    Process-wide scope classifier, trained on first use (seed examples plus the audit log).
+    Returns:
+        ScopeClassifier: The shared classifier.
+    """
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            valid, invalid = list(VALID_TRAINING_EXAMPLES), list(INVALID_TRAINING_EXAMPLES)
+            if SCOPE_TRAIN_ON_LOGS:
+                logged_valid, logged_invalid = load_logged_examples()
+                valid += logged_valid
+                invalid += logged_invalid
+            _classifier = ScopeClassifier(valid, invalid, on_llm_decision=_log_llm_decision)
+        return _classifier
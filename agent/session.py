@@ -0,0 +1,216 @@
+"""
+Conversational context for follow-up questions within a session.
+After each data answer the agent keeps a compact context of the turn (question, SQL, parsed intent, a
+clipped digest and, for small results, the rows themselves). A follow-up such as "e para mulheres?"
+is answered by merging its filters into the previous intent: when the previous result was grouped by
+the dimension being filtered, the cached rows are re-filtered locally; otherwise the refined SQL is
+rendered without an LLM call. Only follow-ups the intent parser cannot read go to the LLM, with the
+previous question and SQL as context. The context has a fixed size, so prompts do not grow with the
+length of the session, and only the latest context of each session is kept in memory (SessionStore),
+bounded by the number of sessions and evicted when idle.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from agent.config import (
+    INTENT_MIN_CONFIDENCE,
+    SESSION_HISTORY_TURNS,
+    SESSION_MAX_CACHED_ROWS,
+    SESSION_CONTEXT_CHARS,
+    SESSION_MAX_SESSIONS,
+    SESSION_IDLE_SECONDS,
+)
+from agent.database import QueryResult
+from agent.intent_parser import Intent, parse_intent
+from agent.text_utils import normalize_text
+
+# Leading words of a follow-up question (on normalized text): "e para mulheres?", "agora por idade", "só em 2024"
+FOLLOW_UP_CUE = re.compile(r"^(?:e (?:quanto (?:a|ao|aos|as) |sobre )?|agora |so |somente |apenas |mas )")
+
+# Equality filters on a grouping dimension, which can be applied to the rows of a grouped result
+_GROUP_FILTERS = {
+    "sexo": re.compile(r"^CS_SEXO = '(\w)'$"),
+    "ano": re.compile(r"^strftime\('%Y', DT_NOTIFIC\) = '(\d{4})'$"),
+}
+
+
+def is_follow_up(question: str, context: Optional[dict]) -> bool:
+    """True if the session has a previous data answer and the question reads as a continuation of it."""
+    return bool(context) and bool(FOLLOW_UP_CUE.match(normalize_text(question)))
+
+
+def _dimension(condition: str) -> str:
+    """Column a WHERE condition restricts (year conditions are all on the notification year)."""
+    if condition.startswith("strftime('%Y', DT_NOTIFIC)"):
+        return "ano"
+    return condition.split()[0]
+
+
+def parse_follow_up(question: str) -> Optional[Intent]:
+    """
+    Parse the partial intent of a follow-up question.
+    Args:
+        question (str): Follow-up question.
+    Returns:
+        Intent or None: Measure, filters and grouping mentioned in the follow-up, or None if it is not fully understood.
+    """
+    text = FOLLOW_UP_CUE.sub("", normalize_text(question))
+    # "casos" is a count cue: filters-only follow-ups ("e por idade?") still parse, keeping the previous measure
+    intent = parse_intent(f"casos {text}")
+    if intent is None or intent.confidence < INTENT_MIN_CONFIDENCE:
+        return None
+    return intent
+
+
+def merge_intent(previous: dict, follow_up: Intent) -> Intent:
+    """
+    Apply a follow-up to the previous turn's intent: new filters replace filters on the same column,
+    a new measure or grouping replaces the previous one.
+    Args:
+        previous (dict): Intent of the previous turn (as stored in the session context).
+        follow_up (Intent): Partial intent of the follow-up.
+    Returns:
+        Intent: Refined intent.
+    """
+    replaced = {_dimension(c) for c in follow_up.conditions}
+    conditions = [c for c in previous["conditions"] if _dimension(c) not in replaced] + follow_up.conditions
+    return Intent(
+        measure=follow_up.measure if follow_up.measure != "count" else previous["measure"],
+        conditions=conditions,
+        group_by=follow_up.group_by or previous["group_by"],
+        confidence=follow_up.confidence,
+    )
+
+
+def refilter_cached(context: dict, intent: Intent) -> Optional[QueryResult]:
+    """
+    Answer a refined intent from the rows of the previous result, when it only adds an equality filter
+    on the dimension the previous result was grouped by (e.g. "casos por sexo" followed by "e para mulheres?").
+    Args:
+        context (dict): Session context of the previous turn.
+        intent (Intent): Refined intent.
+    Returns:
+        QueryResult or None: Filtered rows, or None when the database has to be queried.
+    """
+    previous, table = context.get("intent"), context.get("table")
+    if not previous or not table:
+        return None
+    group = previous["group_by"]
+    pattern = _GROUP_FILTERS.get(group)
+    if pattern is None or intent.measure != previous["measure"] or intent.group_by != group:
+        return None
+    filters = [c for c in intent.conditions if pattern.match(c)]
+    others = [c for c in intent.conditions if not pattern.match(c)]
+    if len(filters) != 1 or sorted(others) != sorted(previous["conditions"]):
+        return None
+    value = pattern.match(filters[0]).group(1)
+    rows = [tuple(row) for row in table["rows"] if str(row[0]) == value]
+    return QueryResult(columns=list(table["columns"]), rows=rows)
+
+
+def intent_payload(intent: Intent) -> dict:
+    """Part of an Intent kept in the session context."""
+    return {"measure": intent.measure, "conditions": list(intent.conditions), "group_by": intent.group_by}
+
+
+def contextual_question(context: dict, question: str) -> str:
+    """Follow-up question for SQL generation by the LLM, with the previous question and SQL as context."""
+    history = "; ".join(context.get("history", [])[:-1])
+    earlier = f" Perguntas anteriores: {history}." if history else ""
+    return (
+        f"{question} (continuação da pergunta anterior: '{context['question']}', "
+        f"respondida com o SQL: {context['sql_query']}.{earlier})"
+    )
+
+
+def table_payload(result: QueryResult) -> Optional[dict]:
+    """Rows of a small, complete result, kept in the session for local re-filtering."""
+    if result.truncated or len(result.rows) > SESSION_MAX_CACHED_ROWS:
+        return None
+    return {"columns": list(result.columns), "rows": [list(row) for row in result.rows]}
+
+
+def remember_turn(state: dict, previous: Optional[dict]) -> dict:
+    """
+    Compact context of a data answer, replacing the previous turn's.
+    Args:
+        state (dict): Agent state at the end of the turn.
+        previous (dict or None): Context of the previous turn.
+    Returns:
+        dict: {"question", "sql_query", "intent", "digest", "table", "history"}.
+    """
+    intent = state.get("intent")
+    if intent is None:
+        parsed = parse_intent(state["question"])
+        if parsed is not None and parsed.confidence >= INTENT_MIN_CONFIDENCE:
+            intent = intent_payload(parsed)
+    history = ((previous or {}).get("history", []) + [state["question"]])[-SESSION_HISTORY_TURNS:]
+    digest = state.get("sql_digest") or state.get("sql_result") or ""
+    return {
+        "question": state["question"],
+        "sql_query": state.get("sql_query"),
+        "intent": intent,
+        "digest": digest[:SESSION_CONTEXT_CHARS],
+        "table": state.get("sql_table"),
+        "history": history,
+    }
+
+
+class SessionStore:
+    """
+    Latest context of each conversational session, as a thread-safe LRU bounded by the number of sessions.
+    Sessions idle for longer than idle_seconds are evicted.
+    Args:
+        max_sessions (int): Maximum number of sessions kept.
+        idle_seconds (float): Idle time after which a session is forgotten.
+        clock (Callable): Time source (seconds).
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._sessions: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used <= self.idle_seconds:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Context of a session, or None if it has none (or was evicted)."""
+        with self._lock:
+            self._evict(self._clock())
+            entry = self._sessions.get(session_id)
+            return entry[1] if entry is not None else None
+
+    def put(self, session_id: str, context: Optional[dict]):
+        """Replace the context of a session (None forgets it)."""
+        with self._lock:
+            now = self._clock()
+            self._sessions.pop(session_id, None)
+            if context is not None:
+                self._sessions[session_id] = (now, context)
+            self._evict(now)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+session_store = SessionStore()
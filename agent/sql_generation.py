@@ -1,8 +1,10 @@
 """
 Intermediate node for automatic SQL generation via LLM from natural language questions.
 """
-from langchain_openai import ChatOpenAI
+from agent.llm_gateway import get_llm_gateway
 from agent.data_dictionary import get_field_options
+from agent.question_cache import question_cache
+from agent.intent_parser import sql_from_intent
 
 CS_SEXO_OPTIONS = get_field_options("CS_SEXO")
 CS_SEXO_DESC = ", ".join([f"{k}={v}" for k,v in CS_SEXO_OPTIONS.items()]) if CS_SEXO_OPTIONS else "1-Male, 2-Female, 9-Ignored"
@@ -22,12 +24,22 @@ Query SQL: SELECT COUNT(*) FROM srag_cases WHERE CS_SEXO='I';
 def generate_sql_from_question(question: str) -> str:
     """
     Uses an LLM to convert a natural language question into a secure SQL query for the srag_cases table, using real options from the data dictionary.
+    Common question shapes (counts and rates filtered by year, sex or age) are translated by the deterministic
+    intent parser, and previously answered questions (same normalized text, same template with other years/sex/ages, or a near-identical
+    phrasing) are served from the question cache without calling the LLM.
     Args:
         question (str): The natural language question.
     Returns:
         str: A generated SQL query string.
     """
-    llm = ChatOpenAI(temperature=0)
+    parsed = sql_from_intent(question)
+    if parsed is not None:
+        print(f"[SQL GENERATION DEBUG] Intent parser: {parsed}")
+        return parsed
+    cached = question_cache.get(question)
+    if cached is not None:
+        print(f"[SQL GENERATION DEBUG] Cache hit: {cached}")
+        return cached
     prompt = (
         f"""
 Você é um assistente que converte perguntas em português sobre epidemiologia/SRAG em queries SQL para a tabela srag_cases de um banco SQLite.
@@ -40,10 +52,11 @@ Pergunta: {question}
 Query SQL:
 """
     )
-    response = llm.invoke(prompt)
-    if hasattr(response, "content"):
-        response = response.content
+    response = get_llm_gateway().complete(prompt, purpose="sql_generation")
+    sql = response.strip()
     for line in response.splitlines():
         if line.strip().lower().startswith("select"):
-            return line.strip()
-    return response.strip()
+            sql = line.strip()
+            break
+    question_cache.put(question, sql)
+    return sql
@@ -0,0 +1,203 @@
+"""
+Query cost guard for agent-generated SQL.
+Parses the statement into an AST (sqlglot), checks tables and columns against the whitelist and the
+data dictionary, then inspects EXPLAIN QUERY PLAN. Row-returning queries get a LIMIT automatically;
+shapes that can tie up the database (joins, recursive CTEs, correlated subqueries, repeated full
+scans) are rejected before execution.
+"""
+import sqlite3
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+from sqlalchemy.exc import DBAPIError
+
+from agent.config import ALLOWED_TABLES, SQL_MAX_ROWS, SQL_MAX_FULL_SCANS
+from agent.data_dictionary import load_data_dictionary
+from agent.database import get_engine, data_version
+
+
+@dataclass
+class GuardResult:
+    """Outcome of check_sql: whether the query may run, the (possibly rewritten) SQL and why."""
+    allowed: bool
+    sql: str
+    reason: Optional[str] = None
+    warnings: list[str] = field(default_factory=list)
+
+
+@lru_cache(maxsize=None)
+def known_columns() -> frozenset[str]:
+    """Upper-case column names available in srag_cases, taken from the data dictionary."""
+    return frozenset(f["field_name"].upper() for f in load_data_dictionary())
+
+
+def _reject(query: str, reason: str) -> GuardResult:
+    return GuardResult(allowed=False, sql=query, reason=reason)
+
+
+def _is_single_row_aggregate(select: exp.Select) -> bool:
+    """True for SELECTs that always return one row (aggregates without GROUP BY)."""
+    return not select.args.get("group") and any(e.find(exp.AggFunc) for e in select.expressions)
+
+
+def _apply_limit(tree: exp.Expression, max_rows: int, warnings: list[str]) -> exp.Expression:
+    """Add a LIMIT to row-returning queries or clamp an existing LIMIT above max_rows."""
+    if isinstance(tree, exp.Select) and _is_single_row_aggregate(tree):
+        return tree
+    limit = tree.args.get("limit")
+    if limit is None:
+        warnings.append(f"LIMIT {max_rows} adicionado automaticamente")
+        return tree.limit(max_rows, copy=False)
+    value = limit.expression
+    if isinstance(value, exp.Literal) and value.is_int and int(value.this) > max_rows:
+        warnings.append(f"LIMIT reduzido de {value.this} para {max_rows}")
+        limit.set("expression", exp.Literal.number(max_rows))
+    return tree
+
+
+def _quoted_strings_to_literals(tree: exp.Expression, names: set[str], warnings: list[str]):
+    """
+    Turn double-quoted identifiers compared with something into string literals, as SQLite does when
+    they name no column (CS_SEXO = "F" means CS_SEXO = 'F').
+    Args:
+        tree (exp.Expression): Parsed query, modified in place.
+        names (set): Upper-case names of the known columns and aliases.
+        warnings (list): Receives a note for each rewritten identifier.
+    """
+    comparisons = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Like, exp.In)
+    for column in list(tree.find_all(exp.Column)):
+        identifier = column.this
+        if (
+            isinstance(identifier, exp.Identifier)
+            and identifier.quoted
+            and not column.table
+            and identifier.name.upper() not in names
+            and isinstance(column.parent, comparisons)
+        ):
+            column.replace(exp.Literal.string(identifier.name))
+            warnings.append(f'"{identifier.name}" entre aspas duplas tratado como o texto \'{identifier.name}\'')
+
+
+def _scan_names(tree: exp.Expression) -> set[str]:
+    """Names under which the plan reports allowed tables: the table name and every alias given to it."""
+    allowed = {t.lower() for t in ALLOWED_TABLES}
+    names = set(allowed)
+    for table in tree.find_all(exp.Table):
+        if table.name.lower() in allowed:
+            names.add(table.alias_or_name.lower())
+    return names
+
+
+def _check_plan(dbapi_conn, sql: str, scan_names: Optional[set[str]] = None) -> tuple[Optional[str], list[str]]:
+    """
+    Inspect EXPLAIN QUERY PLAN for expensive shapes.
+    Args:
+        scan_names (set[str]): Names of the allowed tables in the plan, aliases included (see _scan_names).
+    Returns:
+        tuple: (rejection reason or None, warnings).
+    """
+    plan = dbapi_conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    allowed = scan_names or {t.lower() for t in ALLOWED_TABLES}
+    scans = {}
+    warnings = []
+    for node_id, parent, _, detail in plan:
+        words = detail.split()
+        if "CORRELATED" in detail:
+            return "subconsulta correlacionada (custo quadrático)", warnings
+        if len(words) >= 2 and words[0] == "SCAN" and words[1].lower() in allowed:
+            scans[node_id] = parent
+            if "USING" not in detail:
+                warnings.append(f"varredura completa de {words[1]}")
+    # A full scan nested under another scan is a nested-loop join of the table with itself
+    for parent in scans.values():
+        if parent in scans:
+            return "varredura aninhada (auto-junção) de srag_cases", warnings
+    if len(scans) > SQL_MAX_FULL_SCANS:
+        return f"{len(scans)} varreduras completas da tabela (máximo: {SQL_MAX_FULL_SCANS})", warnings
+    return None, warnings
+
+
+def check_sql(
+    query: str, dbapi_conn=None, explain: bool = True, max_rows: int = SQL_MAX_ROWS
+) -> GuardResult:
+    """
+    Validate and bound an agent-generated SQL query before execution.
+    Args:
+        query (str): SQL generated for the srag_cases table.
+        dbapi_conn: Optional raw DB-API connection used for EXPLAIN QUERY PLAN (defaults to the shared engine).
+        explain (bool): Whether to inspect the query plan.
+        max_rows (int): LIMIT added to (or enforced on) row-returning queries.
+    Returns:
+        GuardResult: allowed flag, SQL to execute (with LIMIT) and the rejection reason or warnings.
+    """
+    if explain and dbapi_conn is None:
+        return _check_sql_shared(query, data_version(), max_rows)
+    return _check_sql(query, dbapi_conn, explain, max_rows)
+
+
+@lru_cache(maxsize=1024)
+def _check_sql_shared(query: str, version: str, max_rows: int) -> GuardResult:
+    # Checks against the shared engine are memoized per data version, so repeated queries skip EXPLAIN
+    return _check_sql(query, None, True, max_rows)
+
+
+def _check_sql(query: str, dbapi_conn, explain: bool, max_rows: int) -> GuardResult:
+    try:
+        statements = [s for s in sqlglot.parse(query, read="sqlite") if s is not None]
+    except ParseError as e:
+        return _reject(query, f"SQL inválido: {str(e).splitlines()[0]}")
+    if len(statements) != 1:
+        return _reject(query, "apenas uma instrução SQL por consulta é permitida")
+    tree = statements[0]
+    if not isinstance(tree, (exp.Select, exp.Union)):
+        return _reject(query, "apenas consultas SELECT são permitidas")
+    if tree.find(exp.Insert, exp.Update, exp.Delete, exp.Drop, exp.Create, exp.Command):
+        return _reject(query, "comandos de escrita não são permitidos")
+
+    with_ = tree.args.get("with_") or tree.args.get("with")
+    if with_ is not None and with_.args.get("recursive"):
+        return _reject(query, "CTEs recursivas não são permitidas")
+    if tree.find(exp.Join):
+        return _reject(query, "junções (JOIN ou produto cartesiano) de srag_cases não são permitidas")
+
+    ctes = {c.alias_or_name.lower() for c in tree.find_all(exp.CTE)}
+    allowed_tables = {t.lower() for t in ALLOWED_TABLES}
+    tables = {t.name.lower() for t in tree.find_all(exp.Table)} - ctes
+    if not tables:
+        return _reject(query, f"a consulta deve usar uma tabela permitida: {ALLOWED_TABLES}")
+    if tables - allowed_tables:
+        return _reject(query, f"tabelas não permitidas: {sorted(tables - allowed_tables)}")
+
+    # Output aliases (e.g. ORDER BY total) and CTE/subquery columns are valid references too
+    aliases = {a.alias.upper() for a in tree.find_all(exp.Alias)}
+    aliases |= {c.name.upper() for t in tree.find_all(exp.TableAlias) for c in t.columns}
+    warnings: list[str] = []
+    _quoted_strings_to_literals(tree, known_columns() | aliases, warnings)
+    unknown = {c.name.upper() for c in tree.find_all(exp.Column)} - known_columns() - aliases
+    if unknown:
+        return _reject(
+            query,
+            f"colunas inexistentes no dicionário de dados: {sorted(unknown)} "
+            "(valores de texto devem usar aspas simples)",
+        )
+
+    tree = _apply_limit(tree, max_rows, warnings)
+    sql = tree.sql(dialect="sqlite")
+    if explain:
+        scan_names = _scan_names(tree)
+        try:
+            if dbapi_conn is None:
+                with get_engine().connect() as conn:
+                    reason, plan_warnings = _check_plan(conn.connection.driver_connection, sql, scan_names)
+            else:
+                reason, plan_warnings = _check_plan(dbapi_conn, sql, scan_names)
+        except (sqlite3.Error, DBAPIError) as e:
+            return _reject(query, f"não foi possível planejar a consulta: {e}")
+        if reason:
+            return _reject(query, reason)
+        warnings.extend(plan_warnings)
+    return GuardResult(allowed=True, sql=sql, warnings=warnings)
@@ -0,0 +1,309 @@
+"""
+SQL profiler for the shared read engine and the agent SQL tool.
+Queries run through the engine (metrics/queries.py, dashboard, executive summary) are timed by
+SQLAlchemy cursor events; the DB-API cursor is wrapped so the measurement covers fetching and
+counts the rows returned. Agent queries, which run on raw connections or in worker processes, are
+recorded by SQLQueryTool from their QueryResult. Every query is aggregated by its fingerprint
+(literals replaced by '?'); queries slower than SQL_SLOW_QUERY_MS get their EXPLAIN QUERY PLAN
+(once per fingerprint) and a line in the slow-query log.
+"""
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from agent.config import (
+    SQL_PROFILER_ENABLED,
+    SQL_SLOW_QUERY_MS,
+    SQL_SLOW_QUERY_LOG,
+    SQL_PROFILER_MAX_FINGERPRINTS,
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalized form of a query for aggregation: literals replaced by '?', IN lists collapsed, whitespace collapsed.
+    Args:
+        sql (str): SQL text.
+    Returns:
+        str: Query fingerprint.
+    """
+    text = _STRING.sub("?", sql)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("(?)", text)
+    return _SPACES.sub(" ", text).strip().rstrip(";").strip()
+
+
+@dataclass
+class QueryStats:
+    """Aggregated timings of one query fingerprint."""
+    fingerprint: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    slow: int = 0
+    sources: list[str] = field(default_factory=list)
+    sample_sql: str = ""
+    plan: Optional[list[str]] = None
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class SQLProfiler:
+    """In-process aggregation of query timings with a slow-query log."""
+
+    def __init__(
+        self,
+        slow_ms: float = SQL_SLOW_QUERY_MS,
+        log_path: Optional[str] = SQL_SLOW_QUERY_LOG,
+        max_fingerprints: int = SQL_PROFILER_MAX_FINGERPRINTS,
+        enabled: bool = SQL_PROFILER_ENABLED,
+    ):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.max_fingerprints = max_fingerprints
+        self.enabled = enabled
+        self.stats: dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        sql: str,
+        duration_ms: float,
+        rows: Optional[int],
+        source: str,
+        explain: Optional[Callable[[], list[str]]] = None,
+        log: bool = True,
+    ):
+        """
+        Add one execution to the aggregates; slow executions are explained and logged.
+        Args:
+            sql (str): Executed SQL.
+            duration_ms (float): Execution time including fetching.
+            rows (int, optional): Rows returned.
+            source (str): Where the query came from ('engine', 'agent').
+            explain (callable, optional): Returns the EXPLAIN QUERY PLAN lines of the query.
+            log (bool): Write slow executions to the slow-query log.
+        """
+        if not self.enabled:
+            return
+        key = fingerprint(sql)
+        slow = duration_ms >= self.slow_ms
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                if len(self.stats) >= self.max_fingerprints:
+                    # Forget the cheapest fingerprint to stay bounded
+                    del self.stats[min(self.stats.values(), key=lambda s: s.total_ms).fingerprint]
+                stats = self.stats[key] = QueryStats(key, sample_sql=sql)
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.rows += rows or 0
+            stats.slow += slow
+            if source not in stats.sources:
+                stats.sources.append(source)
+            needs_plan = slow and stats.plan is None and explain is not None
+        if not slow or not log:
+            return
+        if needs_plan:
+            try:
+                plan = explain()
+            except Exception as e:
+                plan = [f"EXPLAIN falhou: {e}"]
+            with self._lock:
+                stats.plan = plan
+        self._log_slow(sql, key, duration_ms, rows, source, stats.plan)
+
+    def _log_slow(self, sql: str, key: str, duration_ms: float, rows: Optional[int], source: str, plan):
+        if not self.log_path:
+            return
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "source": source,
+            "duration_ms": round(duration_ms, 3),
+            "rows": rows,
+            "fingerprint": key,
+            "sql": sql,
+            "plan": plan,
+        }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[SQL PROFILER DEBUG] Falha ao gravar slow query log: {e}")
+
+    def top(self, n: int = 10, by: str = "total_ms") -> list[QueryStats]:
+        """
+        Most expensive fingerprints.
+        Args:
+            n (int): Number of fingerprints.
+            by (str): 'total_ms', 'mean_ms', 'max_ms' or 'count'.
+        Returns:
+            list[QueryStats]: Fingerprints ordered by the chosen measure, highest first.
+        """
+        with self._lock:
+            stats = list(self.stats.values())
+        return sorted(stats, key=lambda s: getattr(s, by), reverse=True)[:n]
+
+    def report(self, n: int = 10, by: str = "total_ms") -> str:
+        """Text report of the top-n fingerprints with their plans."""
+        lines = [f"Top {n} consultas por {by}:"]
+        for i, s in enumerate(self.top(n, by), 1):
+            lines.append(
+                f"{i}. {s.count}x | total {s.total_ms:.1f} ms | média {s.mean_ms:.1f} ms | máx {s.max_ms:.1f} ms | "
+                f"linhas {s.rows} | lentas {s.slow} | {', '.join(s.sources)}"
+            )
+            lines.append(f"   {s.fingerprint}")
+            for step in s.plan or []:
+                lines.append(f"   plano: {step}")
+        return "\n".join(lines)
+
+    def snapshot(self) -> list[dict]:
+        """Aggregates as dictionaries (for export)."""
+        return [{**asdict(s), "mean_ms": s.mean_ms} for s in self.top(len(self.stats))]
+
+    def load_log(self, path: Optional[str] = None) -> int:
+        """
+        Aggregate the entries of a slow-query log (e.g. written by other processes).
+        Args:
+            path (str, optional): Log path (defaults to this profiler's log).
+        Returns:
+            int: Entries read.
+        """
+        path = path or self.log_path
+        count = 0
+        if not path or not os.path.exists(path):
+            return count
+        plans = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("plan"):
+                    plans[entry["fingerprint"]] = entry["plan"]
+                self.record(entry["sql"], entry["duration_ms"], entry.get("rows"), entry.get("source", "log"), log=False)
+                count += 1
+        for key, plan in plans.items():
+            if key in self.stats:
+                self.stats[key].plan = plan
+        return count
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+sql_profiler = SQLProfiler()
+
+
+def explain_plan(dbapi_conn, sql: str, params: Any = ()) -> list[str]:
+    """EXPLAIN QUERY PLAN lines of a query on a DB-API SQLite connection."""
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def explain_on_engine(engine: Engine, sql: str) -> list[str]:
+    """EXPLAIN QUERY PLAN lines of a query on a pooled connection of the engine (bypassing the profiler)."""
+    conn = engine.raw_connection()
+    try:
+        return explain_plan(conn.driver_connection, sql)
+    finally:
+        conn.close()
+
+
+class _ProfiledCursor:
+    """DB-API cursor proxy counting fetched rows; the execution is recorded when the cursor is closed."""
+
+    def __init__(self, cursor, sql: str, params: Any, start: float, profiler: SQLProfiler):
+        self._cursor = cursor
+        self._sql = sql
+        self._params = params
+        self._start = start
+        self._profiler = profiler
+        self._rows = 0
+        self._recorded = False
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._rows += row is not None
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        if not self._recorded:
+            self._recorded = True
+            conn = self._cursor.connection
+            self._profiler.record(
+                self._sql,
+                (time.perf_counter() - self._start) * 1000,
+                self._rows,
+                "engine",
+                explain=lambda: explain_plan(conn, self._sql, self._params),
+            )
+        self._cursor.close()
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def install_profiler(engine: Engine, profiler: SQLProfiler = sql_profiler) -> Engine:
+    """
+    Time every SELECT executed through an engine (execution and fetching) with the profiler.
+    Args:
+        engine (Engine): SQLAlchemy engine.
+        profiler (SQLProfiler): Profiler receiving the executions.
+    Returns:
+        Engine: The same engine.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiler_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_profiler_start", None)
+        if start is None or not profiler.enabled or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        # The result is built from context.cursor after this event, so fetches go through the proxy
+        context.cursor = _ProfiledCursor(cursor, statement, parameters, start, profiler)
+
+    return engine
@@ -0,0 +1,182 @@
+"""
+Isolated worker-process pool for agent-generated SQL.
+Each worker keeps a warm read-only SQLite connection and runs one query at a time under a CPU-time
+limit (RLIMIT_CPU) and a memory limit (SQLite hard_heap_limit). Results travel back to the web
+process in columnar form, so a heavy query can never stall or crash the Streamlit process.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import resource
+import signal
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from agent.config import (
+    DB_PATH,
+    SQL_WORKER_PROCESSES,
+    SQL_WORKER_CPU_SECONDS,
+    SQL_WORKER_MEMORY_MB,
+    SQL_TIMEOUT_SECONDS,
+)
+from agent.database import QueryResult, execute_bounded, apply_read_pragmas
+
+# Extra time the web process waits for a worker beyond the query deadline before giving up
+RESULT_GRACE_SECONDS = 5.0
+
+
+class QueryResourceLimitError(RuntimeError):
+    """Raised when a query exceeds the worker CPU-time or memory limit."""
+
+
+# ---- Worker process side ----
+_worker_conn: Optional[sqlite3.Connection] = None
+_cpu_exceeded = False
+
+
+def _on_cpu_limit(signum, frame):
+    # SIGXCPU: flag it, the progress handler of the running query aborts it
+    global _cpu_exceeded
+    _cpu_exceeded = True
+
+
+def _init_worker(db_path: str, memory_mb: int):
+    """Open the warm read-only connection and install the CPU-limit handler (runs once per worker)."""
+    global _worker_conn
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    # Ctrl+C in the web process must not leave half-dead workers behind
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_conn = sqlite3.connect(
+        f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, check_same_thread=False
+    )
+    apply_read_pragmas(_worker_conn, None)
+    if memory_mb:
+        _worker_conn.execute(f"PRAGMA hard_heap_limit={memory_mb * 1024 * 1024}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_query(query: str, cpu_seconds: int, timeout: float) -> dict:
+    """Execute a query in the worker under the CPU limit and return its columnar payload."""
+    global _cpu_exceeded
+    _cpu_exceeded = False
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        result = execute_bounded(
+            _worker_conn, query, timeout=timeout, interrupt=lambda: _cpu_exceeded
+        )
+    except TimeoutError:
+        if _cpu_exceeded:
+            raise QueryResourceLimitError(f"Query exceeded the {cpu_seconds}s CPU time limit")
+        raise
+    except (MemoryError, sqlite3.OperationalError) as e:
+        if isinstance(e, MemoryError) or "out of memory" in str(e):
+            raise QueryResourceLimitError("Query exceeded the worker memory limit") from None
+        raise
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    if _cpu_exceeded and result.truncation_reason == "deadline":
+        result.truncation_reason = "cpu_time"
+    return result.to_columnar()
+
+
+# ---- Web process side ----
+class SQLWorkerPool:
+    """
+    Pre-forked pool of SQL worker processes.
+    Args:
+        db_path (str): SQLite database opened read-only by every worker.
+        processes (int): Number of worker processes.
+        cpu_seconds (int): Per-query CPU time limit.
+        memory_mb (int): Per-query SQLite heap limit.
+        timeout (float): Per-query wall-clock deadline.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        processes: int = SQL_WORKER_PROCESSES,
+        cpu_seconds: int = SQL_WORKER_CPU_SECONDS,
+        memory_mb: int = SQL_WORKER_MEMORY_MB,
+        timeout: float = SQL_TIMEOUT_SECONDS,
+    ):
+        self.db_path = db_path
+        self.processes = max(1, processes)
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = self._start()
+
+    def _start(self) -> ProcessPoolExecutor:
+        # forkserver: workers are forked from a clean server process, never from the threaded web process
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context(method),
+            initializer=_init_worker,
+            initargs=(self.db_path, self.memory_mb),
+        )
+        # Warm up: start every worker (and its connection) before the first real query
+        for future in [executor.submit(_ping) for _ in range(self.processes)]:
+            future.result()
+        return executor
+
+    def _submit(self, query: str):
+        with self._lock:
+            try:
+                return self._executor.submit(_run_query, query, self.cpu_seconds, self.timeout)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OS); replace the whole pool
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._start()
+                return self._executor.submit(_run_query, query, self.cpu_seconds, self.timeout)
+
+    def execute(self, query: str) -> QueryResult:
+        """
+        Run a query in a worker process and wait for its result.
+        Args:
+            query (str): SQL query to execute.
+        Returns:
+            QueryResult: Bounded query result.
+        """
+        future = self._submit(query)
+        return QueryResult.from_columnar(future.result(timeout=self.timeout + RESULT_GRACE_SECONDS))
+
+    async def aexecute(self, query: str) -> QueryResult:
+        """Async version of execute: awaits the worker without occupying a thread."""
+        future = asyncio.wrap_future(self._submit(query))
+        payload = await asyncio.wait_for(future, timeout=self.timeout + RESULT_GRACE_SECONDS)
+        return QueryResult.from_columnar(payload)
+
+    def shutdown(self):
+        """Stop every worker process."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[SQLWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sql_worker_pool() -> SQLWorkerPool:
+    """
+    Process-wide SQL worker pool, started on first use.
+    Returns:
+        SQLWorkerPool: The shared pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SQLWorkerPool()
+        return _pool
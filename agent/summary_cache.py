@@ -0,0 +1,208 @@
+"""
+Cached executive summary.
+The summary is stored as an artifact keyed by the database version plus a digest of the news it was
+written from, in memory and on disk. Page loads read the stored text; when the data or the news
+change, one background generation refreshes it while readers keep the previous text. Generations
+are single-flight: concurrent readers of a key that is being generated wait for that generation
+(or follow its stream) instead of starting another LLM call.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from agent.config import EXECUTIVE_SUMMARY_PATH
+from agent.database import data_version
+from agent.llm_gateway import Priority
+
+
+@dataclass
+class SummaryArtifact:
+    """A generated executive summary and the inputs it was generated from."""
+    key: str
+    text: str
+    data_version: str
+    news_digest: str
+    generated_at: str
+
+
+def news_digest(noticias: list) -> str:
+    """Digest of the news items used in the summary prompt (the first three)."""
+    payload = json.dumps(noticias[:3], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _generate(noticias: list, priority: int) -> str:
+    from agent.database import get_engine
+    from report.agent_summary import generate_agent_summary
+
+    with get_engine().connect() as conn:
+        return generate_agent_summary(conn, noticias, priority=priority)
+
+
+def _stream(noticias: list, priority: int) -> Iterator[str]:
+    from agent.database import get_engine
+    from report.agent_summary import stream_agent_summary
+
+    with get_engine().connect() as conn:
+        yield from stream_agent_summary(conn, noticias, priority=priority)
+
+
+class SummaryCache:
+    """Executive summary artifact with background, single-flight regeneration."""
+
+    def __init__(
+        self,
+        path: Optional[str] = EXECUTIVE_SUMMARY_PATH,
+        generate: Callable[[list, int], str] = _generate,
+        stream: Callable[[list, int], Iterator[str]] = _stream,
+        version: Callable[[], str] = data_version,
+    ):
+        self.path = path
+        self._generate = generate
+        self._stream = stream
+        self._version = version
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-refresh")
+        self.generations = 0
+        self._artifact = self._load()
+
+    def key(self, noticias: list) -> str:
+        """Cache key of the summary for the current data version and these news."""
+        return f"{self._version()}:{news_digest(noticias)}"
+
+    def latest(self) -> Optional[SummaryArtifact]:
+        """Last generated summary, whatever data and news it was generated from (no news needed to read it)."""
+        return self._artifact
+
+    def peek(self, noticias: list) -> tuple[Optional[SummaryArtifact], bool]:
+        """
+        Latest stored summary and whether it is current, without starting any generation.
+        Args:
+            noticias (list): Current news items.
+        Returns:
+            tuple: (artifact or None if nothing was ever generated, True if it matches the current data and news).
+        """
+        artifact = self._artifact
+        return artifact, artifact is not None and artifact.key == self.key(noticias)
+
+    def get(self, noticias: list) -> tuple[Optional[SummaryArtifact], bool]:
+        """
+        Latest stored summary, without waiting; a refresh is started in the background when it is stale.
+        Callers that stream the first generation themselves should use peek, so the generation is not
+        already taken by a background refresh.
+        Args:
+            noticias (list): Current news items.
+        Returns:
+            tuple: (artifact or None if nothing was ever generated, True if it matches the current data and news).
+        """
+        artifact, fresh = self.peek(noticias)
+        if not fresh:
+            self.refresh(noticias)
+        return artifact, fresh
+
+    def refresh(self, noticias: list, priority: int = Priority.DASHBOARD) -> Future:
+        """
+        Generate the summary for the current key in the background, unless it is stored or already being generated.
+        Returns:
+            Future: Resolves to the SummaryArtifact.
+        """
+        key = self.key(noticias)
+        with self._lock:
+            if self._artifact is not None and self._artifact.key == key:
+                done = Future()
+                done.set_result(self._artifact)
+                return done
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._inflight[key] = Future()
+        self._executor.submit(self._run, key, future, noticias, priority)
+        return future
+
+    def wait(self, noticias: list, timeout: Optional[float] = None) -> SummaryArtifact:
+        """Current summary, waiting for its (shared) generation if needed."""
+        return self.refresh(noticias).result(timeout)
+
+    def stream(self, noticias: list, priority: int = Priority.INTERACTIVE) -> Iterator[str]:
+        """
+        Current summary as a stream: the stored text at once, the text of a generation already in
+        flight when it finishes, or, when nobody is generating it, a new generation streamed token
+        by token (and stored when complete).
+        Yields:
+            str: Summary text fragments.
+        """
+        key = self.key(noticias)
+        with self._lock:
+            artifact = self._artifact if self._artifact is not None and self._artifact.key == key else None
+            future = self._inflight.get(key)
+            leader = artifact is None and future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if artifact is not None:
+            yield artifact.text
+            return
+        if not leader:
+            yield future.result().text
+            return
+        parts = []
+        try:
+            for token in self._stream(noticias, priority):
+                parts.append(token)
+                yield token
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, text="".join(parts))
+
+    def _run(self, key: str, future: Future, noticias: list, priority: int):
+        try:
+            text = self._generate(noticias, priority)
+        except Exception as e:
+            print(f"[SUMMARY CACHE DEBUG] Falha ao gerar resumo executivo: {e}")
+            self._finish(key, future, error=e)
+            return
+        self._finish(key, future, text=text)
+
+    def _finish(self, key: str, future: Future, text: Optional[str] = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None:
+                version, digest = key.split(":", 1)
+                artifact = SummaryArtifact(key, text, version, digest, datetime.now().isoformat(timespec="seconds"))
+                self._artifact = artifact
+                self.generations += 1
+        if error is not None:
+            future.set_exception(error)
+            return
+        self._save(artifact)
+        future.set_result(artifact)
+
+    def _load(self) -> Optional[SummaryArtifact]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return SummaryArtifact(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _save(self, artifact: SummaryArtifact):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(asdict(artifact), f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[SUMMARY CACHE DEBUG] Falha ao salvar resumo executivo: {e}")
+
+
+summary_cache = SummaryCache()
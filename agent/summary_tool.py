@@ -2,33 +2,46 @@
 SummaryTool: LangChain Tool to generate an executive epidemiological summary using metrics, data, and news.
 """
 from langchain_core.tools import Tool
-from report.agent_summary import generate_agent_summary
-from sqlalchemy import create_engine
+from typing import Iterator
+
+from agent.llm_gateway import Priority
+from agent.summary_cache import summary_cache
+
+def _load_news_list() -> list:
+    # For the tool, fetch news within the summary itself
+    from agent.news_tool import news_query_tool_run
+    noticias_raw = news_query_tool_run("")
+    import json
+    if isinstance(noticias_raw, str):
+        try:
+            noticias_list = json.loads(noticias_raw)
+            if not isinstance(noticias_list, list):
+                noticias_list = [noticias_raw]
+        except Exception:
+            noticias_list = [noticias_raw]
+    else:
+        noticias_list = noticias_raw
+    return noticias_list
 
-from agent.config import DB_PATH
-ENGINE = create_engine(f"sqlite:///{DB_PATH}")
 
 def summary_tool_run(_: str = "") -> str:
     """
     Executes the agent's executive summary using the database and current news.
+    The cached summary is returned when it matches the current data and news (see agent/summary_cache.py).
     Returns:
         str: The generated summary string.
     """
-    with ENGINE.connect() as conn:
-        # For the tool, fetch news within the summary itself
-        from agent.news_tool import news_query_tool_run
-        noticias_raw = news_query_tool_run("")
-        import json
-        if isinstance(noticias_raw, str):
-            try:
-                noticias_list = json.loads(noticias_raw)
-                if not isinstance(noticias_list, list):
-                    noticias_list = [noticias_raw]
-            except Exception:
-                noticias_list = [noticias_raw]
-        else:
-            noticias_list = noticias_raw
-        return generate_agent_summary(conn, noticias_list)
+    # Requested by a user question through the agent, so it is interactive
+    return "".join(summary_cache.stream(_load_news_list(), priority=Priority.INTERACTIVE))
+
+
+def summary_tool_stream() -> Iterator[str]:
+    """
+    Streaming version of summary_tool_run: yields the cached summary at once, or streams it as it is generated.
+    Yields:
+        str: Summary text fragments.
+    """
+    yield from summary_cache.stream(_load_news_list(), priority=Priority.INTERACTIVE)
 
 summary_tool = Tool.from_function(
     summary_tool_run,
@@ -0,0 +1,39 @@
+"""
+Text normalization helpers shared by the question caches and the local question classifiers.
+"""
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^a-z0-9{}_ ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def strip_accents(text: str) -> str:
+    """Remove diacritics (e.g. 'notificação' -> 'notificacao')."""
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lower-case, accent-free text with punctuation removed and whitespace collapsed.
+    Args:
+        text (str): Raw question.
+    Returns:
+        str: Normalized text.
+    """
+    text = strip_accents(text.lower())
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def char_ngrams(text: str, n: int = 3) -> set[str]:
+    """
+    Set of character n-grams of a (normalized) text, padded with spaces at the edges.
+    Args:
+        text (str): Input text.
+        n (int): N-gram size.
+    Returns:
+        set: Character n-grams.
+    """
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
@@ -0,0 +1,294 @@
+"""
+Lightweight tracing for the agent: spans for graph nodes, LLM calls, SQL executions and news searches.
+Each finished span is added to an in-process latency histogram per (kind, name), from which p50/p95/p99
+are read; the histograms and the most recent spans can be exported to a JSON file or scraped in the
+Prometheus text format from a local metrics endpoint. Spans nest through a context variable, so the
+spans of one agent run share a trace id. When tracing is off, span() returns a shared no-op context
+and record() returns immediately.
+"""
+import atexit
+import bisect
+import inspect
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+from agent.config import TRACING_ENABLED, TRACE_MAX_SPANS, TRACE_EXPORT_PATH, TRACE_METRICS_PORT
+
+# Upper bounds (ms) of the histogram buckets exported to Prometheus
+PROMETHEUS_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("agent_trace_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed operation; attributes hold token counts, row counts and other details."""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration_ms: float = 0.0
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+
+class _NoopContext:
+    def __enter__(self):
+        return _NOOP_SPAN
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = _NoopContext()
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram: bucket i holds durations up to MIN_MS * BASE**i, so percentiles
+    are read with a relative error below BASE - 1 (about 19%) in constant memory.
+    """
+    BASE = 2 ** 0.25
+    MIN_MS = 0.01
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.prometheus = [0] * (len(PROMETHEUS_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        index = 0 if ms <= self.MIN_MS else math.ceil(math.log(ms / self.MIN_MS, self.BASE))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.prometheus[bisect.bisect_left(PROMETHEUS_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-quantile (0 < q <= 1) in milliseconds."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(self.MIN_MS * self.BASE ** index, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class _SpanContext:
+    def __init__(self, tracer: "Tracer", name: str, kind: str, attributes: dict):
+        self.tracer = tracer
+        parent = _current_span.get()
+        self.span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        self._t0 = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration_ms = (time.perf_counter() - self._t0) * 1000
+        if exc is not None:
+            self.span.error = f"{type(exc).__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer.finish(self.span)
+        return False
+
+
+class Tracer:
+    """Collects finished spans into per-(kind, name) histograms and a bounded buffer of recent spans."""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, max_spans: int = TRACE_MAX_SPANS):
+        self.enabled = enabled
+        self.histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self.spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, kind: str, **attributes):
+        """
+        Context manager timing an operation as a child of the current span.
+        Args:
+            name (str): Operation name (node name, LLM purpose, tool name).
+            kind (str): Operation kind ('request', 'node', 'llm', 'sql', 'news').
+            **attributes: Initial span attributes.
+        Returns:
+            Context manager yielding the Span (a no-op object when tracing is off).
+        """
+        if not self.enabled:
+            return _NOOP_CONTEXT
+        return _SpanContext(self, name, kind, attributes)
+
+    def record(self, name: str, kind: str, duration_ms: float, **attributes):
+        """Record an operation already timed by the caller (e.g. an LLM call measured by the gateway)."""
+        if not self.enabled:
+            return
+        parent = _current_span.get()
+        self.finish(Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start=time.time() - duration_ms / 1000,
+            duration_ms=duration_ms,
+            attributes=attributes,
+        ))
+
+    def finish(self, span: Span):
+        with self._lock:
+            histogram = self.histograms.get((span.kind, span.name))
+            if histogram is None:
+                histogram = self.histograms[(span.kind, span.name)] = LatencyHistogram()
+            histogram.observe(span.duration_ms)
+            self.spans.append(span)
+
+    def summary(self) -> dict:
+        """Latency summary per 'kind:name' (count, mean, p50, p95, p99, max)."""
+        with self._lock:
+            return {f"{kind}:{name}": h.summary() for (kind, name), h in sorted(self.histograms.items())}
+
+    def recent_spans(self, trace_id: Optional[str] = None) -> list[dict]:
+        """Buffered spans, optionally of a single trace."""
+        with self._lock:
+            spans = list(self.spans)
+        return [asdict(s) for s in spans if trace_id is None or s.trace_id == trace_id]
+
+    def export(self, path: str = TRACE_EXPORT_PATH):
+        """Write the latency summary and the buffered spans to a JSON file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            "generated_at": datetime.now().isoformat(),
+            "latency": self.summary(),
+            "spans": self.recent_spans(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+
+    def prometheus_text(self) -> str:
+        """Histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP agent_span_duration_ms Duration of agent spans in milliseconds",
+            "# TYPE agent_span_duration_ms histogram",
+        ]
+        with self._lock:
+            items = sorted(self.histograms.items())
+            for (kind, name), h in items:
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for bound, n in zip(PROMETHEUS_BUCKETS_MS + ["+Inf"], h.prometheus):
+                    cumulative += n
+                    lines.append(f'agent_span_duration_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"agent_span_duration_ms_sum{{{labels}}} {h.total_ms:.3f}")
+                lines.append(f"agent_span_duration_ms_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.spans.clear()
+
+
+tracer = Tracer()
+
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    """Wrap a LangGraph node function (sync or async) in a 'node' span."""
+    if inspect.iscoroutinefunction(fn):
+
+        @wraps(fn)
+        async def async_wrapper(state, **kwargs):
+            with tracer.span(name, "node"):
+                return await fn(state, **kwargs)
+
+        return async_wrapper
+
+    @wraps(fn)
+    def wrapper(state, **kwargs):
+        with tracer.span(name, "node"):
+            return fn(state, **kwargs)
+
+    return wrapper
+
+
+def start_metrics_server(port: int = TRACE_METRICS_PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve the histograms on http://host:port/metrics (Prometheus) and /latency (JSON summary).
+    Args:
+        port (int): TCP port (0 picks a free one).
+        host (str): Bind address.
+    Returns:
+        ThreadingHTTPServer: The running server (serving on a daemon thread).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = tracer.prometheus_text(), "text/plain; version=0.0.4"
+            elif self.path == "/latency":
+                body, content_type = json.dumps(tracer.summary()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="trace-metrics", daemon=True).start()
+    return server
+
+
+if TRACING_ENABLED:
+    atexit.register(tracer.export, TRACE_EXPORT_PATH)
+    if TRACE_METRICS_PORT:
+        start_metrics_server(TRACE_METRICS_PORT)
@@ -0,0 +1,189 @@
+"""
+Vectorized outbreak-alert detection for SRAG cases across all municipalities.
+Builds a municipality x day case matrix from a single grouped query and runs
+EARS (C1, C2, C3) and CUSUM detectors on every municipality at once.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.engine import Connection
+
+from metrics import queries
+
+# EARS baseline window (days) and guard band between baseline and current day for C2/C3
+BASELINE_DAYS = 7
+GUARD_DAYS = 2
+# Alert thresholds (EARS defaults from CDC, CUSUM reference value k and decision interval h)
+EARS_THRESHOLD = 3.0
+C3_THRESHOLD = 2.0
+CUSUM_K = 0.5
+CUSUM_H = 4.0
+# Floor for the baseline standard deviation, avoids infinite scores on flat (all-zero) series
+MIN_SIGMA = 0.5
+# Minimum observed cases in a day for a municipality to raise an alert
+MIN_CASES = 3
+
+ALERT_COLUMNS = [
+    "municipio", "data", "casos", "esperado",
+    "ears_c1", "ears_c2", "ears_c3", "cusum", "detectores", "escore",
+]
+
+
+def build_case_matrix(
+    df: pd.DataFrame, end_date: Optional[pd.Timestamp] = None, days: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Pivot long daily counts into a dense municipality x day matrix (days without cases are 0).
+    Args:
+        df: DataFrame with columns ['municipio', 'data', 'casos'].
+        end_date: Last day of the matrix (defaults to the last day present in df).
+        days: Number of days (columns) in the matrix (defaults to the span of df).
+    Returns:
+        DataFrame indexed by municipality with one float column per calendar day.
+    """
+    if df.empty:
+        return pd.DataFrame(dtype=float)
+    dates = pd.to_datetime(df["data"])
+    end = pd.Timestamp(end_date) if end_date is not None else dates.max()
+    start = end - pd.Timedelta(days=days - 1) if days else dates.min()
+    calendar = pd.date_range(start, end, freq="D")
+    matrix = (
+        df.assign(data=dates)
+        .pivot_table(index="municipio", columns="data", values="casos", aggfunc="sum", fill_value=0)
+        .reindex(columns=calendar, fill_value=0)
+    )
+    return matrix.astype(float)
+
+
+def _baseline_stats(counts: np.ndarray, lag: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and (floored) standard deviation of the BASELINE_DAYS window that ends `lag` days before each day.
+    Days without enough history are NaN.
+    """
+    n, t = counts.shape
+    mean = np.full((n, t), np.nan)
+    std = np.full((n, t), np.nan)
+    offset = BASELINE_DAYS + lag
+    if t > offset:
+        # Window j covers days j..j+BASELINE_DAYS-1, which is the baseline of day j+offset
+        windows = sliding_window_view(counts, BASELINE_DAYS, axis=1)[:, : t - offset]
+        mean[:, offset:] = windows.mean(axis=2)
+        std[:, offset:] = windows.std(axis=2, ddof=1)
+    return mean, np.maximum(std, MIN_SIGMA)
+
+
+def run_detectors(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Run EARS C1/C2/C3 and a one-sided CUSUM on every row (municipality) of a case matrix at once.
+    Args:
+        counts: Array of shape (municipalities, days) with daily case counts.
+    Returns:
+        dict with arrays of the same shape: 'esperado' (C1 baseline mean), 'ears_c1', 'ears_c2', 'ears_c3', 'cusum'.
+        Statistics are NaN on days without enough history.
+    """
+    counts = np.asarray(counts, dtype=float)
+    n, t = counts.shape
+    mean1, std1 = _baseline_stats(counts, lag=0)
+    mean2, std2 = _baseline_stats(counts, lag=GUARD_DAYS)
+    c1 = (counts - mean1) / std1
+    c2 = (counts - mean2) / std2
+    # C3: sum of the C2 excesses over 1 in the current and two previous days
+    excess = np.clip(c2 - 1.0, 0.0, None)
+    c3 = np.full((n, t), np.nan)
+    if t >= 3:
+        c3[:, 2:] = sliding_window_view(excess, 3, axis=1).sum(axis=2)
+    # CUSUM on the C1 standardized residuals; the recursion runs over days, vectorized over municipalities
+    z = np.nan_to_num(c1, nan=0.0)
+    cusum = np.zeros((n, t))
+    s = np.zeros(n)
+    for i in range(t):
+        s = np.maximum(0.0, s + z[:, i] - CUSUM_K)
+        cusum[:, i] = s
+    cusum[np.isnan(c1)] = np.nan
+    return {"esperado": mean1, "ears_c1": c1, "ears_c2": c2, "ears_c3": c3, "cusum": cusum}
+
+
+def rank_alerts(
+    matrix: pd.DataFrame, eval_days: int = 1, min_cases: int = MIN_CASES, top: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Build the ranked alert table from a municipality x day case matrix.
+    Only the last `eval_days` columns are evaluated; each municipality appears at most once (its highest score).
+    Args:
+        matrix: Output of build_case_matrix.
+        eval_days: Number of most recent days to evaluate.
+        min_cases: Minimum cases in the day for an alert to be raised.
+        top: Optional maximum number of alerts to return.
+    Returns:
+        DataFrame with ALERT_COLUMNS, sorted by 'escore' (descending).
+    """
+    if matrix.empty:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    counts = matrix.to_numpy()
+    stats = {k: v[:, -eval_days:] for k, v in run_detectors(counts).items()}
+    window = counts[:, -eval_days:]
+    flags = {
+        "C1": stats["ears_c1"] > EARS_THRESHOLD,
+        "C2": stats["ears_c2"] > EARS_THRESHOLD,
+        "C3": stats["ears_c3"] > C3_THRESHOLD,
+        "CUSUM": stats["cusum"] > CUSUM_H,
+    }
+    alert_mask = (window >= min_cases) & np.logical_or.reduce(list(flags.values()))
+    rows, cols = np.nonzero(alert_mask)
+    if rows.size == 0:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    # Score: largest exceedance relative to each detector's threshold
+    score = np.fmax.reduce([
+        stats["ears_c1"] / EARS_THRESHOLD,
+        stats["ears_c2"] / EARS_THRESHOLD,
+        stats["ears_c3"] / C3_THRESHOLD,
+        stats["cusum"] / CUSUM_H,
+    ])
+    names = np.array(list(flags.keys()))
+    flag_matrix = np.stack([f[rows, cols] for f in flags.values()], axis=1)
+    dates = matrix.columns[-eval_days:]
+    result = pd.DataFrame({
+        "municipio": matrix.index.to_numpy()[rows],
+        "data": dates[cols].strftime("%Y-%m-%d"),
+        "casos": window[rows, cols].astype(int),
+        "esperado": stats["esperado"][rows, cols].round(2),
+        "ears_c1": stats["ears_c1"][rows, cols].round(2),
+        "ears_c2": stats["ears_c2"][rows, cols].round(2),
+        "ears_c3": stats["ears_c3"][rows, cols].round(2),
+        "cusum": stats["cusum"][rows, cols].round(2),
+        "detectores": [",".join(names[f]) for f in flag_matrix],
+        "escore": score[rows, cols].round(2),
+    })
+    result = (
+        result.sort_values(["escore", "casos"], ascending=False)
+        .drop_duplicates("municipio")
+        .reset_index(drop=True)
+    )
+    return result.head(top) if top else result
+
+
+def detect_outbreaks(
+    conn: Connection,
+    days: int = 56,
+    filters: Optional[Dict[str, Any]] = None,
+    eval_days: int = 1,
+    top: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Run the outbreak detectors for every municipality over the last N days.
+    Args:
+        conn: SQLAlchemy connection to the database.
+        days: History length (days) used to build the baselines.
+        filters: Optional dictionary of filters (e.g. {"CS_SEXO": "F"}).
+        eval_days: Number of most recent days evaluated for alerts.
+        top: Optional maximum number of alerts to return.
+    Returns:
+        Ranked alert DataFrame (see rank_alerts).
+    """
+    df = queries.daily_cases_by_municipality(conn, days=days, filters=filters)
+    # SQLite date('now') is UTC, so the calendar ends on the current UTC day
+    today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+    matrix = build_case_matrix(df, end_date=today, days=days + 1)
+    return rank_alerts(matrix, eval_days=eval_days, top=top)
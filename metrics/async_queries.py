@@ -0,0 +1,86 @@
+"""
+Async versions of the metric functions in metrics/queries.py and metrics/alerts.py.
+Each call borrows its own pooled connection from the shared read-only engine and runs on the
+bounded database thread pool, so independent metrics can be awaited concurrently.
+"""
+
+import asyncio
+import pandas as pd
+from typing import Dict, Any, Optional
+from sqlalchemy.engine import Engine
+
+from agent.database import get_engine, run_in_db_executor
+from metrics import queries, alerts
+
+
+async def _run_metric(engine: Optional[Engine], fn, **kwargs):
+    """Run a synchronous metric function on its own pooled connection in the database thread pool."""
+    engine = engine or get_engine()
+
+    def call():
+        with engine.connect() as conn:
+            return fn(conn, **kwargs)
+
+    return await run_in_db_executor(call)
+
+
+async def daily_cases(
+    engine: Optional[Engine] = None, days: int = 30, filters: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """Async version of queries.daily_cases."""
+    return await _run_metric(engine, queries.daily_cases, days=days, filters=filters)
+
+
+async def monthly_cases(
+    engine: Optional[Engine] = None, months: int = 12, filters: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """Async version of queries.monthly_cases."""
+    return await _run_metric(engine, queries.monthly_cases, months=months, filters=filters)
+
+
+async def mortality_rate(engine: Optional[Engine] = None, filters: Optional[Dict[str, Any]] = None) -> float:
+    """Async version of queries.mortality_rate."""
+    return await _run_metric(engine, queries.mortality_rate, filters=filters)
+
+
+async def icu_rate(engine: Optional[Engine] = None, filters: Optional[Dict[str, Any]] = None) -> float:
+    """Async version of queries.icu_rate."""
+    return await _run_metric(engine, queries.icu_rate, filters=filters)
+
+
+async def covid_vaccination_rate(engine: Optional[Engine] = None, filters: Optional[Dict[str, Any]] = None) -> float:
+    """Async version of queries.covid_vaccination_rate."""
+    return await _run_metric(engine, queries.covid_vaccination_rate, filters=filters)
+
+
+async def flu_vaccination_rate(engine: Optional[Engine] = None, filters: Optional[Dict[str, Any]] = None) -> float:
+    """Async version of queries.flu_vaccination_rate."""
+    return await _run_metric(engine, queries.flu_vaccination_rate, filters=filters)
+
+
+async def detect_outbreaks(
+    engine: Optional[Engine] = None, days: int = 56, filters: Optional[Dict[str, Any]] = None, top: Optional[int] = None
+) -> pd.DataFrame:
+    """Async version of alerts.detect_outbreaks."""
+    return await _run_metric(engine, alerts.detect_outbreaks, days=days, filters=filters, top=top)
+
+
+async def dashboard_metrics(engine: Optional[Engine] = None) -> Dict[str, Any]:
+    """
+    Run every dashboard query (five KPI cards, two charts and the outbreak alerts) concurrently.
+    Args:
+        engine: Optional engine (defaults to the shared read-only engine).
+    Returns:
+        dict mapping metric name to its result.
+    """
+    tasks = {
+        "daily_cases": daily_cases(engine, days=30),
+        "monthly_cases": monthly_cases(engine, months=12),
+        "mortality_rate": mortality_rate(engine),
+        "icu_rate": icu_rate(engine),
+        "covid_vaccination_rate": covid_vaccination_rate(engine),
+        "flu_vaccination_rate": flu_vaccination_rate(engine),
+        "alerts": detect_outbreaks(engine, top=20),
+    }
+    results = await asyncio.gather(*tasks.values())
+    return dict(zip(tasks.keys(), results))
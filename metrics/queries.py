@@ -167,3 +167,29 @@ def flu_vaccination_rate(
         {where};
     """
     return pd.read_sql(query, conn).iloc[0, 0]
+
+
+# 7. Daily case counts per municipality (last N days)
+def daily_cases_by_municipality(
+    conn: Connection, days: int = 56, filters: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """
+    Get daily case counts per municipality of residence for the last N days, in a single grouped query.
+    Args:
+        conn: SQLAlchemy connection to the database.
+        days: Number of days to look back from today.
+        filters: Optional dictionary of filters.
+    Returns:
+        DataFrame with columns ['municipio', 'data', 'casos'] (long format, only days with cases).
+    """
+    where = build_where_clause(filters)
+    query = f"""
+        SELECT CO_MUN_RES AS municipio, DT_SIN_PRI AS data, COUNT(*) AS casos
+        FROM srag_cases
+        WHERE DT_SIN_PRI >= date('now', '-{days} days')
+        AND CO_MUN_RES IS NOT NULL
+        {("AND " + where[6:]) if where else ""}
+        GROUP BY CO_MUN_RES, DT_SIN_PRI
+        ORDER BY CO_MUN_RES, DT_SIN_PRI
+    """
+    return pd.read_sql(query, conn)
@@ -1,13 +1,16 @@
-from langchain_openai import ChatOpenAI
-from metrics import queries
+from typing import Iterator
+
+from agent.llm_gateway import get_llm_gateway, Priority
+from metrics import queries, alerts
 from sqlalchemy.engine.base import Connection
 
 
-def generate_agent_summary(conn: Connection, noticias: list) -> str:
+def build_summary_prompt(conn: Connection, noticias: list) -> str:
     """
-    Generate a summary in Portuguese that combines:
+    Build the executive summary prompt, which combines:
     - Key SRAG metrics (last 30 days: increase rate, mortality, ICU, vaccination)
     - Recent SRAG news headlines
+    - Municipalities with active outbreak alerts
     - Data trends
     The summary should be concise, analytical, and suitable for a health manager.
     """
@@ -17,10 +20,16 @@ def generate_agent_summary(conn: Connection, noticias: list) -> str:
     icu = queries.icu_rate(conn, filters=None)
     covid_vax = queries.covid_vaccination_rate(conn, filters=None)
     flu_vax = queries.flu_vaccination_rate(conn, filters=None)
+    alerts_df = alerts.detect_outbreaks(conn, top=5)
     # Prepare news
     news_str = "\n".join([
         f"- {n['title']} ({n['url']})" if isinstance(n, dict) and 'title' in n and 'url' in n else f"- {n}" for n in noticias[:3]
     ])
+    # Prepare outbreak alerts
+    alerts_str = "\n".join([
+        f"- Município {a.municipio}: {a.casos} casos em {a.data} (esperado: {a.esperado:.1f}; detectores: {a.detectores})"
+        for a in alerts_df.itertuples()
+    ]) or "- Nenhum município acima do nível esperado de casos."
     # Prepare metrics summary
     if not daily_df.empty and daily_df.shape[0] > 1:
         increase_rate = (daily_df["casos"].iloc[-1] - daily_df["casos"].iloc[0]) / max(daily_df["casos"].iloc[0], 1)
@@ -36,13 +45,30 @@ Métricas (últimos 30 dias):
 - Vacinação COVID-19: {covid_vax:.2%}
 - Vacinação Gripe: {flu_vax:.2%}
 
+Alertas de surto por município (detectores EARS/CUSUM):
+{alerts_str}
+
 Notícias recentes:
 {news_str}
 
 Tendências: analise os dados acima e as notícias para gerar um panorama geral.
 """
-    llm = ChatOpenAI(temperature=0)
-    summary = llm.invoke(prompt)
-    if hasattr(summary, "content"):
-        summary = summary.content
-    return summary
+    return prompt
+
+
+def generate_agent_summary(conn: Connection, noticias: list, priority: int = Priority.DASHBOARD) -> str:
+    """
+    Generate the executive summary in Portuguese (see build_summary_prompt).
+    The LLM call is queued with the given gateway priority (dashboard summaries wait behind interactive questions).
+    """
+    prompt = build_summary_prompt(conn, noticias)
+    return get_llm_gateway().complete(prompt, purpose="executive_summary", priority=priority)
+
+
+def stream_agent_summary(conn: Connection, noticias: list, priority: int = Priority.DASHBOARD) -> Iterator[str]:
+    """
+    Streaming version of generate_agent_summary: yields the summary text as the LLM produces it.
+    The metrics are queried before the first fragment is yielded.
+    """
+    prompt = build_summary_prompt(conn, noticias)
+    yield from get_llm_gateway().stream(prompt, purpose="executive_summary", priority=priority)
@@ -4,6 +4,11 @@ Shows key metrics and charts for the last 30 days/12 months.
 Ready for future agent integration.
 """
 
+import asyncio
+import io
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -11,12 +16,96 @@ import matplotlib.pyplot as plt
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from metrics import queries
-from agent.summary_tool import ENGINE
+from metrics import async_queries
+from agent.config import NEWS_CACHE_TTL_SECONDS
+from agent.database import get_engine, data_version
 
-from agent.langgraph_agent import ask_langgraph_agent
+from agent.langgraph_agent import stream_langgraph_agent
 from agent.news_tool import news_query_tool_run
-from report.agent_summary import generate_agent_summary
+from agent.summary_cache import summary_cache
+from agent.llm_gateway import Priority
+
+# Streamlit reruns this script on every interaction: everything that does not depend on the
+# interaction is cached (resources for the process, data keyed by the data version) and the
+# agent section is a fragment, so asking a question reruns only that section.
+
+
+@st.cache_resource
+def load_engine():
+    """Shared read-only engine, created once per server process."""
+    return get_engine()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_metrics(version: str) -> dict:
+    """
+    Dashboard queries (KPI cards, charts and alerts) for one data version, cached across reruns and sessions.
+    The KPI cards, charts and alerts are independent queries: they run concurrently on the database
+    thread pool, each with its own pooled connection.
+    Args:
+        version (str): data_version() of the database (the cache key; a reload of the data invalidates it).
+    Returns:
+        dict: Metric name -> result.
+    """
+    return asyncio.run(async_queries.dashboard_metrics(load_engine()))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def chart_png(version: str, chart: str) -> bytes:
+    """
+    Daily ('daily') or monthly ('monthly') cases chart rendered once per data version.
+    Returns:
+        bytes: PNG image.
+    """
+    metrics = load_metrics(version)
+    fig, ax = plt.subplots(figsize=(6,3))
+    if chart == "daily":
+        df = metrics["daily_cases"]
+        ax.plot(df["data"], df["casos"], marker="o")
+        ax.set_xlabel("Data")
+        ax.set_title("Casos diários - Últimos 30 dias")
+    else:
+        df = metrics["monthly_cases"]
+        ax.bar(df["mes"], df["casos"], color="#1f77b4")
+        ax.set_xlabel("Mês")
+        ax.set_title("Casos mensais - Últimos 12 meses")
+    ax.set_ylabel("Casos")
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+@st.cache_resource
+def background_pool() -> ThreadPoolExecutor:
+    """Threads running the external calls (news search) while the page renders, shared by every session."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="dashboard")
+
+
+@st.cache_data(ttl=NEWS_CACHE_TTL_SECONDS, show_spinner=False)
+def load_news() -> list:
+    """Recent news as a list of articles (errors are not cached, so the next rerun retries)."""
+    noticias_raw = news_query_tool_run("")
+    try:
+        noticias_list = json.loads(noticias_raw)
+    except (TypeError, ValueError):
+        return [noticias_raw]
+    return noticias_list if isinstance(noticias_list, list) else [noticias_raw]
+
+
+def kpi_card(title: str, value: float, color: str):
+    """Render one metric card (N/A when the value is missing)."""
+    text = f"{value:.2%}" if pd.notna(value) else "N/A"
+    st.markdown(f"""
+        <div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'>
+            <div style='font-size:1.15em; font-weight:600;'>{title}</div>
+            <div style='font-size:2.1em; font-weight:700; color:{color}; margin-top:8px;'>
+                {text}
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
 
 st.set_page_config(page_title="Relatório SRAG", layout="wide")
 st.title("Relatório Epidemiológico de SRAG")
@@ -24,95 +113,54 @@ st.markdown("""
 Este painel apresenta as principais métricas e tendências epidemiológicas das hospitalizações por Síndrome Respiratória Aguda Grave (SRAG), usando os dados mais recentes disponíveis.
 """)
 
-with ENGINE.connect() as conn:
-    # Main Metrics (Last 30 Days)
-    st.header("Métricas Principais (Últimos 30 dias)")
-    col1, col2, col3, col4, col5 = st.columns(5, gap="small")
-    # Card 1: Daily case increase rate
-    with col1:
-        daily_df = queries.daily_cases(conn, days=30)
-        if not daily_df.empty and daily_df.shape[0] > 1:
-            increase_rate = (daily_df["casos"].iloc[-1] - daily_df["casos"].iloc[0]) / max(daily_df["casos"].iloc[0], 1)
-        else:
-            increase_rate = float('nan')
-        st.markdown(f"""
-            <div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'>
-                <div style='font-size:1.15em; font-weight:600;'>Taxa de aumento de casos</div>
-                <div style='font-size:2.1em; font-weight:700; color:#0072B2; margin-top:8px;'>
-                    {increase_rate:.2%}
-                </div>
-            </div>
-        """ if pd.notna(increase_rate) else "<div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'><div style='font-size:1.15em; font-weight:600;'>Taxa de aumento de casos</div><div style='font-size:2.1em; font-weight:700; color:#0072B2; margin-top:8px;'>N/A</div></div>", unsafe_allow_html=True)
-    # Card 2: Mortality rate
-    with col2:
-        mortality = queries.mortality_rate(conn, filters=None)
-        st.markdown(f"""
-            <div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'>
-                <div style='font-size:1.15em; font-weight:600;'>Taxa de mortalidade</div>
-                <div style='font-size:2.1em; font-weight:700; color:#d7263d; margin-top:8px;'>
-                    {mortality:.2%}
-                </div>
-            </div>
-        """ if pd.notna(mortality) else "<div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'><div style='font-size:1.15em; font-weight:600;'>Taxa de mortalidade</div><div style='font-size:2.1em; font-weight:700; color:#d7263d; margin-top:8px;'>N/A</div></div>", unsafe_allow_html=True)
-    # Card 3: ICU occupancy rate
-    with col3:
-        icu = queries.icu_rate(conn, filters=None)
-        st.markdown(f"""
-            <div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'>
-                <div style='font-size:1.15em; font-weight:600;'>Taxa de ocupação UTI</div>
-                <div style='font-size:2.1em; font-weight:700; color:#1a936f; margin-top:8px;'>
-                    {icu:.2%}
-                </div>
-            </div>
-        """ if pd.notna(icu) else "<div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'><div style='font-size:1.15em; font-weight:600;'>Taxa de ocupação UTI</div><div style='font-size:2.1em; font-weight:700; color:#1a936f; margin-top:8px;'>N/A</div></div>", unsafe_allow_html=True)
-    # Card 4: COVID vaccination rate
-    with col4:
-        covid_vax = queries.covid_vaccination_rate(conn, filters=None)
-        st.markdown(f"""
-            <div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'>
-                <div style='font-size:1.15em; font-weight:600;'>Vacinação COVID-19</div>
-                <div style='font-size:2.1em; font-weight:700; color:#e69f00; margin-top:8px;'>
-                    {covid_vax:.2%}
-                </div>
-            </div>
-        """ if pd.notna(covid_vax) else "<div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'><div style='font-size:1.15em; font-weight:600;'>Vacinação COVID-19</div><div style='font-size:2.1em; font-weight:700; color:#e69f00; margin-top:8px;'>N/A</div></div>", unsafe_allow_html=True)
-    # Card 5: Flu vaccination rate
-    with col5:
-        flu_vax = queries.flu_vaccination_rate(conn, filters=None)
-        st.markdown(f"""
-            <div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'>
-                <div style='font-size:1.15em; font-weight:600;'>Vacinação Gripe</div>
-                <div style='font-size:2.1em; font-weight:700; color:#e69f00; margin-top:8px;'>
-                    {flu_vax:.2%}
-                </div>
-            </div>
-        """ if pd.notna(flu_vax) else "<div style='background:#f8f9fa; border-radius:12px; padding:22px 0 18px 0; margin-bottom:6px; box-shadow:0 1px 4px #eee; text-align:center; width:100%; display:flex; flex-direction:column; justify-content:center; align-items:center;'><div style='font-size:1.15em; font-weight:600;'>Vacinação Gripe</div><div style='font-size:2.1em; font-weight:700; color:#e69f00; margin-top:8px;'>N/A</div></div>", unsafe_allow_html=True)
-
-    st.divider()
-    # Charts: Case trends
-    st.header("Tendências de Casos")
-    chart1, chart2 = st.columns(2)
-    with chart1:
-        # Daily cases chart (last 30 days)
-        st.subheader("Casos diários (últimos 30 dias)")
-        fig, ax = plt.subplots(figsize=(6,3))
-        ax.plot(daily_df["data"], daily_df["casos"], marker="o")
-        ax.set_xlabel("Data")
-        ax.set_ylabel("Casos")
-        ax.set_title("Casos diários - Últimos 30 dias")
-        plt.xticks(rotation=45, ha="right")
-        st.pyplot(fig)
-    with chart2:
-        # Monthly cases chart (last 12 months)
-        st.subheader("Casos mensais (últimos 12 meses)")
-        monthly_df = queries.monthly_cases(conn, months=12)
-        fig2, ax2 = plt.subplots(figsize=(6,3))
-        ax2.bar(monthly_df["mes"], monthly_df["casos"], color="#1f77b4")
-        ax2.set_xlabel("Mês")
-        ax2.set_ylabel("Casos")
-        ax2.set_title("Casos mensais - Últimos 12 meses")
-        plt.xticks(rotation=45, ha="right")
-        st.pyplot(fig2)
+version = data_version()
+metrics = load_metrics(version)
+daily_df = metrics["daily_cases"]
+alerts_df = metrics["alerts"]
+
+# Main Metrics (Last 30 Days)
+st.header("Métricas Principais (Últimos 30 dias)")
+col1, col2, col3, col4, col5 = st.columns(5, gap="small")
+# Card 1: Daily case increase rate
+with col1:
+    if not daily_df.empty and daily_df.shape[0] > 1:
+        increase_rate = (daily_df["casos"].iloc[-1] - daily_df["casos"].iloc[0]) / max(daily_df["casos"].iloc[0], 1)
+    else:
+        increase_rate = float('nan')
+    kpi_card("Taxa de aumento de casos", increase_rate, "#0072B2")
+# Card 2: Mortality rate
+with col2:
+    kpi_card("Taxa de mortalidade", metrics["mortality_rate"], "#d7263d")
+# Card 3: ICU occupancy rate
+with col3:
+    kpi_card("Taxa de ocupação UTI", metrics["icu_rate"], "#1a936f")
+# Card 4: COVID vaccination rate
+with col4:
+    kpi_card("Vacinação COVID-19", metrics["covid_vaccination_rate"], "#e69f00")
+# Card 5: Flu vaccination rate
+with col5:
+    kpi_card("Vacinação Gripe", metrics["flu_vaccination_rate"], "#e69f00")
+
+st.divider()
+# Charts: Case trends
+st.header("Tendências de Casos")
+chart1, chart2 = st.columns(2)
+with chart1:
+    # Daily cases chart (last 30 days)
+    st.subheader("Casos diários (últimos 30 dias)")
+    st.image(chart_png(version, "daily"))
+with chart2:
+    # Monthly cases chart (last 12 months)
+    st.subheader("Casos mensais (últimos 12 meses)")
+    st.image(chart_png(version, "monthly"))
+
+st.divider()
+# Outbreak alerts: EARS/CUSUM detectors run for every municipality at once
+st.header("Alertas de surto por município")
+if alerts_df.empty:
+    st.success("Nenhum município acima do nível esperado de casos.")
+else:
+    st.dataframe(alerts_df, hide_index=True, use_container_width=True)
 
 # Info for users: panel ready for future AI agent integration
 st.info("Este painel está pronto para integração futura com agentes de IA para análises dinâmicas e explicações automáticas.")
@@ -121,42 +169,47 @@ st.info("Este painel está pronto para integração futura com agentes de IA par
 
 st.divider()
 
+
+def render_news(slot, noticias_list: list):
+    """Fill the news placeholder with the first three articles."""
+    with slot.container():
+        for i, news in enumerate(noticias_list[:3], 1):
+            if isinstance(news, dict) and 'title' in news and 'url' in news:
+                st.markdown(f"**{i}. [{news['title']}]({news['url']})**")
+                if 'snippet' in news:
+                    st.caption(news['snippet'])
+            else:
+                st.markdown(f"**{i}.** {news}")
+
+
+def render_summary(slot, summary, fresh: bool):
+    """Fill the summary placeholder with a stored summary and when it was generated."""
+    with slot.container():
+        st.markdown(summary.text)
+        st.caption(
+            f"Resumo gerado em {summary.generated_at}"
+            + ("" if fresh else " — uma versão atualizada está sendo gerada em segundo plano.")
+        )
+
+
+# News and the executive summary depend on external calls (Tavily, LLM): the page shows placeholders
+# for them, the news search runs on a background thread while the rest of the page renders, and the
+# placeholders are filled at the end of the script, once every local section is on screen.
+news_future = background_pool().submit(load_news)
+
 # News section: always visible at the top
 st.header("Notícias recentes sobre SRAG no Brasil")
-with st.spinner("Buscando notícias relevantes..."):
-    try:
-        noticias_raw = news_query_tool_run("")
-    except Exception as e:
-        noticias_raw = f"Erro ao buscar notícias: {e}"
-noticias_list = []
-if noticias_raw:
-    import json
-    if isinstance(noticias_raw, str):
-        try:
-            noticias_list = json.loads(noticias_raw)
-            if not isinstance(noticias_list, list):
-                noticias_list = [noticias_raw]
-        except Exception:
-            noticias_list = [noticias_raw]
-    else:
-        noticias_list = noticias_raw
-    for i, news in enumerate(noticias_list[:3], 1):
-        if isinstance(news, dict) and 'title' in news and 'url' in news:
-            st.markdown(f"**{i}. [{news['title']}]({news['url']})**")
-            if 'snippet' in news:
-                st.caption(news['snippet'])
-        else:
-            st.markdown(f"**{i}.** {news}")
-
-# Agent Executive Summary
-with ENGINE.connect() as conn:
-    with st.spinner("Gerando resumo executivo do agente..."):
-        try:
-            agent_summary = generate_agent_summary(conn, noticias_list)
-        except Exception as e:
-            agent_summary = None
-if agent_summary:
-    st.info(agent_summary)
+news_slot = st.empty()
+news_slot.caption("Buscando notícias relevantes...")
+
+# Agent Executive Summary: the last stored summary is shown at once (it needs no news to be read)
+with st.container(border=True):
+    summary_slot = st.empty()
+stored_summary = summary_cache.latest()
+if stored_summary is not None:
+    render_summary(summary_slot, stored_summary, fresh=True)
+else:
+    summary_slot.caption("Gerando resumo executivo...")
 
 # Exemplos de perguntas sugeridas para o agente
 EXAMPLE_QUESTIONS = [
@@ -176,37 +229,42 @@ st.markdown("""
 
 # Pergunte ao Agente Epidemiológico
 st.header("Pergunte ao Agente Epidemiológico")
-user_question = st.text_input("Digite sua pergunta sobre SRAG, epidemiologia, métricas ou notícias:")
-
-if user_question:
-    with st.spinner("Consultando agente..."):
-        agent_response = ask_langgraph_agent(user_question)
-    # If response is a simple string, maintain compatibility
-    if isinstance(agent_response, str):
-        st.markdown(f"**Resposta do agente:**\n\n{agent_response}")
-        news_items = None
+
+
+@st.fragment
+def agent_section():
+    """Question box and streamed answer; typing a question reruns only this fragment."""
+    user_question = st.text_input("Digite sua pergunta sobre SRAG, epidemiologia, métricas ou notícias:")
+    # One conversational session per browser session: follow-ups ("e para mulheres?") refine the previous answer
+    session_id = st.session_state.setdefault("agent_session_id", uuid.uuid4().hex)
+
+    if user_question:
+        # Tokens are rendered as they arrive; non-LLM answers (news, guardrail) appear at once
+        st.markdown("**Resposta do agente:**")
+        st.write_stream(stream_langgraph_agent(user_question, session_id=session_id))
+
+
+agent_section()
+
+# Fill the placeholders as the external calls complete
+try:
+    noticias_list = news_future.result()
+except Exception as e:
+    noticias_list = [f"Erro ao buscar notícias: {e}"]
+render_news(news_slot, noticias_list)
+
+try:
+    # Checks the stored summary against the current data and news without starting a generation
+    summary, fresh = summary_cache.peek(noticias_list)
+    if summary is None:
+        # Nothing generated yet: stream the (single, shared) first generation into the placeholder
+        with summary_slot.container():
+            st.write_stream(summary_cache.stream(noticias_list, priority=Priority.DASHBOARD))
     else:
-        st.markdown(f"**Resposta do agente:**\n\n{agent_response.get('final_result', '')}")
-        news_items = agent_response.get('news', None)
-    # Display news if available
-    if news_items:
-        st.subheader("Notícias relevantes sobre SRAG no Brasil")
-        if isinstance(news_items, str):
-            # Try to convert to list if string is JSON/list
-            import json
-            try:
-                news_list = json.loads(news_items)
-                if not isinstance(news_list, list):
-                    news_list = [news_items]
-            except Exception:
-                news_list = [news_items]
-        else:
-            news_list = news_items
-        # Show up to 3 news items
-        for i, news in enumerate(news_list[:3], 1):
-            if isinstance(news, dict) and 'title' in news and 'url' in news:
-                st.markdown(f"**{i}. [{news['title']}]({news['url']})**")
-                if 'snippet' in news:
-                    st.caption(news['snippet'])
-            else:
-                st.markdown(f"**{i}.** {news}")
+        if not fresh:
+            # A stale summary stays on screen while the new one is generated in the background
+            summary_cache.refresh(noticias_list)
+        if not fresh or summary is not stored_summary:
+            render_summary(summary_slot, summary, fresh)
+except Exception:
+    summary_slot.warning("Não foi possível gerar o resumo executivo do agente.")
@@ -0,0 +1,109 @@
+"""
+Evaluate agent routing on a labeled question set.
+
+Compares the standard mode (local scope classifier + keyword routing) with the fused single-call mode
+(one structured-output LLM call for scope, route and SQL), reporting accuracy, confusion pairs,
+latency and the number of LLM calls per question.
+
+Usage:
+    python scripts/evaluate_routing.py [--mode keyword|fused|both] [--offline] [--dataset PATH]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.routing import route_question, fused_route
+from agent.scope_classifier import get_scope_classifier
+from agent.langgraph_agent import llm_scope_check, violates_blocklist
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(__file__), "..", "docs", "routing_eval_set.jsonl")
+
+
+def load_dataset(path: str) -> list[dict]:
+    """Read the labeled set (one {"question", "route"} object per line)."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def predict_keyword(question: str, offline: bool) -> tuple[str, int]:
+    """Standard mode prediction. Returns (route, LLM calls)."""
+    calls = []
+
+    def judge(q):
+        calls.append(q)
+        return llm_scope_check(q)
+
+    if violates_blocklist(question):
+        return "blocked", 0
+    if not get_scope_classifier().classify(question, llm_judge=None if offline else judge):
+        return "blocked", len(calls)
+    return route_question(question), len(calls)
+
+
+def predict_fused(question: str) -> tuple[str, int]:
+    """Fused mode prediction. Returns (route, LLM calls)."""
+    if violates_blocklist(question):
+        return "blocked", 0
+    decision = fused_route(question)
+    return (decision.route if decision.in_scope else "blocked"), 1
+
+
+def evaluate(dataset: list[dict], predict) -> dict:
+    """
+    Run a predictor over the dataset.
+    Returns:
+        dict: accuracy, mean latency (ms), mean LLM calls, confusion pairs and errors.
+    """
+    correct, calls, latencies = 0, 0, []
+    confusion = Counter()
+    errors = []
+    for item in dataset:
+        start = time.perf_counter()
+        route, n_calls = predict(item["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        calls += n_calls
+        if route == item["route"]:
+            correct += 1
+        else:
+            confusion[(item["route"], route)] += 1
+            errors.append((item["question"], item["route"], route))
+    return {
+        "accuracy": correct / len(dataset),
+        "mean_latency_ms": sum(latencies) / len(latencies),
+        "llm_calls_per_question": calls / len(dataset),
+        "confusion": confusion,
+        "errors": errors,
+    }
+
+
+def print_report(name: str, report: dict):
+    print(f"\n=== {name} ===")
+    print(f"Acurácia: {report['accuracy']:.1%}")
+    print(f"Latência média: {report['mean_latency_ms']:.1f} ms")
+    print(f"Chamadas ao LLM por pergunta: {report['llm_calls_per_question']:.2f}")
+    for (expected, got), n in report["confusion"].most_common():
+        print(f"  esperado={expected:<15} obtido={got:<15} {n}x")
+    for question, expected, got in report["errors"]:
+        print(f"  [ERRO] {question!r}: esperado {expected}, obtido {got}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia o roteamento do agente em um conjunto rotulado.")
+    parser.add_argument("--mode", choices=["keyword", "fused", "both"], default="keyword")
+    parser.add_argument("--offline", action="store_true", help="modo keyword sem chamadas ao LLM")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    args = parser.parse_args()
+    dataset = load_dataset(args.dataset)
+    if args.mode in ("keyword", "both"):
+        print_report("keyword", evaluate(dataset, lambda q: predict_keyword(q, args.offline)))
+    if args.mode in ("fused", "both"):
+        print_report("fused", evaluate(dataset, predict_fused))
+
+
+if __name__ == "__main__":
+    main()
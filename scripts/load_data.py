@@ -12,6 +12,7 @@ import polars as pl
 
 # --- PROJECT CONSTANTS ---
 from agent.config import CSV_PATH, DB_PATH
+from agent.database import create_write_engine
 
 # Define table name and DB connection URI locally for this script
 TABLE_NAME = "srag_cases"
@@ -101,12 +102,12 @@ def load_to_sqlite(df: pl.DataFrame, db_uri: str, table_name: str):
     try:
         # Remove a tabela se já existir
         import sqlalchemy
-        engine = sqlalchemy.create_engine(db_uri.replace('sqlite:///', 'sqlite:///'))
-        with engine.connect() as conn:
+        engine = create_write_engine(db_uri)
+        with engine.begin() as conn:
             conn.execute(sqlalchemy.text(f"DROP TABLE IF EXISTS {table_name}"))
         df.write_database(
             table_name=table_name,
-            connection=db_uri
+            connection=engine
         )
         print("Data loaded successfully.")
     except Exception as e:
@@ -0,0 +1,94 @@
+"""
+Query the indexed agent audit store (logs/agent_audit.db).
+
+Usage:
+    python scripts/query_audit.py events [--node N] [--decision D] [--since 1d] [--limit 50] [--states]
+    python scripts/query_audit.py counts --by hour|day|minute|node|decision [--node N] [--since 7d]
+    python scripts/query_audit.py blocks [--by hour] [--since 1d]       # guardrail blocks per bucket
+    python scripts/query_audit.py failed-sql [--since 1d] [--limit 50]  # SQL generation/execution failures
+    python scripts/query_audit.py backfill [--log logs/agent_audit.log] # ingest an existing JSONL log
+
+--since/--until accept relative windows (30m, 12h, 7d) or ISO dates.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.audit_store import AuditStore, parse_since
+from agent.config import AUDIT_DB_PATH, AUDIT_LOG_PATH
+
+
+def _print_events(events: list[dict]):
+    for event in events:
+        print(json.dumps(event, ensure_ascii=False))
+
+
+def _print_counts(counts: list[tuple[str, int]]):
+    width = max((len(str(group)) for group, _ in counts), default=0)
+    for group, n in counts:
+        print(f"{str(group):<{width}}  {n}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas ao armazenamento indexado de auditoria do agente.")
+    parser.add_argument("--db", default=AUDIT_DB_PATH, help="banco SQLite de auditoria")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def window(p):
+        p.add_argument("--since", help="início da janela (30m, 12h, 7d ou data ISO)")
+        p.add_argument("--until", help="fim da janela (data ISO)")
+
+    events = sub.add_parser("events", help="eventos mais recentes que atendem aos filtros")
+    events.add_argument("--node")
+    events.add_argument("--decision")
+    events.add_argument("--decision-prefix", action="append", dest="decision_prefixes")
+    events.add_argument("--limit", type=int, default=50)
+    events.add_argument("--states", action="store_true", help="inclui os estados de entrada e saída")
+    window(events)
+
+    counts = sub.add_parser("counts", help="contagem de eventos agrupada")
+    counts.add_argument("--by", default="hour", choices=["minute", "hour", "day", "node", "decision"])
+    counts.add_argument("--node")
+    counts.add_argument("--decision")
+    counts.add_argument("--decision-prefix", action="append", dest="decision_prefixes")
+    window(counts)
+
+    blocks = sub.add_parser("blocks", help="perguntas bloqueadas pelo guardrail por período")
+    blocks.add_argument("--by", default="hour", choices=["minute", "hour", "day"])
+    blocks.add_argument("--since", default="1d")
+
+    failed = sub.add_parser("failed-sql", help="falhas de geração ou execução de SQL")
+    failed.add_argument("--since", default="1d")
+    failed.add_argument("--limit", type=int, default=50)
+
+    backfill = sub.add_parser("backfill", help="importa um log JSONL existente (e seus arquivos .gz)")
+    backfill.add_argument("--log", default=AUDIT_LOG_PATH)
+
+    args = parser.parse_args()
+    store = AuditStore(args.db)
+    start = time.perf_counter()
+    if args.command == "events":
+        _print_events(store.events(
+            node=args.node, decision=args.decision, decision_prefixes=args.decision_prefixes,
+            since=parse_since(args.since), until=parse_since(args.until), limit=args.limit, with_states=args.states,
+        ))
+    elif args.command == "counts":
+        _print_counts(store.counts(
+            by=args.by, node=args.node, decision=args.decision, decision_prefixes=args.decision_prefixes,
+            since=parse_since(args.since), until=parse_since(args.until),
+        ))
+    elif args.command == "blocks":
+        _print_counts(store.guardrail_blocks(by=args.by, since=parse_since(args.since)))
+    elif args.command == "failed-sql":
+        _print_events(store.failed_sql(since=parse_since(args.since), limit=args.limit))
+    elif args.command == "backfill":
+        print(f"{store.backfill(args.log)} eventos importados de {args.log}")
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
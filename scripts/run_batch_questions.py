@@ -0,0 +1,33 @@
+"""
+Answer a batch of questions with the LangGraph agent and write the answers as JSONL.
+
+Usage:
+    python scripts/run_batch_questions.py QUESTIONS_FILE [--output answers.jsonl] [--concurrency N]
+
+QUESTIONS_FILE has one question per line (or JSONL with a "question" field).
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.batch import load_questions, write_batch_jsonl
+from agent.config import BATCH_CONCURRENCY
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Responde um lote de perguntas com o agente e grava JSONL.")
+    parser.add_argument("questions", help="arquivo com uma pergunta por linha (ou JSONL com o campo 'question')")
+    parser.add_argument("--output", default="report/batch_answers.jsonl")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    args = parser.parse_args()
+    questions = load_questions(args.questions)
+    print(f"Respondendo {len(questions)} perguntas (concorrência {args.concurrency})...")
+    totals = asyncio.run(write_batch_jsonl(questions, args.output, args.concurrency))
+    print(f"Concluído: {totals['questions']} respostas, {totals['errors']} erros, {totals['elapsed_s']}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Top-N report of slow SQL queries.
+
+Usage:
+    python scripts/slow_query_report.py [--log logs/slow_queries.log] [--top 10] [--by total_ms|mean_ms|max_ms|count]
+    python scripts/slow_query_report.py --run-dashboard   # profile every dashboard query in this process
+
+By default the report aggregates the slow-query log written by the agent and the dashboard;
+--run-dashboard runs the dashboard metrics once and reports every query, slow or not.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.config import SQL_SLOW_QUERY_LOG
+from agent.database import get_engine
+from agent.sql_profiler import sql_profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório das consultas SQL mais lentas.")
+    parser.add_argument("--log", default=SQL_SLOW_QUERY_LOG, help="slow query log (JSONL)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--by", default="total_ms", choices=["total_ms", "mean_ms", "max_ms", "count"])
+    parser.add_argument("--run-dashboard", action="store_true", help="executa as métricas do dashboard e as perfila")
+    args = parser.parse_args()
+    if args.run_dashboard:
+        from metrics import async_queries
+
+        asyncio.run(async_queries.dashboard_metrics(get_engine()))
+    else:
+        entries = sql_profiler.load_log(args.log)
+        print(f"{entries} consultas lentas lidas de {args.log}")
+    print(sql_profiler.report(args.top, args.by))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agent import langgraph_agent
+from agent.llm_gateway import LLMGateway, StubProvider
+
+
+def _patch(monkeypatch, reply):
+    gateway = LLMGateway(StubProvider(lambda prompt: reply))
+    monkeypatch.setattr(langgraph_agent, "get_llm_gateway", lambda: gateway)
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    monkeypatch.setattr(langgraph_agent, "is_valid_input", lambda question: True)
+
+
+def test_explanation_is_streamed_token_by_token(monkeypatch):
+    _patch(monkeypatch, "SRAG é uma síndrome respiratória.")
+    tokens = list(langgraph_agent.stream_langgraph_agent("Explique o que é SRAG"))
+    assert len(tokens) == 5
+    assert "".join(tokens) == "SRAG é uma síndrome respiratória."
+
+
+def test_non_streaming_answer_is_yielded_whole(monkeypatch):
+    _patch(monkeypatch, "não usado")
+    monkeypatch.setattr(langgraph_agent, "is_valid_input", lambda question: False)
+    tokens = list(langgraph_agent.stream_langgraph_agent("Qual a cotação do dólar?"))
+    assert tokens == [langgraph_agent.BLOCKED_MESSAGE]
+
+
+def test_stream_to_writer_outside_graph():
+    assert langgraph_agent.stream_to_writer(iter(["a", "b"]), "test") == "ab"
@@ -0,0 +1,61 @@
+"""
+Unit tests for metrics/alerts.py
+Uses synthetic municipality x day matrices, no database required.
+"""
+
+import numpy as np
+import pandas as pd
+from metrics import alerts
+
+
+def _long_frame(series_by_mun, start="2025-01-01"):
+    rows = []
+    for mun, series in series_by_mun.items():
+        for i, casos in enumerate(series):
+            if casos:
+                day = (pd.Timestamp(start) + pd.Timedelta(days=i)).strftime("%Y-%m-%d")
+                rows.append({"municipio": mun, "data": day, "casos": casos})
+    return pd.DataFrame(rows)
+
+
+def test_build_case_matrix_fills_missing_days():
+    df = _long_frame({355030: [1, 0, 2]})
+    matrix = alerts.build_case_matrix(df, end_date="2025-01-05", days=5)
+    assert matrix.shape == (1, 5)
+    assert matrix.loc[355030].tolist() == [1.0, 0.0, 2.0, 0.0, 0.0]
+
+
+def test_run_detectors_shapes_and_history():
+    counts = np.ones((3, 20))
+    stats = alerts.run_detectors(counts)
+    for values in stats.values():
+        assert values.shape == (3, 20)
+    # C1 needs BASELINE_DAYS of history, C2 also needs the guard band
+    assert np.isnan(stats["ears_c1"][:, alerts.BASELINE_DAYS - 1]).all()
+    assert not np.isnan(stats["ears_c1"][:, alerts.BASELINE_DAYS]).any()
+    assert np.isnan(stats["ears_c2"][:, alerts.BASELINE_DAYS + alerts.GUARD_DAYS - 1]).all()
+
+
+def test_rank_alerts_flags_only_spiking_municipality():
+    stable = [2] * 30
+    spike = [2] * 29 + [15]
+    df = _long_frame({1: stable, 2: spike, 3: [0] * 29 + [1]})
+    matrix = alerts.build_case_matrix(df)
+    ranked = alerts.rank_alerts(matrix)
+    assert list(ranked.columns) == alerts.ALERT_COLUMNS
+    assert ranked["municipio"].tolist() == [2]
+    assert ranked.loc[0, "casos"] == 15
+    assert "C1" in ranked.loc[0, "detectores"]
+
+
+def test_rank_alerts_sorted_by_score():
+    df = _long_frame({1: [1] * 29 + [6], 2: [1] * 29 + [20]})
+    ranked = alerts.rank_alerts(alerts.build_case_matrix(df))
+    assert ranked["municipio"].tolist() == [2, 1]
+    assert ranked["escore"].is_monotonic_decreasing
+
+
+def test_rank_alerts_empty_matrix():
+    ranked = alerts.rank_alerts(alerts.build_case_matrix(pd.DataFrame(columns=["municipio", "data", "casos"])))
+    assert ranked.empty
+    assert list(ranked.columns) == alerts.ALERT_COLUMNS
@@ -0,0 +1,33 @@
+"""
+Unit tests for metrics/async_queries.py
+Checks that the async metrics match their synchronous counterparts.
+"""
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import pandas as pd
+from agent.database import create_read_engine
+from metrics import async_queries, queries
+
+# Use the main database for integration tests
+TEST_DB_PATH = "database/srag_database.db"
+
+def test_async_rates_match_sync():
+    """Test that async rate functions return the same values as the sync ones."""
+    engine = create_read_engine(TEST_DB_PATH)
+    with engine.connect() as conn:
+        expected = queries.mortality_rate(conn, filters={"CS_SEXO": "F"})
+    rate = asyncio.run(async_queries.mortality_rate(engine, filters={"CS_SEXO": "F"}))
+    assert rate == expected or (pd.isna(rate) and pd.isna(expected))
+
+def test_dashboard_metrics_keys():
+    """Test that dashboard_metrics runs every dashboard query."""
+    engine = create_read_engine(TEST_DB_PATH)
+    metrics = asyncio.run(async_queries.dashboard_metrics(engine))
+    assert set(metrics) == {
+        "daily_cases", "monthly_cases", "mortality_rate", "icu_rate",
+        "covid_vaccination_rate", "flu_vaccination_rate", "alerts",
+    }
+    assert set(metrics["daily_cases"].columns) == {"data", "casos"}
@@ -0,0 +1,60 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import glob
+import gzip
+import hashlib
+import json
+
+from agent.audit import AuditWriter, compact_value
+
+
+def _entry(i, payload="x"):
+    return {"node": "sql_query_node", "input_state": {"question": f"q{i}"}, "decision": "ok", "output_state": {"sql_result": payload}}
+
+
+def test_large_fields_are_truncated_and_hashed():
+    text = "a" * 5000
+    compact = compact_value(text, max_chars=100)
+    assert compact["truncated"] == "a" * 100
+    assert compact["chars"] == 5000
+    assert compact["sha256"] == hashlib.sha256(text.encode()).hexdigest()
+    assert compact_value("curto", max_chars=100) == "curto"
+    assert compact_value({"rows": list(range(100))}, max_chars=50)["chars"] > 50
+
+
+def test_entries_are_written_in_background(tmp_path):
+    path = str(tmp_path / "audit.log")
+    writer = AuditWriter(path, flush_seconds=0.01, field_max_chars=10)
+    for i in range(50):
+        writer.log(_entry(i, payload="y" * 100))
+    assert writer.flush(timeout=5)
+    writer.close()
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["input_state"]["question"] for line in lines] == [f"q{i}" for i in range(50)]
+    assert lines[0]["output_state"]["sql_result"]["chars"] == 100
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = AuditWriter(str(tmp_path / "audit.log"), max_queue=1, flush_seconds=0.01)
+    for i in range(1000):
+        writer.log(_entry(i))
+    writer.close()
+    assert writer.dropped > 0
+    assert writer.written + writer.dropped == 1000
+
+
+def test_rotation_compresses_and_keeps_backups(tmp_path):
+    path = str(tmp_path / "audit.log")
+    writer = AuditWriter(path, batch_size=1, flush_seconds=0.01, max_bytes=200, backups=2)
+    for i in range(10):
+        writer.log(_entry(i, payload="z" * 150))
+        writer.flush(timeout=5)
+    writer.close()
+    archives = sorted(glob.glob(path + ".*.gz"))
+    assert writer.rotations >= 3
+    assert len(archives) == 2
+    with gzip.open(archives[-1], "rt", encoding="utf-8") as f:
+        assert json.loads(f.readline())["node"] == "sql_query_node"
@@ -0,0 +1,94 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import json
+import time
+from datetime import datetime, timedelta
+
+from agent.audit import AuditWriter
+from agent.audit_store import AuditStore, BLOCKED_DECISION, parse_since
+
+
+def _event(ts, node, decision, question="q", sql=None):
+    return {
+        "timestamp": ts.isoformat(),
+        "node": node,
+        "decision": decision,
+        "input_state": {"question": question},
+        "output_state": {"sql_query": sql} if sql else {},
+    }
+
+
+def _store(tmp_path):
+    store = AuditStore(str(tmp_path / "audit.db"))
+    base = datetime(2026, 1, 1, 10, 0)
+    store.insert_many([
+        _event(base, "router_node", BLOCKED_DECISION, "cotação do dólar"),
+        _event(base + timedelta(minutes=10), "router_node", BLOCKED_DECISION, "futebol"),
+        _event(base + timedelta(hours=1), "router_node", BLOCKED_DECISION, "senha"),
+        _event(base + timedelta(hours=1), "router_node", "Roteado para sql_generation"),
+        _event(base + timedelta(hours=2), "sql_query_node", "Erro ao executar SQL: no such column", sql="SELECT X FROM srag_cases"),
+        _event(base + timedelta(hours=2), "sql_query_node", "Consulta SQL rejeitada: tabela", sql="SELECT * FROM users"),
+        _event(base + timedelta(hours=2), "sql_query_node", "Resultado SQL roteado para summarization"),
+    ])
+    return store
+
+
+def test_guardrail_blocks_per_hour(tmp_path):
+    store = _store(tmp_path)
+    assert store.guardrail_blocks(by="hour") == [("2026-01-01T10", 2), ("2026-01-01T11", 1)]
+    assert store.counts(by="node")[0] == ("router_node", 4)
+
+
+def test_failed_sql_and_filters(tmp_path):
+    store = _store(tmp_path)
+    failed = store.failed_sql(since="2026-01-01T00:00:00")
+    assert {e["sql_query"] for e in failed} == {"SELECT X FROM srag_cases", "SELECT * FROM users"}
+    assert store.failed_sql(since="2026-01-02T00:00:00") == []
+    events = store.events(node="router_node", until="2026-01-01T10:30:00", with_states=True)
+    assert [e["question"] for e in events] == ["futebol", "cotação do dólar"]
+    assert json.loads(events[0]["input_state"]) == {"question": "futebol"}
+
+
+def test_queries_use_indexes(tmp_path):
+    store = _store(tmp_path)
+    plan = store._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM audit_events WHERE decision = ? AND ts >= ?", (BLOCKED_DECISION, "2026")
+    ).fetchall()
+    assert any("idx_audit_decision_ts" in row[3] for row in plan)
+
+
+def test_parse_since():
+    now = datetime(2026, 1, 2, 12, 0)
+    assert parse_since("12h", now) == "2026-01-02T00:00:00"
+    assert parse_since("2026-01-01", now) == "2026-01-01T00:00:00"
+    assert parse_since(None) is None
+
+
+def test_writer_ingests_batches_and_backfill(tmp_path):
+    store = AuditStore(str(tmp_path / "audit.db"))
+    log_path = str(tmp_path / "audit.log")
+    writer = AuditWriter(log_path, flush_seconds=0.01, sinks=[store.insert_many])
+    writer.log(_event(datetime.now(), "router_node", BLOCKED_DECISION))
+    writer.close()
+    assert len(store.events()) == 1
+    other = AuditStore(str(tmp_path / "other.db"))
+    assert other.backfill(log_path) == 1
+    # The live sink already ingested the log: backfilling it again adds nothing
+    assert store.backfill(log_path) == 0
+    assert other.backfill(log_path) == 0
+    assert len(store.events()) == 1
+
+
+def test_existing_duplicates_are_removed_when_the_key_is_added(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "audit.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY, ts TEXT NOT NULL, node TEXT NOT NULL, "
+                 "decision TEXT, question TEXT, sql_query TEXT, input_state TEXT, output_state TEXT)")
+    conn.executemany("INSERT INTO audit_events (ts, node, decision) VALUES (?, ?, ?)", [("2026-01-01T10:00:00", "n", "d")] * 2)
+    conn.commit()
+    conn.close()
+    assert len(AuditStore(path).events()) == 1
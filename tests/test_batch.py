@@ -0,0 +1,44 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import json
+
+from agent import batch
+
+
+def _fake_answer(calls, in_flight, peak):
+    async def answer(question):
+        calls.append(question)
+        in_flight.append(1)
+        peak[0] = max(peak[0], len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return {"final_result": question.upper(), "sql_query": None, "error": None, "elapsed_ms": 10.0}
+    return answer
+
+
+def test_batch_bounds_concurrency_and_deduplicates(monkeypatch):
+    calls, in_flight, peak = [], [], [0]
+    monkeypatch.setattr(batch, "_answer", _fake_answer(calls, in_flight, peak))
+    questions = [f"pergunta {i}" for i in range(10)] + ["Pergunta 0?"]
+    records = batch.ask_batch(questions, concurrency=3)
+    assert [r["index"] for r in records] == list(range(11))
+    assert len(calls) == 10 and peak[0] == 3
+    assert records[10]["deduplicated"] and records[10]["final_result"] == "PERGUNTA 0"
+
+
+def test_write_batch_jsonl(monkeypatch, tmp_path):
+    monkeypatch.setattr(batch, "_answer", _fake_answer([], [], [0]))
+    path = tmp_path / "answers.jsonl"
+    totals = asyncio.run(batch.write_batch_jsonl(["a", "b"], str(path), concurrency=2))
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert totals["questions"] == 2 and totals["errors"] == 0
+    assert sorted(r["question"] for r in lines) == ["a", "b"]
+
+
+def test_load_questions(tmp_path):
+    path = tmp_path / "q.txt"
+    path.write_text('# comentário\nQuantos casos?\n\n{"question": "Explique SRAG"}\n', encoding="utf-8")
+    assert batch.load_questions(str(path)) == ["Quantos casos?", "Explique SRAG"]
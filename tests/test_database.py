@@ -0,0 +1,78 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import sqlite3
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from agent.database import create_read_engine, execute_bounded
+from agent.config import SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "srag.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE srag_cases (CS_SEXO TEXT)")
+        conn.executemany("INSERT INTO srag_cases VALUES (?)", [("F",), ("M",)])
+    return str(path)
+
+
+def test_read_engine_applies_pragmas(db_path):
+    engine = create_read_engine(db_path)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -SQLITE_CACHE_SIZE_KB
+        assert conn.execute(text("PRAGMA mmap_size")).scalar() in (0, SQLITE_MMAP_SIZE)
+        assert conn.execute(text("SELECT COUNT(*) FROM srag_cases")).scalar() == 2
+
+
+def test_read_engine_rejects_writes(db_path):
+    engine = create_read_engine(db_path)
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM srag_cases"))
+
+
+def _numbers_db(tmp_path, n):
+    conn = sqlite3.connect(tmp_path / "numbers.db")
+    conn.execute("CREATE TABLE srag_cases (id INTEGER, txt TEXT)")
+    conn.executemany("INSERT INTO srag_cases VALUES (?, ?)", [(i, "x" * 100) for i in range(n)])
+    conn.commit()
+    return conn
+
+
+def test_execute_bounded_row_cap(tmp_path):
+    conn = _numbers_db(tmp_path, 50)
+    result = execute_bounded(conn, "SELECT id FROM srag_cases", max_rows=10, batch_size=3)
+    assert len(result) == 10
+    assert result.truncated and result.truncation_reason == "max_rows"
+    assert result.to_dicts()[0] == {"id": 0}
+
+
+def test_execute_bounded_exact_fit_not_truncated(tmp_path):
+    conn = _numbers_db(tmp_path, 10)
+    result = execute_bounded(conn, "SELECT id FROM srag_cases", max_rows=10)
+    assert len(result) == 10
+    assert not result.truncated
+
+
+def test_execute_bounded_byte_cap(tmp_path):
+    conn = _numbers_db(tmp_path, 50)
+    result = execute_bounded(conn, "SELECT txt FROM srag_cases", max_bytes=550)
+    assert len(result) == 5
+    assert result.truncation_reason == "max_bytes"
+
+
+def test_execute_bounded_deadline(tmp_path):
+    conn = _numbers_db(tmp_path, 1)
+    slow = (
+        "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) "
+        "SELECT COUNT(*) FROM r, srag_cases"
+    )
+    with pytest.raises(TimeoutError):
+        execute_bounded(conn, slow, timeout=0.05)
+    # The progress handler is removed, so the connection stays usable
+    assert execute_bounded(conn, "SELECT COUNT(*) FROM srag_cases").rows == [(1,)]
@@ -0,0 +1,56 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import pytest
+
+from agent.intent_parser import parse_intent, sql_from_intent
+from agent.sql_guard import check_sql
+
+
+def test_count_by_sex_and_year():
+    sql = sql_from_intent("Quantos casos de SRAG de mulheres em 2024?")
+    assert sql == (
+        "SELECT COUNT(*) AS casos FROM srag_cases "
+        "WHERE CS_SEXO = 'F' AND strftime('%Y', DT_NOTIFIC) = '2024';"
+    )
+
+
+def test_rate_with_grouping():
+    sql = sql_from_intent("Taxa de UTI por faixa etária")
+    assert "taxa_uti" in sql and "GROUP BY faixa_etaria" in sql
+
+
+def test_deaths_with_age_filter():
+    intent = parse_intent("Quantos óbitos de idosos em 2024?")
+    assert intent.measure == "count"
+    assert "EVOLUCAO = '2'" in intent.conditions and "NU_IDADE_N >= 60" in intent.conditions
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Quantos casos em Campinas?",
+        "Qual a capital da França?",
+        "Quantos casos de mulheres e homens?",
+        "Qual a taxa de vacinação?",
+    ],
+)
+def test_unknown_or_ambiguous_questions_fall_back(question):
+    assert sql_from_intent(question) is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Quantos casos de SRAG?",
+        "Qual a taxa de mortalidade em 2025?",
+        "Percentual de vacinados contra gripe por ano",
+        "Quantos casos entre 20 e 40 anos por sexo",
+        "Casos por mês em 2025",
+    ],
+)
+def test_generated_sql_passes_guard(question):
+    sql = sql_from_intent(question)
+    assert sql is not None
+    assert check_sql(sql, explain=False).allowed
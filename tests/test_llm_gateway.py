@@ -0,0 +1,93 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import threading
+import time
+
+import pytest
+
+from agent.llm_gateway import LLMGateway, PriorityLimiter, Priority, StubProvider
+
+
+def test_stub_completion_and_accounting():
+    gateway = LLMGateway(StubProvider(lambda prompt: "olá mundo"))
+    assert gateway.complete("diga olá", purpose="test") == "olá mundo"
+    stats = gateway.stats()["test"]
+    assert stats["calls"] == 1 and stats["input_tokens"] == 2 and stats["output_tokens"] == 2
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    def flaky(prompt):
+        attempts.append(prompt)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    gateway = LLMGateway(StubProvider(flaky), max_retries=3, retry_base_seconds=0)
+    assert gateway.complete("x") == "ok"
+    assert gateway.records[-1].attempts == 3
+
+
+def test_permanent_errors_are_not_retried():
+    calls = []
+
+    def broken(prompt):
+        calls.append(prompt)
+        raise ValueError("bad request")
+
+    gateway = LLMGateway(StubProvider(broken), max_retries=3, retry_base_seconds=0)
+    with pytest.raises(ValueError):
+        gateway.complete("x", purpose="test")
+    assert len(calls) == 1
+    assert gateway.stats()["test"]["errors"] == 1
+
+
+def test_limiter_serves_interactive_before_dashboard():
+    limiter = PriorityLimiter(1)
+    limiter.acquire()
+    order = []
+
+    def worker(priority, name):
+        limiter.acquire(priority)
+        order.append(name)
+        limiter.release()
+
+    threads = [threading.Thread(target=worker, args=(Priority.DASHBOARD, "dashboard"))]
+    threads[0].start()
+    while limiter.waiting < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=worker, args=(Priority.INTERACTIVE, "interactive")))
+    threads[1].start()
+    while limiter.waiting < 2:
+        time.sleep(0.001)
+    limiter.release()
+    for t in threads:
+        t.join()
+    assert order == ["interactive", "dashboard"]
+
+
+def test_stream_retries_before_first_token():
+    attempts = []
+
+    class FlakyStream(StubProvider):
+        def stream(self, prompt):
+            attempts.append(prompt)
+            if len(attempts) == 1:
+                raise ConnectionError("reset")
+            yield from super().stream(prompt)
+
+    gateway = LLMGateway(FlakyStream(lambda prompt: "um dois três"), retry_base_seconds=0)
+    assert list(gateway.stream("x", purpose="test")) == ["um ", "dois ", "três"]
+    record = gateway.records[-1]
+    assert record.attempts == 2 and record.first_token_ms is not None and record.output_tokens == 3
+
+
+def test_stub_without_structured_responder_fails_clearly():
+    from agent.routing import RoutingDecision
+
+    gateway = LLMGateway(StubProvider())
+    with pytest.raises(RuntimeError, match="structured_responder"):
+        gateway.structured("rotear", RoutingDecision, purpose="test")
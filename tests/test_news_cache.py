@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import pytest
+
+from agent.news_cache import NewsCache, LocalNewsProvider, dedupe_articles, normalize_url
+
+
+class SlowProvider:
+    name = "slow"
+
+    def __init__(self, articles, delay=0.0, fail=False):
+        self.articles = articles
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def search(self, query):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("Tavily indisponível")
+        return [dict(a) for a in self.articles]
+
+
+ARTICLES = [
+    {"title": "A", "url": "https://www.exemplo.com.br/a/"},
+    {"title": "A (repetida)", "url": "http://exemplo.com.br/a#topo"},
+    {"title": "B", "url": "https://exemplo.com.br/b"},
+]
+
+
+def test_dedupe_by_normalized_url():
+    assert normalize_url("https://www.Exemplo.com.br/a/") == normalize_url("http://exemplo.com.br/a#x")
+    assert [a["title"] for a in dedupe_articles(ARTICLES)] == ["A", "B"]
+    assert dedupe_articles(["texto", "texto"]) == ["texto", "texto"]
+
+
+def test_results_are_cached_until_ttl(tmp_path):
+    provider = SlowProvider(ARTICLES)
+    cache = NewsCache(provider, ttl_seconds=60, cache_dir="")
+    assert len(cache.search("srag")) == 2
+    assert cache.search("  SRAG ") == cache.search("srag")
+    assert provider.calls == 1
+
+    cache.ttl_seconds = 0
+    cache.search("srag")
+    assert provider.calls == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    provider = SlowProvider(ARTICLES)
+    NewsCache(provider, ttl_seconds=60, cache_dir=str(tmp_path)).search("srag")
+    restarted = NewsCache(provider, ttl_seconds=60, cache_dir=str(tmp_path))
+    assert [a["title"] for a in restarted.search("srag")] == ["A", "B"]
+    assert provider.calls == 1
+
+
+def test_concurrent_identical_searches_fetch_once():
+    provider = SlowProvider(ARTICLES, delay=0.2)
+    cache = NewsCache(provider, ttl_seconds=60, cache_dir="")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.search("srag"))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert provider.calls == 1
+    assert len(results) == 6 and all(len(r) == 2 for r in results)
+
+
+def test_failed_refresh_serves_expired_entry():
+    provider = SlowProvider(ARTICLES)
+    cache = NewsCache(provider, ttl_seconds=0, cache_dir="")
+    first = cache.search("srag")
+    provider.fail = True
+    assert cache.search("srag") == first
+    with pytest.raises(RuntimeError):
+        cache.search("outra busca")
+
+
+def test_local_provider_runs_offline(tmp_path, monkeypatch):
+    import json
+    from agent import news_tool
+
+    monkeypatch.setattr(news_tool, "news_cache", NewsCache(LocalNewsProvider(), cache_dir=""))
+    articles = json.loads(news_tool.news_query_tool_run(""))
+    assert len(articles) == 3 and all(".br" in a["url"] for a in articles)
+
+    path = tmp_path / "news.json"
+    path.write_text(json.dumps([{"title": "X", "url": "https://x.br"}]), encoding="utf-8")
+    assert LocalNewsProvider(str(path)).search("srag") == [{"title": "X", "url": "https://x.br"}]
+
+
+def test_news_node_answers_with_readable_text(monkeypatch):
+    from agent import langgraph_agent
+    from agent import news_tool
+
+    monkeypatch.setattr(news_tool, "news_cache", NewsCache(LocalNewsProvider(), cache_dir=""))
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    state = langgraph_agent.news_node({"question": "Quais as últimas notícias sobre SRAG?"})
+    answer = state["final_result"]
+    assert not answer.lstrip().startswith("[")
+    assert answer.startswith("1. **Casos de SRAG seguem em alta")
+    assert "https://exemplo.gov.br/noticias/srag-sul" in answer
+    assert "Boletim aponta aumento" in answer
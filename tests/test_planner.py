@@ -0,0 +1,63 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agent import langgraph_agent
+from agent.intent_parser import sql_from_intent
+from agent.llm_gateway import LLMGateway, StubProvider
+from agent.planner import plan_subquestions
+
+
+def test_comparison_is_split_per_combination():
+    plan = plan_subquestions("Compare a mortalidade entre homens e mulheres em 2024 e 2025")
+    assert [p.label for p in plan] == ["homens, 2024", "homens, 2025", "mulheres, 2024", "mulheres, 2025"]
+    assert plan[0].question == "A mortalidade de homens em 2024?"
+    assert all(sql_from_intent(p.question) for p in plan)
+
+
+def test_simple_question_is_not_split():
+    question = "Quantos casos de mulheres em 2025?"
+    assert [p.question for p in plan_subquestions(question)] == [question]
+
+
+def test_year_range_is_not_split():
+    question = "Quantos casos entre 2023 e 2025?"
+    assert len(plan_subquestions(question)) == 1
+
+
+def test_large_plans_are_not_split():
+    question = "Casos de homens e mulheres em 2021, 2022, 2023, 2024 e 2025"
+    assert len(plan_subquestions(question, max_subqueries=8)) == 1
+    assert len(plan_subquestions(question, max_subqueries=10)) == 10
+
+
+def test_subresults_are_append_only(monkeypatch):
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    existing = [{"order": 0}]
+    assert langgraph_agent.add_subresults(existing, [{"order": 1}]) == [{"order": 0}, {"order": 1}]
+    assert langgraph_agent.add_subresults(None, [{"order": 0}]) == [{"order": 0}]
+    record = {"order": 0, "label": "a", "question": "x", "sql_query": "SELECT 1", "digest": "1", "error": None}
+    state = {"question": "x", "subresults": [record]}
+    assert "subresults" not in langgraph_agent.merge_subresults_node(state)
+
+
+def test_compound_question_runs_parallel_branches(monkeypatch):
+    prompts = []
+
+    def reply(prompt):
+        prompts.append(prompt)
+        return "Resumo comparativo."
+
+    gateway = LLMGateway(StubProvider(reply))
+    monkeypatch.setattr(langgraph_agent, "get_llm_gateway", lambda: gateway)
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    monkeypatch.setattr(langgraph_agent, "is_valid_input", lambda question: True)
+    monkeypatch.setattr(langgraph_agent, "generate_sql_from_question", lambda q: f"SELECT '{q}' AS pergunta")
+    state = langgraph_agent.langgraph_agent.invoke(
+        {"question": "Compare a mortalidade entre homens e mulheres em 2024 e 2025"}
+    )
+    assert [r["order"] for r in sorted(state["subresults"], key=lambda r: r["order"])] == [0, 1, 2, 3]
+    digest = state["sql_digest"]
+    assert digest.index("### homens, 2024") < digest.index("### mulheres, 2025")
+    assert state["final_result"] == "Resumo comparativo."
+    assert "Compare e resuma" in prompts[-1]
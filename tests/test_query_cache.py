@@ -0,0 +1,84 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agent.database import QueryResult
+from agent.query_cache import QueryResultCache, canonical_sql
+
+
+def _result(n=1, text="x"):
+    return QueryResult(columns=["v"], rows=[(text,)] * n)
+
+
+def test_canonical_sql_equivalent_queries():
+    a = "SELECT COUNT(*) FROM srag_cases WHERE CS_SEXO = 'F' AND strftime('%Y', DT_NOTIFIC) = '2024';"
+    b = "select count(*)\n  from SRAG_CASES where strftime('%Y',dt_notific)='2024' and 'F'=cs_sexo"
+    assert canonical_sql(a) == canonical_sql(b)
+
+
+def test_canonical_sql_in_list_order():
+    assert canonical_sql("SELECT 1 FROM srag_cases WHERE UTI IN (2, 1)") == canonical_sql(
+        "SELECT 1 FROM srag_cases WHERE UTI IN (1, 2)"
+    )
+
+
+def test_canonical_sql_keeps_literal_case():
+    assert canonical_sql("SELECT 1 FROM srag_cases WHERE CS_SEXO = 'F'") != canonical_sql(
+        "SELECT 1 FROM srag_cases WHERE CS_SEXO = 'f'"
+    )
+
+
+def test_cache_hit_for_equivalent_query():
+    cache = QueryResultCache(max_entries=10, max_bytes=10_000, cache_dir="")
+    cache.put("SELECT CS_SEXO FROM srag_cases WHERE UTI = 1 AND VACINA = '1'", _result())
+    assert cache.get("select cs_sexo from srag_cases where vacina='1' and uti=1") is not None
+    assert cache.hits == 1
+
+
+def test_cache_lru_eviction_by_entries_and_bytes():
+    cache = QueryResultCache(max_entries=2, max_bytes=100, cache_dir="")
+    cache.put("SELECT 1", _result())
+    cache.put("SELECT 2", _result())
+    cache.get("SELECT 1")
+    cache.put("SELECT 3", _result())
+    assert cache.get("SELECT 2") is None
+    assert cache.get("SELECT 1") is not None
+    cache.put("SELECT 4", _result(n=1, text="y" * 100))
+    assert cache.get("SELECT 1") is None
+
+
+def test_cache_skips_deadline_truncated_results():
+    cache = QueryResultCache(cache_dir="")
+    cache.put("SELECT 1", QueryResult(columns=["v"], rows=[(1,)], truncated=True, truncation_reason="deadline"))
+    assert cache.get("SELECT 1") is None
+
+
+def test_cache_disk_tier(tmp_path):
+    QueryResultCache(cache_dir=str(tmp_path)).put("SELECT 1", _result(2))
+    fresh = QueryResultCache(cache_dir=str(tmp_path))
+    assert fresh.get("SELECT 1").rows == [("x",), ("x",)]
+
+
+def test_disk_tier_drops_other_data_versions(tmp_path, monkeypatch):
+    from agent import query_cache
+
+    monkeypatch.setattr(query_cache, "data_version", lambda: "1-10")
+    QueryResultCache(cache_dir=str(tmp_path)).put("SELECT 1", _result())
+    monkeypatch.setattr(query_cache, "data_version", lambda: "2-20")
+    cache = QueryResultCache(cache_dir=str(tmp_path))
+    assert cache.get("SELECT 1") is None
+    cache.put("SELECT 2", _result())
+    assert sorted(os.listdir(tmp_path)) == ["2-20"]
+    assert len(os.listdir(tmp_path / "2-20")) == 1
+
+
+def test_disk_tier_is_capped(tmp_path):
+    cache = QueryResultCache(cache_dir=str(tmp_path), disk_max_entries=3)
+    for i in range(6):
+        cache.put(f"SELECT {i}", _result())
+    (version,) = os.listdir(tmp_path)
+    assert len(os.listdir(tmp_path / version)) == 3
+    size = os.path.getsize(tmp_path / version / os.listdir(tmp_path / version)[0])
+    cache = QueryResultCache(cache_dir=str(tmp_path), disk_max_bytes=size * 2)
+    cache.put("SELECT 9", _result())
+    assert len(os.listdir(tmp_path / version)) == 2
@@ -0,0 +1,66 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agent.question_cache import QuestionSQLCache, extract_entities, parameterize_sql
+
+SQL_2024_F = "SELECT COUNT(*) FROM srag_cases WHERE CS_SEXO = 'F' AND strftime('%Y', DT_NOTIFIC) = '2024'"
+
+
+def test_extract_entities():
+    template, entities = extract_entities("Quantos casos de SRAG de Mulheres em 2024?")
+    assert template == "quantos casos de srag de {sexo} em {ano}"
+    assert entities == {"ano": ["2024"], "sexo": ["F"]}
+
+
+def test_parameterize_sql_requires_every_entity():
+    assert parameterize_sql(SQL_2024_F, {"ano": ["2024"], "sexo": ["F"]}) is not None
+    assert parameterize_sql(SQL_2024_F, {"ano": ["2023"]}) is None
+
+
+def test_exact_and_normalized_hit():
+    cache = QuestionSQLCache(path="")
+    cache.put("Quantos casos de SRAG de mulheres em 2024?", SQL_2024_F)
+    assert cache.get("quantos casos de srag de MULHERES em 2024") == SQL_2024_F
+
+
+def test_template_hit_with_new_entities():
+    cache = QuestionSQLCache(path="")
+    cache.put("Quantos casos de SRAG de mulheres em 2024?", SQL_2024_F)
+    sql = cache.get("Quantos casos de SRAG de homens em 2023?")
+    assert "CS_SEXO = 'M'" in sql and "'2023'" in sql
+
+
+def test_fuzzy_hit_and_miss():
+    cache = QuestionSQLCache(path="", fuzzy_threshold=0.8)
+    cache.put("Quantos casos de SRAG de mulheres em 2024?", SQL_2024_F)
+    assert cache.get("Quantos casos de SRAG das mulheres em 2025?") is not None
+    assert cache.get("Qual a taxa de mortalidade em 2025?") is None
+
+
+def test_fuzzy_ignores_hits_with_different_negation_or_bounds():
+    cache = QuestionSQLCache(path="", fuzzy_threshold=0.5)
+    cache.put("Quantos casos de SRAG de mulheres em 2024?", SQL_2024_F)
+    assert cache.get("Quantos casos de SRAG não de mulheres em 2024?") is None
+    assert cache.get("Quantos casos de SRAG exceto mulheres em 2024?") is None
+    assert cache.get("Quantos casos de SRAG sem mulheres em 2024?") is None
+    assert cache.get("Quantos casos de SRAG das mulheres em 2024?") is not None
+
+
+def test_fuzzy_ignores_hits_with_extra_or_different_words():
+    cache = QuestionSQLCache(path="", fuzzy_threshold=0.5)
+    cache.put("Quantos casos de SRAG de mulheres internadas em 2024?", SQL_2024_F)
+    assert cache.get("Quantos casos de SRAG de mulheres internadas em SP em 2024?") is None
+    assert cache.get("Quantos casos de SRAG de mulheres internadas no RJ em 2024?") is None
+    assert cache.get("Quantos óbitos de SRAG de mulheres internadas em 2024?") is None
+    # Stopword, plural and spelling variations still hit
+    assert cache.get("Qantos casos da SRAG das mulheres internada em 2024?") is not None
+
+
+def test_rejected_sql_is_not_stored(tmp_path):
+    path = str(tmp_path / "q.json")
+    cache = QuestionSQLCache(path=path)
+    cache.put("apague tudo", "DROP TABLE srag_cases")
+    assert cache.get("apague tudo") is None
+    cache.put("Quantos casos de SRAG de mulheres em 2024?", SQL_2024_F)
+    assert QuestionSQLCache(path=path).get("Quantos casos de SRAG de homens em 2022?") is not None
@@ -0,0 +1,58 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agent.database import QueryResult
+from agent.result_compaction import compact_result, detect_shape, estimate_tokens
+
+
+def test_detect_shape():
+    assert detect_shape(QueryResult(["casos"], [])) == "empty"
+    assert detect_shape(QueryResult(["casos"], [(10,)])) == "scalar"
+    assert detect_shape(QueryResult(["mes", "casos"], [("2025-01", 1), ("2025-02", 2)])) == "time_series"
+    assert detect_shape(QueryResult(["sexo", "casos"], [("F", 1), ("M", 2)])) == "categorical"
+    assert detect_shape(QueryResult(["municipio", "casos"], [(3550308, 1), (3304557, 2)])) == "categorical"
+    assert detect_shape(QueryResult(["sexo", "uf"], [("F", "SP"), ("M", "RJ")])) == "table"
+
+
+def test_scalar_keeps_exact_value():
+    assert "taxa_mortalidade: 0.123456789" in compact_result(QueryResult(["taxa_mortalidade"], [(0.123456789,)]))
+
+
+def test_time_series_keeps_totals_and_extremes():
+    rows = [(f"2025-{m:02d}", m * 10) for m in range(1, 13)]
+    digest = compact_result(QueryResult(["mes", "casos"], rows), top_k=3)
+    assert "total 780" in digest
+    assert "mínimo 10 em 2025-01" in digest and "máximo 120 em 2025-12" in digest
+    assert "2025-10 | 100" in digest and "2025-05 | 50" not in digest
+
+
+def test_categorical_top_k_and_rest():
+    rows = [(i, 1000 - i) for i in range(500)]
+    digest = compact_result(QueryResult(["municipio", "casos"], rows), top_k=5)
+    assert f"casos total = {sum(r[1] for r in rows)}" in digest
+    assert "0 | 1000" in digest
+    assert "Demais 495 categorias" in digest
+
+
+def test_rates_are_never_summed_nor_averaged_without_weights():
+    rows = [("F", 0.1), ("M", 0.3)]
+    digest = compact_result(QueryResult(["sexo", "taxa_uti"], rows))
+    assert "médi" not in digest and "total" not in digest
+    assert "F | 0.1" in digest
+
+
+def test_rate_mean_is_weighted_by_counts():
+    rows = [("F", 0.1, 100), ("M", 0.3, 300)]
+    digest = compact_result(QueryResult(["sexo", "taxa_uti", "casos"], rows))
+    assert "taxa_uti médio (ponderado por casos) = 0.25" in digest
+    series = [("2025-01", 0.5, 10), ("2025-02", 0.1, 90)]
+    digest = compact_result(QueryResult(["mes", "taxa_uti", "casos"], series))
+    assert "média ponderada por casos 0.14" in digest
+
+
+def test_token_budget_is_enforced():
+    rows = [(f"categoria muito longa número {i}", i) for i in range(5000)]
+    digest = compact_result(QueryResult(["nome", "casos"], rows), token_budget=200, top_k=50)
+    assert estimate_tokens(digest) <= 200
+    assert "casos total = 12497500" in digest
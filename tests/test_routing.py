@@ -0,0 +1,51 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import pytest
+
+from agent import langgraph_agent
+from agent.routing import route_question, RoutingDecision
+
+
+@pytest.mark.parametrize(
+    "question,route",
+    [
+        ("Explique o que é SRAG", "explanation"),
+        ("Quais as notícias sobre SRAG?", "news"),
+        ("Quantos casos em 2024?", "sql_generation"),
+        ("Algo sem palavra-chave", "sql_query"),
+    ],
+)
+def test_route_question(question, route):
+    assert route_question(question) == route
+
+
+def test_fused_decision_out_of_scope():
+    state, decision = langgraph_agent._fused_router_output(
+        {"question": "Qual a cotação do dólar?"}, "Qual a cotação do dólar?",
+        RoutingDecision(in_scope=False, route="news"),
+    )
+    assert "next_node" not in state and state["final_result"] == langgraph_agent.BLOCKED_MESSAGE
+    assert decision == langgraph_agent.BLOCKED_DECISION
+
+
+def test_fused_decision_with_sql_skips_generation(monkeypatch):
+    question = "Qual município teve mais casos?"
+    sql = "SELECT CO_MUN_RES, COUNT(*) AS casos FROM srag_cases GROUP BY CO_MUN_RES ORDER BY casos DESC LIMIT 1"
+    monkeypatch.setattr(langgraph_agent.question_cache, "put", lambda q, s: None)
+    state, _ = langgraph_agent._fused_router_output(
+        {"question": question}, question, RoutingDecision(in_scope=True, route="sql_generation", sql=sql)
+    )
+    assert state["next_node"] == "sql_query" and state["sql_query"] == sql
+
+
+def test_fused_mode_falls_back_on_llm_error(monkeypatch):
+    def failing(question):
+        raise RuntimeError("timeout")
+
+    monkeypatch.setattr(langgraph_agent, "AGENT_ROUTING_MODE", "fused")
+    monkeypatch.setattr(langgraph_agent, "fused_route", failing)
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    state = langgraph_agent.router_node({"question": "Quantos casos de SRAG em 2024?"})
+    assert state["next_node"] == "sql_generation"
@@ -0,0 +1,106 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import json
+
+from agent.scope_classifier import (
+    ScopeClassifier,
+    VALID_TRAINING_EXAMPLES,
+    INVALID_TRAINING_EXAMPLES,
+    LLM_IN_SCOPE,
+    LLM_OUT_OF_SCOPE,
+    has_domain_evidence,
+    load_logged_examples,
+)
+
+# Off-topic questions shaped like in-scope ones ("explique o que é", "quantos... em 2024", "taxa de")
+OFF_TOPIC_LOOKALIKES = [
+    "Explique o que é inflação.",
+    "O que é blockchain?",
+    "Quantos casos de corrupção no governo em 2024?",
+    "Qual a taxa de ocupação de hotéis?",
+]
+
+
+def _classifier(**kwargs):
+    return ScopeClassifier(VALID_TRAINING_EXAMPLES, INVALID_TRAINING_EXAMPLES, **kwargs)
+
+
+def test_clear_questions_are_decided_locally():
+    calls = []
+    clf = _classifier()
+    judge = lambda q: calls.append(q) or True
+    assert clf.classify("Quantos casos de SRAG em 2023?", llm_judge=judge)
+    assert not clf.classify("Quem ganhou a copa do mundo?", llm_judge=judge)
+    assert calls == []
+
+
+def test_uncertain_questions_go_to_llm_once():
+    calls = []
+    clf = _classifier(accept_threshold=1.0, reject_threshold=0.0)
+    judge = lambda q: calls.append(q) or False
+    assert not clf.classify("Quantos casos de SRAG em 2023?", llm_judge=judge)
+    assert not clf.classify("quantos casos de srag em 2023", llm_judge=judge)
+    assert len(calls) == 1
+
+
+def test_llm_failure_uses_local_prediction():
+    def failing(q):
+        raise RuntimeError("timeout")
+
+    clf = _classifier(accept_threshold=1.0, reject_threshold=0.0)
+    assert not clf.classify("Qual a cotação do euro?", llm_judge=failing)
+    assert clf.classify("Qual a taxa de mortalidade em 2024?", llm_judge=failing)
+
+
+def test_off_topic_lookalikes_are_never_accepted_locally():
+    calls = []
+    clf = _classifier()
+    judge = lambda q: calls.append(q) or False
+    for question in OFF_TOPIC_LOOKALIKES:
+        assert not has_domain_evidence(question)
+        assert not clf.classify(question, llm_judge=judge)
+    assert calls == OFF_TOPIC_LOOKALIKES
+    # Without the LLM (or when it fails) they are rejected
+    offline = _classifier()
+    assert not any(offline.classify(q) for q in OFF_TOPIC_LOOKALIKES)
+
+
+def test_low_scoring_questions_with_domain_vocabulary_go_to_llm():
+    calls = []
+    clf = _classifier()
+    question = "Qual estado tem mais internações?"
+    assert has_domain_evidence(question) and clf.probability(question) <= clf.reject_threshold
+    assert clf.classify(question, llm_judge=lambda q: calls.append(q) or True)
+    assert calls == [question]
+    # Without the LLM the local prediction still rejects it
+    assert not _classifier().classify(question)
+
+
+def test_domain_evidence_from_vocabulary_and_columns():
+    assert has_domain_evidence("Quantas mulheres foram internadas na UTI?")
+    assert has_domain_evidence("Quantos casos com CS_SEXO = 'F'?")
+    assert has_domain_evidence("Qual a taxa de mortalidade em 2024?")
+    assert not has_domain_evidence("Qual a taxa de juros em 2024?")
+
+
+def test_only_llm_decisions_are_reported_for_training():
+    recorded = []
+    clf = _classifier(on_llm_decision=lambda q, d: recorded.append((q, d)))
+    assert clf.classify("Quantos casos de SRAG em 2023?", llm_judge=lambda q: True)
+    assert not clf.classify("O que é blockchain?", llm_judge=lambda q: False)
+    assert recorded == [("O que é blockchain?", False)]
+
+
+def test_load_logged_examples(tmp_path):
+    path = tmp_path / "agent_audit.log"
+    entries = [
+        {"node": "scope_classifier", "input_state": {"question": "Casos em 2024"}, "decision": LLM_IN_SCOPE},
+        {"node": "scope_classifier", "input_state": {"question": "Preço do ouro"}, "decision": LLM_OUT_OF_SCOPE},
+        # Router decisions include the classifier's own local accepts: never read back
+        {"node": "router_node", "input_state": {"question": "O que é blockchain?"}, "decision": "Roteado para explanation"},
+        {"node": "news_node", "input_state": {"question": "Notícias"}, "decision": "Notícias retornadas com sucesso"},
+    ]
+    path.write_text("\n".join(json.dumps(e) for e in entries) + "\n", encoding="utf-8")
+    assert load_logged_examples(str(path)) == (["Casos em 2024"], ["Preço do ouro"])
@@ -0,0 +1,107 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import uuid
+
+from agent import langgraph_agent
+from agent.intent_parser import parse_intent
+from agent.llm_gateway import LLMGateway, StubProvider
+from agent.session import (
+    is_follow_up,
+    parse_follow_up,
+    merge_intent,
+    refilter_cached,
+    intent_payload,
+    remember_turn,
+    SessionStore,
+)
+
+
+def test_follow_up_needs_context_and_cue():
+    assert is_follow_up("E para mulheres?", {"question": "x"})
+    assert not is_follow_up("E para mulheres?", None)
+    assert not is_follow_up("Quantos casos de mulheres?", {"question": "x"})
+
+
+def test_merge_replaces_filters_on_the_same_column():
+    previous = intent_payload(parse_intent("Quantos casos de homens em 2025?"))
+    merged = merge_intent(previous, parse_follow_up("e para mulheres?"))
+    assert sorted(merged.conditions) == ["CS_SEXO = 'F'", "strftime('%Y', DT_NOTIFIC) = '2025'"]
+    merged = merge_intent(previous, parse_follow_up("e a mortalidade?"))
+    assert merged.measure == "mortality_rate" and len(merged.conditions) == 2
+
+
+def test_grouped_result_is_refiltered_locally():
+    context = {
+        "intent": intent_payload(parse_intent("Quantos casos por sexo em 2025?")),
+        "table": {"columns": ["sexo", "casos"], "rows": [["F", 10], ["M", 12]]},
+    }
+    result = refilter_cached(context, merge_intent(context["intent"], parse_follow_up("e para mulheres?")))
+    assert result.rows == [("F", 10)]
+    # A new year filter cannot be answered from the 2025 rows
+    assert refilter_cached(context, merge_intent(context["intent"], parse_follow_up("e em 2024?"))) is None
+
+
+def test_context_stays_bounded():
+    context = None
+    for i in range(20):
+        state = {"question": f"Quantos casos em {2000 + i}?", "sql_query": "SELECT 1", "sql_digest": "x" * 10_000}
+        context = remember_turn(state, context)
+    assert len(context["history"]) == 5
+    assert len(context["digest"]) <= 1500
+
+
+def test_session_follow_up_refines_previous_answer(monkeypatch):
+    gateway = LLMGateway(StubProvider(lambda prompt: "Resumo."))
+    monkeypatch.setattr(langgraph_agent, "get_llm_gateway", lambda: gateway)
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    monkeypatch.setattr(langgraph_agent, "is_valid_input", lambda question: True)
+    generated = []
+    generate = langgraph_agent.generate_sql_from_question
+    monkeypatch.setattr(
+        langgraph_agent, "generate_sql_from_question", lambda q: generated.append(q) or generate(q)
+    )
+    session_id = uuid.uuid4().hex
+    first = langgraph_agent.run_session_turn("Quantos casos por sexo?", session_id)
+    assert first["context"]["intent"]["group_by"] == "sexo"
+    second = langgraph_agent.run_session_turn("E para mulheres?", session_id)
+    assert second["follow_up"] is True
+    assert "CS_SEXO = 'F'" in second["sql_query"]
+    assert generated == ["Quantos casos por sexo?"]
+    # Another session has no context: the same question is not a follow-up
+    other = langgraph_agent.run_session_turn("E para mulheres?", uuid.uuid4().hex)
+    assert not other.get("follow_up")
+    langgraph_agent.reset_session(session_id)
+    assert langgraph_agent.session_store.get(session_id) is None
+
+
+def test_unparsed_follow_up_goes_through_the_guardrail(monkeypatch):
+    checked = []
+    monkeypatch.setattr(langgraph_agent, "audit_log", lambda *args: None)
+    monkeypatch.setattr(langgraph_agent, "is_valid_input", lambda question: checked.append(question) or False)
+    context = {"question": "Quantos casos em 2024?", "sql_query": "SELECT 1", "intent": None, "history": []}
+    state = langgraph_agent.router_node({"question": "E quantos gols o Flamengo fez em 2024?", "context": context})
+    assert checked == ["E quantos gols o Flamengo fez em 2024?"]
+    assert state["final_result"] == langgraph_agent.BLOCKED_MESSAGE
+    assert not state.get("follow_up")
+    # A follow-up the intent parser reads is refined directly
+    state = langgraph_agent.router_node({"question": "E para mulheres?", "context": context})
+    assert state["next_node"] == "follow_up"
+    assert checked == ["E quantos gols o Flamengo fez em 2024?"]
+
+
+def test_session_store_is_bounded_and_evicts_idle_sessions():
+    now = [0.0]
+    store = SessionStore(max_sessions=2, idle_seconds=60, clock=lambda: now[0])
+    for session_id in ("a", "b", "c"):
+        store.put(session_id, {"question": session_id})
+    assert len(store) == 2 and store.get("a") is None
+    now[0] = 30
+    store.get("b")
+    store.put("b", {"question": "b2"})
+    now[0] = 80
+    # "c" was last used at 0, "b" at 30
+    assert store.get("c") is None and store.get("b") == {"question": "b2"}
+    now[0] = 200
+    assert store.get("b") is None and len(store) == 0
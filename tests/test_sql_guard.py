@@ -0,0 +1,82 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import sqlite3
+import pytest
+from agent.sql_guard import check_sql
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE srag_cases (CS_SEXO TEXT, EVOLUCAO TEXT, UTI REAL, DT_NOTIFIC TEXT)")
+    return conn
+
+
+def test_aggregate_query_is_allowed_unchanged(conn):
+    result = check_sql("SELECT COUNT(*) FROM srag_cases WHERE CS_SEXO='F';", conn)
+    assert result.allowed
+    assert "LIMIT" not in result.sql
+
+
+def test_row_query_gets_limit(conn):
+    result = check_sql("SELECT * FROM srag_cases", conn, max_rows=50)
+    assert result.allowed
+    assert result.sql.endswith("LIMIT 50")
+
+
+def test_large_limit_is_clamped(conn):
+    result = check_sql("SELECT CS_SEXO FROM srag_cases LIMIT 999999", conn, max_rows=100)
+    assert result.sql.endswith("LIMIT 100")
+
+
+def test_group_by_alias_is_valid(conn):
+    query = "SELECT CS_SEXO, COUNT(*) AS total FROM srag_cases GROUP BY CS_SEXO ORDER BY total DESC"
+    assert check_sql(query, conn).allowed
+
+
+@pytest.mark.parametrize("query", [
+    "DELETE FROM srag_cases",
+    "SELECT 1; DROP TABLE srag_cases",
+    "SELECT * FROM users",
+    "SELECT NOT_A_COLUMN FROM srag_cases",
+    "SELECT COUNT(*) FROM srag_cases a, srag_cases b",
+    "SELECT COUNT(*) FROM srag_cases a JOIN srag_cases b ON a.CS_SEXO = b.CS_SEXO",
+    "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) SELECT COUNT(*) FROM r",
+    "SELECT COUNT(*) FROM srag_cases s WHERE UTI = (SELECT MAX(UTI) FROM srag_cases t WHERE t.CS_SEXO = s.CS_SEXO)",
+    "SELEC * FROM srag_cases",
+])
+def test_rejected_queries(conn, query):
+    result = check_sql(query, conn)
+    assert not result.allowed
+    assert result.reason
+
+
+def test_too_many_full_scans_rejected(conn):
+    query = (
+        "SELECT (SELECT COUNT(*) FROM srag_cases), (SELECT COUNT(*) FROM srag_cases WHERE UTI = 1), "
+        "(SELECT COUNT(*) FROM srag_cases WHERE EVOLUCAO = '2')"
+    )
+    assert not check_sql(query, conn).allowed
+
+
+def test_aliased_full_scans_are_counted(conn):
+    # EXPLAIN QUERY PLAN reports aliased tables by alias ("SCAN b")
+    query = (
+        "SELECT (SELECT COUNT(*) FROM srag_cases a), (SELECT COUNT(*) FROM srag_cases b WHERE UTI = 1), "
+        "(SELECT COUNT(*) FROM srag_cases c WHERE EVOLUCAO = '2')"
+    )
+    result = check_sql(query, conn)
+    assert not result.allowed
+    assert "varreduras" in result.reason
+
+
+def test_double_quoted_values_are_read_as_strings(conn):
+    result = check_sql('SELECT COUNT(*) FROM srag_cases WHERE CS_SEXO = "F" AND EVOLUCAO IN ("1", "2")', conn)
+    assert result.allowed
+    assert "CS_SEXO = 'F'" in result.sql and "IN ('1', '2')" in result.sql
+    # Quoted column names are still columns
+    assert check_sql('SELECT COUNT(*) FROM srag_cases WHERE "CS_SEXO" = \'F\'', conn).allowed
+    result = check_sql('SELECT "F" FROM srag_cases', conn)
+    assert not result.allowed and "aspas simples" in result.reason
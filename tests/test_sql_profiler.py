@@ -0,0 +1,61 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import json
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from agent.sql_profiler import SQLProfiler, fingerprint, install_profiler
+
+
+def _engine(tmp_path, profiler):
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (a INTEGER, b TEXT)"))
+        conn.execute(text("INSERT INTO t VALUES (1, 'x'), (2, 'y'), (3, 'x')"))
+    return install_profiler(engine, profiler)
+
+
+def test_fingerprint_replaces_literals():
+    assert fingerprint("SELECT  * FROM t WHERE a = 10 AND b = 'it''s' AND c IN (1, 2, 3);") == (
+        "SELECT * FROM t WHERE a = ? AND b = ? AND c IN (?)"
+    )
+    assert fingerprint("SELECT strftime('%Y', d) FROM t2") == "SELECT strftime(?, d) FROM t2"
+
+
+def test_engine_queries_are_timed_with_row_counts(tmp_path):
+    profiler = SQLProfiler(slow_ms=1e9, log_path=None)
+    engine = _engine(tmp_path, profiler)
+    with engine.connect() as conn:
+        for value in ("x", "y"):
+            pd.read_sql(f"SELECT a FROM t WHERE b = '{value}'", conn)
+    (stats,) = profiler.top()
+    assert stats.fingerprint == "SELECT a FROM t WHERE b = ?"
+    assert stats.count == 2 and stats.rows == 3
+    assert stats.plan is None
+
+
+def test_slow_queries_are_explained_and_logged(tmp_path):
+    log = tmp_path / "slow.log"
+    profiler = SQLProfiler(slow_ms=0, log_path=str(log))
+    engine = _engine(tmp_path, profiler)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT b, COUNT(*) FROM t GROUP BY b")).fetchall()
+    (stats,) = profiler.top()
+    assert any("SCAN" in step for step in stats.plan)
+    entry = json.loads(log.read_text().splitlines()[0])
+    assert entry["rows"] == 2 and entry["plan"] == stats.plan
+    other = SQLProfiler(log_path=None)
+    assert other.load_log(str(log)) == 1
+    assert other.top()[0].plan == stats.plan
+    assert "GROUP BY" in other.report()
+
+
+def test_profiler_is_bounded():
+    profiler = SQLProfiler(slow_ms=1e9, log_path=None, max_fingerprints=3)
+    for i in range(10):
+        profiler.record(f"SELECT c{i} FROM t", float(i), 1, "agent")
+    assert len(profiler.stats) == 3
+    assert profiler.top(1)[0].fingerprint == "SELECT c9 FROM t"
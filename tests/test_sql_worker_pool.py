@@ -0,0 +1,44 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import sqlite3
+import pytest
+from agent.sql_worker_pool import SQLWorkerPool, QueryResourceLimitError
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory):
+    path = tmp_path_factory.mktemp("db") / "srag.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE srag_cases (CS_SEXO TEXT, EVOLUCAO TEXT)")
+        conn.executemany("INSERT INTO srag_cases VALUES (?, ?)", [("F", "1"), ("M", "2"), ("F", "2")])
+    pool = SQLWorkerPool(str(path), processes=1, cpu_seconds=1, timeout=30)
+    yield pool
+    pool.shutdown()
+
+
+def test_worker_returns_query_result(pool):
+    result = pool.execute("SELECT CS_SEXO, COUNT(*) AS n FROM srag_cases GROUP BY CS_SEXO ORDER BY CS_SEXO")
+    assert result.columns == ["CS_SEXO", "n"]
+    assert result.to_dicts() == [{"CS_SEXO": "F", "n": 2}, {"CS_SEXO": "M", "n": 1}]
+    assert not result.truncated
+
+
+def test_worker_async_execute(pool):
+    result = asyncio.run(pool.aexecute("SELECT COUNT(*) FROM srag_cases"))
+    assert result.rows == [(3,)]
+
+
+def test_worker_connection_is_read_only(pool):
+    with pytest.raises(sqlite3.OperationalError):
+        pool.execute("DELETE FROM srag_cases")
+
+
+def test_worker_enforces_cpu_limit(pool):
+    slow = "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) SELECT COUNT(*) FROM r"
+    with pytest.raises(QueryResourceLimitError):
+        pool.execute(slow)
+    # The worker survives and keeps serving queries
+    assert pool.execute("SELECT COUNT(*) FROM srag_cases").rows == [(3,)]
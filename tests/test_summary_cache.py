@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agent.summary_cache import SummaryCache, news_digest
+
+NEWS = [{"title": "Alta de casos", "url": "https://a"}]
+
+
+def _cache(tmp_path, version, calls, delay=0.0):
+    def generate(noticias, priority):
+        calls.append(priority)
+        time.sleep(delay)
+        return f"resumo {version['v']} {len(noticias)}"
+
+    def stream(noticias, priority):
+        calls.append(priority)
+        time.sleep(delay)
+        yield "resumo "
+        yield f"{version['v']}"
+
+    return SummaryCache(str(tmp_path / "summary.json"), generate, stream, version=lambda: version["v"])
+
+
+def test_key_changes_with_data_version_and_news(tmp_path):
+    version = {"v": "1"}
+    cache = _cache(tmp_path, version, [])
+    key = cache.key(NEWS)
+    assert cache.key(NEWS) == key
+    assert cache.key([{"title": "Outra", "url": "https://b"}]) != key
+    version["v"] = "2"
+    assert cache.key(NEWS) != key
+    # Only the first three items go into the prompt
+    assert news_digest(NEWS * 3) == news_digest(NEWS * 4)
+
+
+def test_get_returns_stored_text_and_refreshes_in_background(tmp_path):
+    version, calls = {"v": "1"}, []
+    cache = _cache(tmp_path, version, calls)
+    artifact, fresh = cache.get(NEWS)
+    assert artifact is None and not fresh
+    assert cache.wait(NEWS, timeout=5).text == "resumo 1 1"
+    artifact, fresh = cache.get(NEWS)
+    assert fresh and artifact.text == "resumo 1 1"
+    assert len(calls) == 1
+
+    version["v"] = "2"
+    artifact, fresh = cache.get(NEWS)
+    # The previous text is served while the new one is generated
+    assert not fresh and artifact.text == "resumo 1 1"
+    assert cache.latest() is not None
+    assert cache.wait(NEWS, timeout=5).text == "resumo 2 1"
+    assert len(calls) == 2
+
+
+def test_concurrent_readers_share_one_generation(tmp_path):
+    calls = []
+    cache = _cache(tmp_path, {"v": "1"}, calls, delay=0.2)
+    results = []
+
+    def reader():
+        results.append("".join(cache.stream(NEWS)))
+
+    threads = [threading.Thread(target=reader) for _ in range(5)]
+    threads.append(threading.Thread(target=lambda: results.append(cache.wait(NEWS, timeout=5).text)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert set(results) == {"resumo 1"}
+
+
+def test_artifact_survives_restart(tmp_path):
+    calls = []
+    cache = _cache(tmp_path, {"v": "1"}, calls)
+    assert "".join(cache.stream(NEWS)) == "resumo 1"
+    reloaded = _cache(tmp_path, {"v": "1"}, calls)
+    artifact, fresh = reloaded.get(NEWS)
+    assert fresh and artifact.text == "resumo 1"
+    assert len(calls) == 1
+
+
+def test_failed_generation_is_not_stored(tmp_path):
+    def generate(noticias, priority):
+        raise RuntimeError("LLM fora do ar")
+
+    cache = SummaryCache(str(tmp_path / "summary.json"), generate, version=lambda: "1")
+    try:
+        cache.wait(NEWS, timeout=5)
+        assert False, "expected the generation error"
+    except RuntimeError:
+        pass
+    assert cache.get(NEWS)[0] is None
+    assert not os.path.exists(tmp_path / "summary.json")
+
+
+def test_first_summary_is_streamed_in_chunks(tmp_path):
+    calls = []
+    cache = _cache(tmp_path, {"v": "1"}, calls)
+    artifact, fresh = cache.peek(NEWS)
+    assert artifact is None and not fresh
+    # peek starts no background generation, so the caller leads the stream token by token
+    chunks = list(cache.stream(NEWS))
+    assert chunks == ["resumo ", "1"]
+    assert len(calls) == 1
+    assert cache.peek(NEWS)[1]
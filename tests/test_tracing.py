@@ -0,0 +1,59 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import json
+import urllib.request
+
+from agent.tracing import LatencyHistogram, Tracer, start_metrics_server, traced_node, tracer
+
+
+def test_histogram_percentiles_within_bucket_error():
+    h = LatencyHistogram()
+    for ms in range(1, 1001):
+        h.observe(float(ms))
+    assert h.count == 1000
+    for q, exact in ((0.5, 500), (0.95, 950), (0.99, 990)):
+        assert exact <= h.percentile(q) <= exact * LatencyHistogram.BASE
+    assert h.percentile(1.0) == 1000
+
+
+def test_disabled_tracer_records_nothing():
+    t = Tracer(enabled=False)
+    with t.span("router", "node") as span:
+        span.set(rows=1)
+    t.record("summarization", "llm", 10.0)
+    assert t.summary() == {} and t.recent_spans() == []
+
+
+def test_spans_nest_into_one_trace():
+    t = Tracer(enabled=True)
+    with t.span("agent", "request") as root:
+        with t.span("sql_query", "node"):
+            with t.span("query_sqlite", "sql") as sql:
+                sql.set(rows=3)
+        t.record("summarization", "llm", 12.5, output_tokens=7)
+    spans = {s["name"]: s for s in t.recent_spans()}
+    assert {s["trace_id"] for s in spans.values()} == {root.trace_id}
+    assert spans["query_sqlite"]["parent_id"] == spans["sql_query"]["span_id"]
+    assert spans["summarization"]["parent_id"] == root.span_id
+    assert spans["query_sqlite"]["attributes"] == {"rows": 3}
+    assert t.summary()["llm:summarization"]["p50_ms"] == 12.5
+
+
+def test_traced_node_and_exports(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", True)
+    tracer.reset()
+    node = traced_node("router", lambda state, **kwargs: {**state, "next_node": "news"})
+    assert node({"question": "q"})["next_node"] == "news"
+    path = tmp_path / "traces.json"
+    tracer.export(str(path))
+    assert json.loads(path.read_text())["latency"]["node:router"]["count"] == 1
+    server = start_metrics_server(0)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        assert 'agent_span_duration_ms_count{kind="node",name="router"} 1' in body
+    finally:
+        server.shutdown()
+        tracer.reset()